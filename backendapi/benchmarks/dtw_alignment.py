@@ -0,0 +1,64 @@
+"""
+Benchmark: banded DTW alignment of two takes (temporal_alignment.align_takes).
+
+Builds a synthetic take and a 20% slower, late-starting copy of it, then times the
+alignment and records peak memory against what a full n x m DTW matrix would need.
+
+    cd backendapi && python benchmarks/dtw_alignment.py [--sizes 1000 5000 10000 20000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from landmarks import LandmarkSequence, NUM_LANDMARKS  # noqa: E402
+from motion_metrics import MotionFeatures, PairFeatures  # noqa: E402
+from temporal_alignment import align_takes  # noqa: E402
+
+
+def synthetic_take(frames: int, stretch: float = 1.0, delay: int = 0, seed: int = 0) -> LandmarkSequence:
+    """A squat-like oscillation of every joint around a fixed skeleton"""
+    rng = np.random.default_rng(seed)
+    skeleton = rng.random((NUM_LANDMARKS, 2)) * 300 + 200
+    phase = np.maximum(np.arange(frames) - delay, 0) * 0.08 / stretch
+    data = np.zeros((frames, NUM_LANDMARKS, 4), dtype=np.float32)
+    data[:, :, 0] = skeleton[:, 0] + 30 * np.sin(phase[:, None] + np.arange(NUM_LANDMARKS))
+    data[:, :, 1] = skeleton[:, 1] + 60 * np.abs(np.sin(phase[:, None] / 2))
+    data[:, :, 3] = 1.0
+    data[:, [11, 12, 23, 24], 1] = [300, 300, 450, 450]
+    return LandmarkSequence(data, np.ones(frames, dtype=bool), fps=30.0, width=1280, height=720)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 20000])
+    args = parser.parse_args()
+
+    print(f"{'frames':>8}{'second':>8}{'window':>8}{'seconds':>9}{'peak MB':>9}{'full MB':>9}"
+          f"{'frame score':>13}{'dtw score':>11}")
+    for frames in args.sizes:
+        first = MotionFeatures(synthetic_take(frames))
+        second_frames = int(frames * 1.2)
+        second = MotionFeatures(synthetic_take(second_frames, stretch=1.2, delay=frames // 50))
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        alignment = align_takes(first, second)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        frame_score = PairFeatures(first, second).score(normalize_by=first)
+        dtw_score = PairFeatures(first, second, pairs=alignment.path).score(normalize_by=first)
+        full_mb = frames * second_frames * 8 / 1024 / 1024
+        print(f"{frames:>8}{second_frames:>8}{alignment.window:>8}{elapsed:>9.2f}{peak / 1024 / 1024:>9.1f}"
+              f"{full_mb:>9.0f}{frame_score:>13.1f}{dtw_score:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
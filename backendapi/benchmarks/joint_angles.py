@@ -0,0 +1,71 @@
+"""
+Benchmark: per-call joint angles (the old PoseTracker._calculate_angle) vs the batched
+joint_angles kernel, for one live frame and for whole uploaded videos.
+
+    cd backendapi && python benchmarks/joint_angles.py [--frames 1000 10000 100000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from joint_angles import ANGLE_NAMES, JOINT_ANGLES, joint_angles  # noqa: E402
+
+
+def calculate_angle(a, b, c):
+    """PoseTracker._calculate_angle as it was: three arrays and two scalar arctan2 per angle"""
+    a = np.array(a)
+    b = np.array(b)
+    c = np.array(c)
+
+    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
+    angle = np.abs(radians * 180.0 / np.pi)
+
+    if angle > 180.0:
+        angle = 360 - angle
+
+    return angle
+
+
+def per_call_angles(frame: np.ndarray) -> list:
+    return [calculate_angle(frame[i, :2], frame[j, :2], frame[k, :2]) for i, j, k in JOINT_ANGLES.values()]
+
+
+def best_of(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = rng.random((33, 4)).astype(np.float32)
+    frame[:, 3] = 1.0
+    per_call = best_of(lambda: per_call_angles(frame), 2000)
+    one_angle = best_of(lambda: calculate_angle(frame[23, :2], frame[25, :2], frame[27, :2]), 20000)
+    kernel = best_of(lambda: joint_angles(frame), 2000)
+    print(f"one frame, {len(ANGLE_NAMES)} angles")
+    print(f"  per call, one knee angle  {one_angle * 1e6:8.1f} us")
+    print(f"  per call, {len(JOINT_ANGLES)} angles      {per_call * 1e6:8.1f} us")
+    print(f"  kernel, all {len(ANGLE_NAMES)} angles     {kernel * 1e6:8.1f} us")
+
+    print(f"\n{'frames':>8}{'per call ms':>14}{'kernel ms':>12}{'speedup':>10}")
+    for frames in args.frames:
+        data = rng.random((frames, 33, 4)).astype(np.float32)
+        data[:, :, 3] = 1.0
+        number = max(1, 10000 // frames)
+        kernel = best_of(lambda: joint_angles(data), number)
+        # The per-call path is linear in frames; time a slice and scale
+        sample = data[:min(frames, 1000)]
+        per_call = best_of(lambda: [per_call_angles(f) for f in sample], 1) * frames / len(sample)
+        print(f"{frames:>8}{per_call * 1000:>14.1f}{kernel * 1000:>12.2f}{per_call / kernel:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
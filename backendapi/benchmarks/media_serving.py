@@ -0,0 +1,106 @@
+"""
+Benchmark: video serving through the old StaticFiles mount vs the /uploads media route.
+
+Serves one synthetic video both ways from a local uvicorn server and measures what
+the comparison screen does: a full download, scrubbing (seeks issued as byte-range
+requests) and revalidating a cached copy.
+
+    cd backendapi && python benchmarks/media_serving.py [--size-mb 50] [--seeks 40]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_app(directory: str) -> FastAPI:
+    os.chdir(directory)
+    from media_serving import media_router
+
+    app = FastAPI()
+    app.include_router(media_router)
+    app.mount("/static-uploads", StaticFiles(directory="uploads"), name="static-uploads")
+    return app
+
+
+def start_server(app: FastAPI) -> uvicorn.Server:
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def measure(client: httpx.Client, url: str, requests: list) -> dict:
+    """Run (headers) requests against url; report latency and bytes received"""
+    latencies, received, statuses = [], 0, set()
+    for headers in requests:
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        received += len(response.content)
+        statuses.add(response.status_code)
+    return {
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p95_ms": sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000,
+        "mb": received / 1024 / 1024,
+        "status": ",".join(str(status) for status in sorted(statuses)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--seeks", type=int, default=40)
+    parser.add_argument("--downloads", type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="media-bench-")
+    os.makedirs(os.path.join(directory, "uploads"))
+    size = args.size_mb * 1024 * 1024
+    with open(os.path.join(directory, "uploads", "bench.mp4"), "wb") as f:
+        f.write(os.urandom(size))
+
+    server = start_server(build_app(directory))
+    port = server.servers[0].sockets[0].getsockname()[1]
+    base = f"http://127.0.0.1:{port}"
+    routes = {"StaticFiles mount": f"{base}/static-uploads/bench.mp4", "media route": f"{base}/uploads/bench.mp4"}
+
+    rng = random.Random(0)
+    seek_chunk = 1024 * 1024
+    seeks = [{"Range": f"bytes={start}-{start + seek_chunk - 1}"}
+             for start in (rng.randrange(0, size - seek_chunk) for _ in range(args.seeks))]
+
+    print(f"{args.size_mb} MB video, {args.downloads} downloads, {args.seeks} seeks of 1 MB\n")
+    print(f"{'scenario':<14}{'server':<20}{'mean ms':>10}{'p95 ms':>10}{'MB recv':>10}  status")
+    with httpx.Client(timeout=120) as client:
+        for name, url in routes.items():
+            etag = client.head(url).headers.get("etag")
+            scenarios = {
+                "download": [{}] * args.downloads,
+                "scrub": seeks,
+                "revalidate": [{"If-None-Match": etag}] * args.seeks,
+            }
+            for scenario, requests in scenarios.items():
+                result = measure(client, url, requests)
+                print(f"{scenario:<14}{name:<20}{result['mean_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+                      f"{result['mb']:>10.1f}  {result['status']}")
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: building the tracking/demo page HTML on every request vs the page cache.
+
+Measures server time per request for the old path (render the f-string, encode it into
+an HTMLResponse) and the cached one, and the bytes each kind of request puts on the wire.
+
+    cd backendapi && python benchmarks/page_cache.py [--requests 2000]
+"""
+import argparse
+import gzip
+import os
+import sys
+import timeit
+
+from fastapi.responses import HTMLResponse
+from starlette.requests import Request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from demo_session_tracker import render_demo_page  # noqa: E402
+from page_cache import PageCache, brotli  # noqa: E402
+from simple_live_tracker import render_tracking_page  # noqa: E402
+
+
+def make_request(headers: dict) -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw, "query_string": b""})
+
+
+def best_of(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    pages = {
+        # The keys the routes use for their default parameters
+        "tracking": (("tracking", True, "squats", "auto"), lambda: render_tracking_page(True, "squats", "auto")),
+        "demo": (("demo", True, 480, 640), lambda: render_demo_page(True, 480, 640)),
+    }
+    for name, (key, render) in pages.items():
+        cache = PageCache()
+        page = cache.get(key, render)
+        fresh = make_request({"accept-encoding": "gzip, deflate, br"})
+        revalidate = make_request({"accept-encoding": "gzip, deflate, br",
+                                   "if-none-match": page.etags[page.encoding_for("gzip, deflate, br")]})
+
+        old = best_of(lambda: HTMLResponse(content=render()), args.requests)
+        # What compressing per request (e.g. GZipMiddleware) would cost on top of rendering
+        old_gzip = best_of(lambda: gzip.compress(render().encode(), compresslevel=9), max(1, args.requests // 20))
+        # A hit never leaves the event loop, so the sync lookup is the whole cost of a cached request
+        cached = best_of(lambda: cache.get(key, render).response(fresh), args.requests)
+        not_modified = best_of(lambda: cache.get(key, render).response(revalidate), args.requests)
+
+        print(f"{name} page")
+        print(f"  render per request           {old * 1e6:8.1f} us")
+        print(f"  render + gzip per request    {old_gzip * 1e6:8.1f} us")
+        print(f"  cached                       {cached * 1e6:8.1f} us")
+        print(f"  cached, 304                  {not_modified * 1e6:8.1f} us")
+        for encoding, body in page.bodies.items():
+            print(f"  {encoding:<9} body {len(body):>10} bytes")
+        print(f"  304       body {0:>10} bytes")
+    if brotli is None:
+        print("\n(brotli not installed: br bodies skipped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+import cv2
+import numpy as np
+from landmarks import LandmarkSequence, LandmarkSequenceBuilder, NUM_LANDMARKS
+from pose_processor import create_pose
+from video_pipeline import frame_step, inference_size, prepare_for_inference, seek_frame
+
+# Long videos are split into frame ranges inferred in parallel worker processes,
+# each with its own Pose graph. Chunks start CHUNK_OVERLAP frames early so the
+# graph's tracker is warm by the time its range begins; the overlap is blended.
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", str(os.cpu_count() or 1)))
+CHUNK_MIN_FRAMES = int(os.getenv("CHUNK_MIN_FRAMES", "900"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "15"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Per worker process: one Pose graph reused (and reset) across the chunks it is given
+_process_pose = None
+_process_pose_complexity = None
+
+
+def plan_chunks(total_frames: int, workers: Optional[int] = None, min_frames: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Split [0, total_frames) into contiguous ranges of at least min_frames each, one per worker at most.
+    Returns a single range when the video is too short to be worth splitting.
+    """
+    workers = workers or CHUNK_WORKERS
+    min_frames = min_frames or CHUNK_MIN_FRAMES
+    count = max(1, min(workers, total_frames // max(min_frames, 1)))
+    bounds = np.linspace(0, total_frames, count + 1).astype(int)
+    return [(int(bounds[i]), int(bounds[i + 1])) for i in range(count)]
+
+
+def _extract_chunk(video_path: str, start: int, end: Optional[int], model_complexity: int,
+                   step: int = 1, max_side: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Infer every step-th frame of [start, end) in a worker process; end=None reads to the end of the video.
+    start must be a multiple of step so sampled frames line up across chunks.
+    """
+    global _process_pose, _process_pose_complexity
+    if _process_pose is None or _process_pose_complexity != model_complexity:
+        _process_pose = create_pose(model_complexity)
+        _process_pose_complexity = model_complexity
+    else:
+        _process_pose.reset()
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    size = inference_size(width, height, max_side)
+    # stitch_chunks places this chunk at exactly start, so the seek has to be frame-accurate
+    if not seek_frame(cap, start, cap.get(cv2.CAP_PROP_FPS)):
+        cap.release()
+        return np.zeros((0, NUM_LANDMARKS, 4), dtype=np.float32), np.zeros(0, dtype=bool)
+
+    builder = LandmarkSequenceBuilder(width, height, capacity=-(-(end - start) // step) if end is not None else 0)
+    frame_index = start
+    try:
+        while end is None or frame_index < end:
+            if frame_index % step:
+                # Skipped frame: advance the stream without decoding it into an image
+                if not cap.grab():
+                    break
+                frame_index += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            results = _process_pose.process(prepare_for_inference(frame, size))
+            builder.append(results.pose_landmarks)
+            frame_index += 1
+    finally:
+        cap.release()
+
+    chunk = builder.finish()
+    return chunk.data, chunk.valid
+
+
+def stitch_chunks(chunks: List[Tuple[int, np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Join (start, data, valid) chunks sorted by start. Where consecutive chunks overlap,
+    frames detected by both are cross-faded from the earlier chunk to the later one so the
+    seam has no jump; frames detected by only one chunk are taken from it.
+    """
+    total = max(start + len(valid) for start, _, valid in chunks)
+    data = np.zeros((total, *chunks[0][1].shape[1:]), dtype=np.float32)
+    valid = np.zeros(total, dtype=bool)
+
+    covered = 0
+    for start, chunk_data, chunk_valid in chunks:
+        overlap = max(0, min(covered - start, len(chunk_valid)))
+        if overlap:
+            seam = slice(start, start + overlap)
+            weight = ((np.arange(overlap) + 1) / (overlap + 1)).astype(np.float32)[:, None, None]
+            both = valid[seam] & chunk_valid[:overlap]
+            only_new = chunk_valid[:overlap] & ~valid[seam]
+            blended = (1 - weight) * data[seam] + weight * chunk_data[:overlap]
+            data[seam] = np.where(both[:, None, None], blended, data[seam])
+            data[seam][only_new] = chunk_data[:overlap][only_new]
+            valid[seam] |= chunk_valid[:overlap]
+        tail = slice(start + overlap, start + len(chunk_valid))
+        data[tail] = chunk_data[overlap:]
+        valid[tail] = chunk_valid[overlap:]
+        covered = max(covered, start + len(chunk_valid))
+    return data, valid
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: MediaPipe and OpenCV hold threads that do not survive fork
+            _executor = ProcessPoolExecutor(max_workers=CHUNK_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def should_chunk(video_path: str) -> bool:
+    """True when a video is long enough to be split across more than one worker process"""
+    if CHUNK_WORKERS <= 1:
+        return False
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    cap.release()
+    return len(plan_chunks(total_frames)) > 1
+
+
+def extract_chunked(video_path: str, model_complexity: int, progress=None,
+                    analysis_fps: float = 0.0, max_side: int = 0) -> LandmarkSequence:
+    """
+    Extract landmarks for a whole video across worker processes and stitch them back together.
+    Sampling works as in process_video; the result is at the sampled frame rate.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    step = frame_step(fps, analysis_fps)
+
+    # Chunk boundaries fall on sampled frames so every chunk samples the same frames a single pass would
+    ranges = [(start - start % step, end - end % step if end < total_frames else end)
+              for start, end in plan_chunks(total_frames)]
+    # Workers resolve paths on their own, so never hand them a cwd-relative one
+    video_path = os.path.abspath(video_path)
+    print(f"Extracting {os.path.basename(video_path)} in {len(ranges)} chunks of ~{total_frames // len(ranges)} frames")
+
+    executor = _get_executor()
+    futures = {}
+    for i, (start, end) in enumerate(ranges):
+        padded_start = max(0, start - CHUNK_OVERLAP * step)
+        # The last chunk reads to EOF since container frame counts are estimates
+        padded_end = end if i < len(ranges) - 1 else None
+        future = executor.submit(_extract_chunk, video_path, padded_start, padded_end, model_complexity, step, max_side)
+        futures[future] = (padded_start // step, (start - padded_start) // step)
+
+    # Progress in sampled frames, as process_video reports it
+    total_sampled = -(-total_frames // step)
+    chunks = []
+    frames_done = 0
+    for future in as_completed(futures):
+        start, overlap = futures[future]
+        chunk_data, chunk_valid = future.result()
+        chunks.append((start, chunk_data, chunk_valid))
+        frames_done += max(0, len(chunk_valid) - overlap)
+        if progress is not None:
+            progress(frames_done, max(total_sampled, frames_done))
+
+    chunks.sort(key=lambda chunk: chunk[0])
+    data, valid = stitch_chunks(chunks)
+    return LandmarkSequence(data, valid, fps=fps / step, width=width, height=height)
+
+
+def shutdown():
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from typing import Optional
+import json
 import os
+import mediapipe_assets
+import service_worker
+from page_cache import page_cache
 
 demo_session_router = APIRouter()
 
@@ -18,7 +21,13 @@ async def demo_page(
 ):
     width = int(width)
     height = int(height)
+    # The page only varies with skeleton and the camera size, so each set is rendered once
+    return await page_cache.response(
+        request, ("demo", skeleton, width, height), lambda: render_demo_page(skeleton, width, height)
+    )
 
+def render_demo_page(skeleton: bool, width: int, height: int) -> str:
+    """Demo session page HTML for one skeleton/camera-size combination"""
     html_content = f"""
     <!DOCTYPE html>
     <html>
@@ -477,9 +486,15 @@ async def demo_page(
                 }}
             }}
         </style>
-        <script src="https://cdn.jsdelivr.net/npm/@mediapipe/camera_utils/camera_utils.js" crossorigin="anonymous"></script>
-        <script src="https://cdn.jsdelivr.net/npm/@mediapipe/drawing_utils/drawing_utils.js" crossorigin="anonymous"></script>
-        <script src="https://cdn.jsdelivr.net/npm/@mediapipe/pose/pose.js" crossorigin="anonymous"></script>
+        <!-- Service worker precaching of the pose runtime, and the cold/warm startup metric -->
+        {service_worker.startup_script("demo")}
+        <!-- MediaPipe runtime: self-hosted when vendored, pinned CDN otherwise -->
+        {mediapipe_assets.script_tags("camera_utils", "drawing_utils", "pose")}
+        <script>
+            // Pose fetches its wasm, packed assets and models through locateFile
+            const MEDIAPIPE_POSE_FILES = {json.dumps(mediapipe_assets.pose_files())};
+            const MEDIAPIPE_POSE_CDN = '{mediapipe_assets.pose_cdn_base()}';
+        </script>
     </head>
     <body>
         <div class="container">
@@ -727,7 +742,7 @@ async def demo_page(
                         }}
                         
                         this.pose = new Pose({{
-                            locateFile: (file) => `https://cdn.jsdelivr.net/npm/@mediapipe/pose/${{file}}`
+                            locateFile: (file) => MEDIAPIPE_POSE_FILES[file] || `${{MEDIAPIPE_POSE_CDN}}/${{file}}`
                         }});
 
                         this.pose.setOptions({{
@@ -1041,6 +1056,7 @@ async def demo_page(
                 }}
                 
                 onPoseResults(results) {{
+                    reportPoseStartup((message) => this.notify(message.type, message));
                     if (this.demoCompleted || this.currentPhase !== 'detect') return;
                     
                     this.isProcessing = true;
@@ -1568,4 +1584,4 @@ async def demo_page(
     </body>
     </html>
     """
-    return HTMLResponse(content=html_content)
\ No newline at end of file
+    return html_content
\ No newline at end of file
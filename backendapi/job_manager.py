@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Bounded worker pool for CPU-heavy video work (pose extraction, comparisons).
+# Keeps long-running jobs off the uvicorn event loop so /health and the
+# tracking pages stay responsive while analyses run.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(min(2, os.cpu_count() or 1))))
+MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", "32"))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "3600"))
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already queued or running"""
+
+
+class JobManager:
+    def __init__(self, max_workers: int = JOB_WORKERS, max_pending: int = MAX_PENDING_JOBS,
+                 result_ttl: float = JOB_RESULT_TTL):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, dict] = {}
+        self._futures: Dict[str, Future] = {}
+        # Dedup key per job submitted with submit_once, dropped with the job
+        self._keys: Dict[str, Hashable] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> str:
+        """
+        Queue fn(*args, progress=callback, **kwargs) on the worker pool and return a job id.
+        The callback takes (frames_done, frames_total) and updates the job's progress.
+        """
+        return self._submit(kind, None, fn, args, kwargs)
+
+    def submit_once(self, kind: str, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> str:
+        """
+        Like submit, but while a job of this kind submitted for the same key is still queued
+        or running, return its id instead of starting another one.
+        """
+        return self._submit(kind, key, fn, args, kwargs)
+
+    def _submit(self, kind: str, key: Optional[Hashable], fn: Callable[..., Any], args: tuple, kwargs: dict) -> str:
+        self.purge_expired()
+        with self._lock:
+            if key is not None:
+                for job_id, job_key in self._keys.items():
+                    job = self._jobs[job_id]
+                    if job_key == key and job["kind"] == kind and job["status"] in ("queued", "processing"):
+                        return job_id
+
+            active = sum(1 for job in self._jobs.values() if job["status"] in ("queued", "processing"))
+            if active >= self.max_pending:
+                raise JobQueueFull(f"{active} jobs already pending")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "kind": kind,
+                "status": "queued",
+                "progress": {"frames_done": 0, "frames_total": 0},
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+            }
+            if key is not None:
+                self._keys[job_id] = key
+
+        def progress(frames_done: int, frames_total: int):
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job["progress"] = {"frames_done": frames_done, "frames_total": frames_total}
+
+        future = self._executor.submit(self._run, job_id, fn, args, kwargs, progress)
+        with self._lock:
+            self._futures[job_id] = future
+        print(f"📥 Job {job_id} ({kind}) queued")
+        return job_id
+
+    def _run(self, job_id: str, fn: Callable[..., Any], args: tuple, kwargs: dict,
+             progress: Callable[[int, int], None]) -> Any:
+        with self._lock:
+            self._jobs[job_id]["status"] = "processing"
+            self._jobs[job_id]["started_at"] = time.time()
+        try:
+            result = fn(*args, progress=progress, **kwargs)
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {e}")
+            traceback.print_exc()
+            with self._lock:
+                job = self._jobs[job_id]
+                job["status"] = "failed"
+                job["error"] = str(e)
+                job["finished_at"] = time.time()
+            raise
+
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "completed"
+            job["result"] = result
+            job["finished_at"] = time.time()
+        print(f"✅ Job {job_id} completed in {job['finished_at'] - job['started_at']:.1f}s")
+        return result
+
+    def future(self, job_id: str) -> Optional[Future]:
+        """Return the concurrent future backing a job, for callers that want to await it"""
+        with self._lock:
+            return self._futures.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return a snapshot of the job state, or None if unknown or expired"""
+        self.purge_expired()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job)
+            snapshot["progress"] = dict(job["progress"])
+
+        done = snapshot["progress"]["frames_done"]
+        total = snapshot["progress"]["frames_total"]
+        if snapshot["status"] == "completed":
+            percent = 100.0
+        elif total > 0:
+            percent = round(min(done / total, 1.0) * 100, 1)
+        else:
+            percent = 0.0
+        snapshot["progress"]["percent"] = percent
+        return snapshot
+
+    def purge_expired(self):
+        """Drop finished jobs whose results are older than the TTL"""
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["finished_at"] is not None and job["finished_at"] < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+                self._futures.pop(job_id, None)
+                self._keys.pop(job_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"workers": self.max_workers, "jobs": counts}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Shared job manager used by the comparison and movement analysis routers
+job_manager = JobManager()
@@ -0,0 +1,123 @@
+import math
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+import numpy as np
+from landmarks import VISIBILITY, VISIBILITY_THRESHOLD, X, Y
+
+# Standard joint angles as (end, vertex, end) landmark triplets; the angle is measured at the vertex
+JOINT_ANGLES = {
+    "left_elbow": (11, 13, 15),
+    "right_elbow": (12, 14, 16),
+    "left_shoulder": (13, 11, 23),
+    "right_shoulder": (14, 12, 24),
+    "left_hip": (11, 23, 25),
+    "right_hip": (12, 24, 26),
+    "left_knee": (23, 25, 27),
+    "right_knee": (24, 26, 28),
+    "left_ankle": (25, 27, 31),
+    "right_ankle": (26, 28, 32),
+    # Shoulder-hip-ankle: 180 when the body is one straight line (planks, push-ups)
+    "left_body_line": (11, 23, 27),
+    "right_body_line": (12, 24, 28),
+}
+ANGLE_NAMES = list(JOINT_ANGLES) + ["trunk"]
+
+_SHOULDERS = [11, 12]
+_HIPS = [23, 24]
+_TRUNK_JOINTS = _SHOULDERS + _HIPS
+
+
+@lru_cache(maxsize=64)
+def _plan(names: Optional[Tuple[str, ...]]) -> Tuple[np.ndarray, bool, np.ndarray]:
+    """Triplets to measure for a set of angle names, whether trunk is needed, and the output column order"""
+    names = tuple(ANGLE_NAMES) if names is None else names
+    unknown = [name for name in names if name not in ANGLE_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown joint angles {unknown}, expected names from {ANGLE_NAMES}")
+    triplet_names = [name for name in names if name != "trunk"]
+    triplets = np.array([JOINT_ANGLES[name] for name in triplet_names], dtype=np.intp).reshape(-1, 3)
+    computed = triplet_names + (["trunk"] if "trunk" in names else [])
+    order = np.array([computed.index(name) for name in names], dtype=np.intp)
+    return triplets, "trunk" in names, order
+
+
+def joint_angles(data: np.ndarray, visible: Optional[np.ndarray] = None,
+                 names: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    Joint angles in degrees for one (33, 4) frame or a whole (frames, 33, 4) array in one
+    vectorized pass: (angles,) or (frames, angles) in ANGLE_NAMES order, or in the order
+    of names (only those are computed). Each angle is atan2(|u x v|, u . v) of the
+    vertex-to-end vectors, which is already folded into [0, 180]. "trunk" is the lean of
+    the hip-to-shoulder midline from vertical. NaN where a joint involved is not visible;
+    visible defaults to visibility > VISIBILITY_THRESHOLD and may also carry a frame's valid flag.
+    """
+    triplets, with_trunk, order = _plan(None if names is None else tuple(names))
+    single = data.ndim == 2
+    if single:
+        return _frame_angles(data, visible, triplets, with_trunk)[order]
+    if visible is None:
+        visible = data[:, :, VISIBILITY] > VISIBILITY_THRESHOLD
+
+    # (frames, angles, 3 joints, x/y) in one gather
+    points = data[:, triplets, X:Y + 1].astype(np.float64)
+    u = points[:, :, 0] - points[:, :, 1]
+    v = points[:, :, 2] - points[:, :, 1]
+    cross = np.abs(u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0])
+    dot = u[..., 0] * v[..., 0] + u[..., 1] * v[..., 1]
+    angles = np.degrees(np.arctan2(cross, dot))
+    angles[~visible[:, triplets].all(axis=-1)] = np.nan
+
+    if with_trunk:
+        torso = data[:, _TRUNK_JOINTS, X:Y + 1].astype(np.float64)
+        midline = (torso[:, 0] + torso[:, 1] - torso[:, 2] - torso[:, 3]) / 2
+        # Image y grows downwards, so upright is (0, -1)
+        trunk = np.degrees(np.arctan2(np.abs(midline[:, 0]), -midline[:, 1]))
+        trunk[~visible[:, _TRUNK_JOINTS].all(axis=1)] = np.nan
+        angles = np.concatenate([angles, trunk[:, None]], axis=1)
+    if len(order) > 1 and (order[1:] < order[:-1]).any():
+        angles = angles[:, order]
+    return angles
+
+
+def _frame_angles(frame: np.ndarray, visible: Optional[np.ndarray], triplets: np.ndarray,
+                  with_trunk: bool) -> np.ndarray:
+    """
+    Same angles for a single frame with scalar math: on one live frame a dozen NumPy calls
+    cost more than the arithmetic itself, so this path avoids array overhead entirely.
+    """
+    rows = frame.tolist()
+    seen = visible.tolist() if visible is not None else [row[VISIBILITY] > VISIBILITY_THRESHOLD for row in rows]
+    angles = []
+    for a, b, c in triplets.tolist():
+        if not (seen[a] and seen[b] and seen[c]):
+            angles.append(math.nan)
+            continue
+        bx, by = rows[b][X], rows[b][Y]
+        ux, uy = rows[a][X] - bx, rows[a][Y] - by
+        vx, vy = rows[c][X] - bx, rows[c][Y] - by
+        angles.append(math.degrees(math.atan2(abs(ux * vy - uy * vx), ux * vx + uy * vy)))
+    if with_trunk:
+        if all(seen[joint] for joint in _TRUNK_JOINTS):
+            ls, rs, lh, rh = (rows[joint] for joint in _TRUNK_JOINTS)
+            mx = (ls[X] + rs[X] - lh[X] - rh[X]) / 2
+            my = (ls[Y] + rs[Y] - lh[Y] - rh[Y]) / 2
+            angles.append(math.degrees(math.atan2(abs(mx), -my)))
+        else:
+            angles.append(math.nan)
+    return np.array(angles)
+
+
+class AngleSeries:
+    """
+    Joint-angle time series of a landmark sequence, computed once and shared by the
+    rep counters and comparison metrics: series["left_knee"] is one angle per frame.
+    """
+    def __init__(self, angles: np.ndarray, names: Sequence[str] = ANGLE_NAMES):
+        self.angles = angles
+        self.names = list(names)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.angles[:, self.names.index(name)]
+
+    def __len__(self) -> int:
+        return len(self.angles)
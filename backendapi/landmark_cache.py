@@ -0,0 +1,139 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from landmarks import LandmarkSequence
+from landmark_file import LandmarkFile, write_landmark_file
+
+# Extracted landmarks keyed by (content hash, model complexity, pipeline version, sampling tag).
+# A reference take is inferred once; every later comparison against it is a cache hit.
+LANDMARK_CACHE_DIR = os.getenv("LANDMARK_CACHE_DIR", os.path.join("uploads", "landmarks"))
+LANDMARK_CACHE_MB = float(os.getenv("LANDMARK_CACHE_MB", "256"))
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+CacheKey = Tuple[str, int, int, str]
+
+
+def new_hasher():
+    return hashlib.sha256()
+
+
+def hash_sidecar_path(file_path: str) -> str:
+    return f"{file_path}.sha256"
+
+
+def hash_file(file_path: str) -> str:
+    hasher = new_hasher()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def write_upload_hash(file_path: str, digest: str):
+    """Record the content hash computed while an upload was stored"""
+    with open(hash_sidecar_path(file_path), "w") as f:
+        f.write(digest)
+
+
+def upload_hash(file_path: str) -> str:
+    """
+    Content hash of an upload, read from its sidecar.
+    Files stored before hashing existed are hashed once here and the sidecar written.
+    """
+    sidecar = hash_sidecar_path(file_path)
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            return f.read().strip()
+
+    digest = hash_file(file_path)
+    write_upload_hash(file_path, digest)
+    return digest
+
+
+class LandmarkCache:
+    """
+    Two-level landmark cache: an on-disk store plus an in-memory LRU
+    evicted by total payload size rather than entry count.
+    """
+    def __init__(self, directory: str = LANDMARK_CACHE_DIR, max_bytes: int = int(LANDMARK_CACHE_MB * 1024 * 1024)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, LandmarkSequence]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: CacheKey) -> str:
+        digest, model_complexity, pipeline_version, sampling = key
+        return os.path.join(self.directory, f"{digest}_m{model_complexity}_v{pipeline_version}{sampling}.lmk")
+
+    def open(self, key: CacheKey) -> Optional[LandmarkFile]:
+        """
+        The stored landmark file for a key without loading it, for range queries
+        over long sessions (LandmarkFile.read(start, stop)).
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return LandmarkFile(path)
+        except ValueError as e:
+            print(f"⚠️  Ignoring unreadable landmark file: {e}")
+            return None
+
+    def get(self, key: CacheKey) -> Optional[LandmarkSequence]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        stored = self.open(key)
+        if stored is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Memory-mapped: pages are read as metrics touch them
+        landmarks = stored.read()
+        with self._lock:
+            self.hits += 1
+            self._remember(key, landmarks)
+        return landmarks
+
+    def put(self, key: CacheKey, landmarks: LandmarkSequence):
+        os.makedirs(self.directory, exist_ok=True)
+        _, model_complexity, pipeline_version, _ = key
+        write_landmark_file(self._path(key), landmarks, model_complexity, pipeline_version)
+        with self._lock:
+            self._remember(key, landmarks)
+
+    def _remember(self, key: CacheKey, landmarks: LandmarkSequence):
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key).nbytes
+        if landmarks.nbytes > self.max_bytes:
+            return
+        self._entries[key] = landmarks
+        self._bytes += landmarks.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Shared cache used by video comparison and movement analysis
+landmark_cache = LandmarkCache()
@@ -0,0 +1,115 @@
+import os
+import struct
+import threading
+from typing import Optional
+import numpy as np
+from landmarks import LandmarkSequence, NUM_LANDMARKS
+
+# Binary landmark file (.lmk), little-endian:
+#   64-byte header | valid mask, one byte per frame | padding to 64 bytes | body
+# The body is a dense (frames, 33, 4) array, float32 or int16 quantized per channel,
+# so np.memmap can map it and slicing a frame range only reads those pages.
+MAGIC = b"LMK1"
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+ALIGNMENT = 64
+CHANNELS = 4
+
+DTYPE_FLOAT32 = 0
+DTYPE_INT16 = 1
+_DTYPES = {DTYPE_FLOAT32: np.dtype("<f4"), DTYPE_INT16: np.dtype("<i2")}
+
+# magic, version, dtype, frames, joints, channels, fps, width, height,
+# model complexity, pipeline version, per-channel int16 scales
+_HEADER = struct.Struct("<4sHBIHHdIIBH4f")
+
+# Default body encoding for new files: "float32" (exact) or "int16" (half the size)
+LANDMARK_FILE_DTYPE = os.getenv("LANDMARK_FILE_DTYPE", "float32")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_landmark_file(path: str, landmarks: LandmarkSequence, model_complexity: int = 0,
+                        pipeline_version: int = 0, dtype: Optional[str] = None):
+    """Write landmarks atomically; int16 stores each channel scaled to its largest magnitude"""
+    dtype = dtype or LANDMARK_FILE_DTYPE
+    data = np.ascontiguousarray(landmarks.data, dtype=np.float32)
+    frames = len(landmarks)
+
+    if dtype == "int16":
+        dtype_code = DTYPE_INT16
+        peak = np.abs(data).reshape(-1, CHANNELS).max(axis=0) if frames else np.zeros(CHANNELS)
+        scales = np.where(peak > 0, peak / 32767.0, 1.0).astype(np.float32)
+        body = np.rint(data / scales).astype("<i2")
+    elif dtype == "float32":
+        dtype_code = DTYPE_FLOAT32
+        scales = np.ones(CHANNELS, dtype=np.float32)
+        body = data.astype("<f4", copy=False)
+    else:
+        raise ValueError(f"Unsupported landmark file dtype: {dtype}")
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, dtype_code, frames, NUM_LANDMARKS, CHANNELS,
+        float(landmarks.fps or 0.0), int(landmarks.width), int(landmarks.height),
+        model_complexity, pipeline_version, *scales.tolist(),
+    )
+    body_offset = _align(HEADER_SIZE + frames)
+
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        f.write(np.ascontiguousarray(landmarks.valid, dtype=np.bool_).tobytes())
+        f.write(b"\0" * (body_offset - HEADER_SIZE - frames))
+        f.write(body.tobytes())
+    os.replace(tmp_path, path)
+
+
+class LandmarkFile:
+    """
+    A .lmk file opened for reading. Only the header is read up front; valid and the
+    raw body are memory-mapped, so read(start, stop) touches just those frames.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < _HEADER.size or header[:4] != MAGIC:
+            raise ValueError(f"Not a landmark file: {path}")
+
+        (_, self.version, dtype_code, self.frames, joints, channels, self.fps, self.width, self.height,
+         self.model_complexity, self.pipeline_version, *scales) = _HEADER.unpack_from(header)
+        if self.version != FORMAT_VERSION or dtype_code not in _DTYPES:
+            raise ValueError(f"Unsupported landmark file version {self.version} / dtype {dtype_code}: {path}")
+        if joints != NUM_LANDMARKS or channels != CHANNELS:
+            raise ValueError(f"Unexpected landmark shape ({joints}, {channels}): {path}")
+
+        self.dtype = _DTYPES[dtype_code]
+        self.scales = np.asarray(scales, dtype=np.float32)
+        body_offset = _align(HEADER_SIZE + self.frames)
+        if self.frames:
+            self.valid = np.memmap(path, dtype=np.bool_, mode="r", offset=HEADER_SIZE, shape=(self.frames,))
+            self.body = np.memmap(path, dtype=self.dtype, mode="r", offset=body_offset,
+                                  shape=(self.frames, NUM_LANDMARKS, CHANNELS))
+        else:
+            self.valid = np.zeros(0, dtype=np.bool_)
+            self.body = np.zeros((0, NUM_LANDMARKS, CHANNELS), dtype=self.dtype)
+
+    def __len__(self) -> int:
+        return self.frames
+
+    @property
+    def quantized(self) -> bool:
+        return self.dtype == _DTYPES[DTYPE_INT16]
+
+    def read(self, start: int = 0, stop: Optional[int] = None) -> LandmarkSequence:
+        """
+        Frames [start, stop) as a LandmarkSequence. float32 bodies come back as
+        read-only memmap views; int16 bodies are dequantized into a new array.
+        """
+        frames = slice(start, stop)
+        data = self.body[frames]
+        if self.quantized:
+            data = data.astype(np.float32) * self.scales
+        return LandmarkSequence(data, self.valid[frames], fps=self.fps, width=self.width, height=self.height)
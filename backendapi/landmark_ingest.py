@@ -0,0 +1,101 @@
+import json
+from typing import Optional
+import numpy as np
+from fastapi import WebSocket
+from landmarks import NUM_LANDMARKS
+from pose_state import PoseState
+
+# One frame of client-side landmarks: 33 x (x, y, z, visibility) little-endian float32 in
+# normalized image coordinates, 528 bytes. A binary message carries one or more whole
+# frames back to back; an empty message is a frame where no pose was detected.
+PACKET_DTYPE = np.dtype("<f4")
+PACKET_BYTES = NUM_LANDMARKS * 4 * PACKET_DTYPE.itemsize
+
+
+def parse_packet(data: bytes) -> Optional[np.ndarray]:
+    """(frames, 33, 4) float32 array from a binary landmark message, None if malformed"""
+    if len(data) % PACKET_BYTES:
+        return None
+    return np.frombuffer(data, dtype=PACKET_DTYPE).reshape(-1, NUM_LANDMARKS, 4)
+
+
+class LandmarkIngestSession:
+    """
+    Server-side rep counting for one WebSocket connection fed with client-side landmarks.
+    Every frame advances the connection's PoseState, the same state machine PoseTracker runs
+    on server-side landmarks, so no MediaPipe is needed here. Only changes are pushed back
+    (a new rep count, the athlete becoming ready or needing to move), so the socket
+    is quiet while nothing happens.
+    """
+    def __init__(self, websocket: WebSocket, exercise: str = "squats"):
+        self.websocket = websocket
+        self.tracker = PoseState(exercise)
+        self.frames = 0
+        self.events = 0
+        self._last_event: Optional[dict] = None
+
+    async def run(self):
+        await self.websocket.send_text(json.dumps({
+            "type": "ready",
+            "packet_bytes": PACKET_BYTES,
+            "exercise": self.tracker.counter.exercise,
+        }))
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            data = message.get("bytes")
+            if data is not None:
+                await self._ingest(data)
+            elif message.get("text"):
+                await self._handle_control(message["text"])
+
+    async def _ingest(self, data: bytes):
+        frames = parse_packet(data)
+        if frames is None:
+            await self.websocket.send_text(json.dumps({
+                "type": "error",
+                "detail": f"Landmark packets must be a multiple of {PACKET_BYTES} bytes",
+            }))
+            return
+        if not len(frames):
+            await self._advance(None)
+        for landmarks in frames:
+            # Non-finite values mean the client had no usable pose for this frame
+            await self._advance(landmarks if np.isfinite(landmarks).all() else None)
+
+    async def _advance(self, landmarks: Optional[np.ndarray]):
+        self.frames += 1
+        event = self.tracker.process_landmarks(landmarks)
+        if event != self._last_event:
+            self._last_event = event
+            self.events += 1
+            await self.websocket.send_text(json.dumps(event))
+
+    async def _handle_control(self, text: str):
+        try:
+            command = json.loads(text)
+        except ValueError:
+            return
+        if not isinstance(command, dict):
+            return
+        if command.get("type") == "reset":
+            # New set, optionally of another exercise: count from zero again
+            if command.get("exercise"):
+                try:
+                    self.tracker = PoseState(command["exercise"])
+                except ValueError as e:
+                    await self.websocket.send_text(json.dumps({"type": "error", "detail": str(e)}))
+                    return
+            self.tracker.reset()
+            self._last_event = None
+        elif command.get("type") == "stats":
+            await self.websocket.send_text(json.dumps({"type": "stats", **self.stats()}))
+
+    def stats(self) -> dict:
+        return {
+            "exercise": self.tracker.counter.exercise,
+            "frames": self.frames,
+            "events": self.events,
+            "rep_count": self.tracker.rep_count,
+        }
@@ -0,0 +1,112 @@
+import numpy as np
+from typing import List
+
+# MediaPipe Pose emits 33 landmarks, each stored as (x, y, z, visibility)
+NUM_LANDMARKS = 33
+X, Y, Z, VISIBILITY = range(4)
+VISIBILITY_THRESHOLD = 0.5
+
+
+class LandmarkSequence:
+    """
+    Landmarks for a whole video as one (frames, 33, 4) float32 array.
+    x and z are in pixels of frame width and y in pixels of frame height, matching
+    the dicts process_video used to emit. valid[i] is False where no pose was detected;
+    the rows of those frames are zero and must be ignored.
+    """
+    __slots__ = ("data", "valid", "fps", "width", "height")
+
+    def __init__(self, data: np.ndarray, valid: np.ndarray, fps: float = 0.0, width: int = 0, height: int = 0):
+        self.data = data
+        self.valid = valid
+        self.fps = fps
+        self.width = width
+        self.height = height
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    @property
+    def frames_with_pose(self) -> int:
+        return int(self.valid.sum())
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + self.valid.nbytes
+
+    def visible(self, joints=slice(None)) -> np.ndarray:
+        """Boolean (frames, joints) mask of landmarks that are detected and visible"""
+        return (self.data[:, joints, VISIBILITY] > VISIBILITY_THRESHOLD) & self.valid[:, None]
+
+    def to_dicts(self) -> List[List[dict]]:
+        """Legacy list-of-dicts form, empty lists for frames without a pose"""
+        return [
+            [
+                {'x': float(x), 'y': float(y), 'z': float(z), 'visibility': float(v)}
+                for x, y, z, v in frame
+            ] if ok else []
+            for frame, ok in zip(self.data.tolist(), self.valid.tolist())
+        ]
+
+    @classmethod
+    def from_dicts(cls, frames: List[List[dict]], fps: float = 0.0, width: int = 0, height: int = 0) -> "LandmarkSequence":
+        builder = LandmarkSequenceBuilder(width, height, fps, capacity=len(frames))
+        for frame in frames:
+            if frame:
+                builder.append_array([(lm['x'], lm['y'], lm['z'], lm['visibility']) for lm in frame])
+            else:
+                builder.append_missing()
+        return builder.finish()
+
+
+class LandmarkSequenceBuilder:
+    """
+    Accumulates per-frame MediaPipe results straight into a preallocated float32 buffer,
+    scaling normalized coordinates to pixels on the way in.
+    """
+    def __init__(self, width: int, height: int, fps: float = 0.0, capacity: int = 0):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self._scale = np.array([width, height, width, 1.0], dtype=np.float32)
+        self._data = np.zeros((max(capacity, 1), NUM_LANDMARKS, 4), dtype=np.float32)
+        self._valid = np.zeros(max(capacity, 1), dtype=bool)
+        self._count = 0
+
+    def _next_row(self) -> int:
+        if self._count == len(self._valid):
+            # Frame counts reported by containers are estimates; grow geometrically if short
+            grow = max(len(self._valid), 64)
+            self._data = np.concatenate([self._data, np.zeros((grow, NUM_LANDMARKS, 4), dtype=np.float32)])
+            self._valid = np.concatenate([self._valid, np.zeros(grow, dtype=bool)])
+        row = self._count
+        self._count += 1
+        return row
+
+    def append(self, pose_landmarks):
+        """Add one frame from results.pose_landmarks (None when no pose was found)"""
+        if pose_landmarks is None:
+            self.append_missing()
+            return
+        row = self._next_row()
+        self._data[row] = [(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark]
+        self._data[row] *= self._scale
+        self._valid[row] = True
+
+    def append_array(self, frame):
+        """Add one frame already in pixel units"""
+        row = self._next_row()
+        self._data[row] = frame
+        self._valid[row] = True
+
+    def append_missing(self):
+        self._next_row()
+
+    def finish(self) -> LandmarkSequence:
+        return LandmarkSequence(
+            self._data[:self._count].copy(),
+            self._valid[:self._count].copy(),
+            fps=self.fps,
+            width=self.width,
+            height=self.height,
+        )
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+import struct
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+from fastapi import WebSocket
+from landmarks import NUM_LANDMARKS
+from pose_processor import live_pose_pool, LIVE_POSE_TIMEOUT
+from video_pipeline import inference_size, prepare_for_inference
+
+# Longest side frames are shrunk to before inference; MediaPipe works at 256 px internally
+LIVE_MAX_SIDE = int(os.getenv("LIVE_MAX_SIDE", "256"))
+# Larger frames are answered with an error rather than decoded
+LIVE_MAX_FRAME_BYTES = int(os.getenv("LIVE_MAX_FRAME_KB", "512")) * 1024
+# Seconds between stats messages on a connection
+LIVE_STATS_INTERVAL = float(os.getenv("LIVE_STATS_INTERVAL", "2"))
+
+# Binary reply per processed frame, little-endian:
+#   seq uint32 | flags uint8 (1 = pose detected) | 3 pad bytes | decode ms float32 | infer ms float32
+# followed, when a pose was detected, by 33 x (x, y, z, visibility) float32 in normalized
+# image coordinates. The 16-byte header keeps the landmarks 4-byte aligned for a Float32Array view.
+REPLY_HEADER = struct.Struct("<IBxxxff")
+FLAG_DETECTED = 1
+
+# Decoding and inference for all live connections; one connection has at most one frame here
+live_executor = ThreadPoolExecutor(max_workers=live_pose_pool.size, thread_name_prefix="live")
+
+
+def decode_frame(data: bytes) -> Optional[np.ndarray]:
+    """BGR image from JPEG/WebP/PNG bytes, None if they do not decode"""
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def encode_reply(seq: int, landmarks: Optional[np.ndarray], decode_ms: float, infer_ms: float) -> bytes:
+    header = REPLY_HEADER.pack(seq, FLAG_DETECTED if landmarks is not None else 0, decode_ms, infer_ms)
+    return header if landmarks is None else header + landmarks.astype("<f4", copy=False).tobytes()
+
+
+async def acquire_pose():
+    """Check out a live Pose graph for a connection's lifetime; raises TimeoutError when none is free"""
+    return await asyncio.get_running_loop().run_in_executor(live_executor, live_pose_pool.acquire, LIVE_POSE_TIMEOUT)
+
+
+def release_pose(pose):
+    live_pose_pool.release(pose)
+
+
+class LiveInferenceSession:
+    """
+    Server-side inference for one WebSocket connection.
+    The client streams encoded frames as binary messages and gets one binary landmark
+    reply per frame it processed. Only the newest unprocessed frame is kept: a frame that
+    arrives while another is still being decoded or inferred replaces the waiting one,
+    so under backpressure stale frames are dropped and latency stays bounded at about
+    one frame of work instead of growing with a queue.
+    """
+    def __init__(self, websocket: WebSocket, pose):
+        self.websocket = websocket
+        self.pose = pose
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.decode_ms = 0.0
+        self.infer_ms = 0.0
+        self.latency_ms = 0.0
+        self._pending: Optional[Tuple[int, bytes, float]] = None
+        self._ready = asyncio.Event()
+        self._closed = False
+        self._reset_requested = False
+
+    def infer(self, data: bytes) -> Tuple[Optional[np.ndarray], float, float]:
+        """Decode and run one frame on the session's graph; runs on live_executor"""
+        started = time.perf_counter()
+        if len(data) > LIVE_MAX_FRAME_BYTES:
+            raise ValueError(f"Frame larger than {LIVE_MAX_FRAME_BYTES} bytes")
+        frame = decode_frame(data)
+        if frame is None:
+            raise ValueError("Could not decode frame")
+        height, width = frame.shape[:2]
+        rgb = prepare_for_inference(frame, inference_size(width, height, LIVE_MAX_SIDE))
+        decoded = time.perf_counter()
+
+        if self._reset_requested:
+            # Only ever touched between frames, on the thread that runs the graph
+            self._reset_requested = False
+            self.pose.reset()
+        results = self.pose.process(rgb)
+        landmarks = None
+        if results.pose_landmarks:
+            landmarks = np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in results.pose_landmarks.landmark],
+                                 dtype=np.float32).reshape(NUM_LANDMARKS, 4)
+        return landmarks, (decoded - started) * 1000, (time.perf_counter() - decoded) * 1000
+
+    async def run(self):
+        await self.websocket.send_text(json.dumps({
+            "type": "ready",
+            "header_bytes": REPLY_HEADER.size,
+            "landmarks": NUM_LANDMARKS,
+            "max_frame_bytes": LIVE_MAX_FRAME_BYTES,
+        }))
+        worker = asyncio.create_task(self._process())
+        try:
+            await self._receive()
+        finally:
+            # Let an in-flight inference finish before the caller returns the graph to the pool
+            self._closed = True
+            self._ready.set()
+            await worker
+
+    async def _receive(self):
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            data = message.get("bytes")
+            if data is not None:
+                self._accept_frame(data)
+            elif message.get("text"):
+                self._handle_control(message["text"])
+
+    def _accept_frame(self, data: bytes):
+        seq = self.received
+        self.received += 1
+        if self._pending is not None:
+            self.dropped += 1
+        self._pending = (seq, data, time.perf_counter())
+        self._ready.set()
+
+    def _handle_control(self, text: str):
+        try:
+            command = json.loads(text)
+        except ValueError:
+            return
+        if isinstance(command, dict) and command.get("type") == "reset":
+            # New exercise or camera switch: drop tracking state from the previous one
+            self._reset_requested = True
+
+    async def _process(self):
+        try:
+            await self._process_frames()
+        except Exception as e:
+            # Graph, decoder or socket failure: tell the client and hang up instead of going silent
+            print(f"❌ Live inference session failed: {e}")
+            traceback.print_exc()
+            self._closed = True
+            try:
+                await self.websocket.send_text(json.dumps({"type": "error", "detail": f"Inference failed: {e}"}))
+                await self.websocket.close(code=1011, reason="Inference failed")
+            except Exception:
+                # The socket is already gone
+                pass
+
+    async def _process_frames(self):
+        loop = asyncio.get_running_loop()
+        last_stats = time.perf_counter()
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self._closed:
+                return
+            if self._pending is None:
+                continue
+            seq, data, arrived = self._pending
+            self._pending = None
+
+            try:
+                landmarks, decode_ms, infer_ms = await loop.run_in_executor(live_executor, self.infer, data)
+            except ValueError as e:
+                self.rejected += 1
+                await self.websocket.send_text(json.dumps({"type": "error", "seq": seq, "detail": str(e)}))
+                continue
+
+            await self.websocket.send_bytes(encode_reply(seq, landmarks, decode_ms, infer_ms))
+            self.processed += 1
+            self.decode_ms += decode_ms
+            self.infer_ms += infer_ms
+            self.latency_ms += (time.perf_counter() - arrived) * 1000
+
+            if time.perf_counter() - last_stats >= LIVE_STATS_INTERVAL:
+                last_stats = time.perf_counter()
+                await self.websocket.send_text(json.dumps({"type": "stats", **self.stats()}))
+
+    def stats(self) -> dict:
+        processed = max(self.processed, 1)
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "decode_ms": round(self.decode_ms / processed, 2),
+            "infer_ms": round(self.infer_ms / processed, 2),
+            "latency_ms": round(self.latency_ms / processed, 2),
+        }
@@ -1,10 +1,17 @@
 import os
 import socket
+import asyncio
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from demo_session_tracker import demo_session_router
+from job_manager import job_manager
+from upload_storage import UploadSizeLimitMiddleware, MAX_UPLOAD_MB
+from media_serving import media_router
+from page_cache import page_cache
+import mediapipe_assets
+from service_worker import service_worker_router, startup_metrics
 # Try to load environment variables (optional)
 try:
     from dotenv import load_dotenv
@@ -17,6 +24,9 @@ except ImportError:
 # Initialize FastAPI app
 app = FastAPI(title="Pose Tracker and Comparison API")
 
+# Reject oversized uploads before their bodies are parsed. Added first so it sits inside
+# CORS (the last middleware added is the outermost) and its 413s carry CORS headers
+app.add_middleware(UploadSizeLimitMiddleware, paths=["/uploads", "/movement-analysis/upload"])
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +38,10 @@ app.add_middleware(
 )
 current_dir = os.path.dirname(os.path.abspath(__file__))
 static_dir = os.path.join(current_dir, "static")
+# Vendored MediaPipe runtime under /static/mediapipe, with immutable caching and precompressed bodies
+app.include_router(mediapipe_assets.mediapipe_assets_router)
+# Service worker precaching that runtime, and the startup-time beacons of the pages
+app.include_router(service_worker_router)
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
 app.include_router(demo_session_router, prefix="/api")
 # Create uploads directory
@@ -50,6 +64,8 @@ print(f"🌐 Server URL: {SERVER_URL}")
 # Import routers AFTER FastAPI is initialized
 pose_tracking_router = None
 video_comparison_router = None
+movement_analysis_router = None
+resumable_upload_router = None
 
 # Try to import pose tracking router
 try:
@@ -64,13 +80,36 @@ except Exception as e:
 
 # Try to import video comparison router
 try:
-    from video_comparison import video_comparison_router
+    from video_comparison import video_comparison_router, extraction_executor
+    import chunked_extraction
+    from pose_processor import pose_pool, live_pose_pool
+    from landmark_cache import landmark_cache
     app.include_router(video_comparison_router)
     print("✅ Video comparison router loaded successfully")
 except ImportError:
     print("⚠️  Video comparison not available (optional)")
 except Exception as e:
     print(f"❌ Error loading video comparison: {e}")
+
+# Try to import resumable upload router (chunked uploads that survive dropped connections)
+try:
+    from resumable_upload import resumable_upload_router
+    app.include_router(resumable_upload_router)
+    print("✅ Resumable upload router loaded successfully")
+except ImportError:
+    print("⚠️  Resumable uploads not available (optional)")
+except Exception as e:
+    print(f"❌ Error loading resumable uploads: {e}")
+
+# Try to import movement analysis router (shares the video comparison pipeline)
+try:
+    from movement_analysis import movement_analysis_router
+    app.include_router(movement_analysis_router)
+    print("✅ Movement analysis router loaded successfully")
+except ImportError:
+    print("⚠️  Movement analysis not available (optional)")
+except Exception as e:
+    print(f"❌ Error loading movement analysis: {e}")
 #demo router import
 try:
     from demo_session_tracker import demo_session_router
@@ -90,6 +129,8 @@ async def root():
         "features": {
             "pose_tracking": pose_tracking_router is not None,
             "video_comparison": video_comparison_router is not None,
+            "movement_analysis": movement_analysis_router is not None,
+            "resumable_uploads": resumable_upload_router is not None,
             "demo_session": demo_session_router is not None  # Add this line
         }
     }
@@ -101,11 +142,35 @@ async def health_check():
         "pose_tracking": pose_tracking_router is not None,
         "video_comparison": video_comparison_router is not None,
         "demo_session": demo_session_router is not None,  # Add this line
+        "movement_analysis": movement_analysis_router is not None,
+        "resumable_uploads": resumable_upload_router is not None,
+        "jobs": job_manager.stats(),
+        "pose_pool": pose_pool.stats() if video_comparison_router is not None else None,
+        "live_pose_pool": live_pose_pool.stats() if video_comparison_router is not None else None,
+        "landmark_cache": landmark_cache.stats() if video_comparison_router is not None else None,
+        "page_cache": page_cache.stats(),
+        "mediapipe_assets": mediapipe_assets.stats(),
+        "startup_metrics": startup_metrics.stats(),
+        "max_upload_mb": MAX_UPLOAD_MB,
         "server_url": SERVER_URL
     }
 
-# Mount static files for uploads
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+@app.on_event("startup")
+async def warm_pose_pool():
+    # Load every Pose graph before the first request so N comparisons can start on N cores
+    if video_comparison_router is not None and os.getenv("POSE_POOL_WARM", "1") == "1":
+        await asyncio.to_thread(pose_pool.warm)
+        await asyncio.to_thread(live_pose_pool.warm)
+
+@app.on_event("shutdown")
+async def shutdown_jobs():
+    job_manager.shutdown()
+    if video_comparison_router is not None:
+        extraction_executor.shutdown(wait=False, cancel_futures=True)
+        chunked_extraction.shutdown()
+
+# Uploaded and processed videos, with range and conditional-request support
+app.include_router(media_router)
 
 # Run the server
 if __name__ == "__main__":
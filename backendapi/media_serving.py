@@ -0,0 +1,165 @@
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+import anyio
+from fastapi import APIRouter, HTTPException, Request
+from starlette.responses import Response
+from landmark_cache import hash_sidecar_path
+from upload_storage import UPLOADS_DIR, VIDEO_EXTENSIONS
+
+# Uploads and rendered videos are never rewritten under the same name, so clients and
+# proxies may keep them for a year without revalidating
+MEDIA_CACHE_CONTROL = os.getenv("MEDIA_CACHE_CONTROL", "public, max-age=31536000, immutable")
+MEDIA_CHUNK_SIZE = 256 * 1024
+MEDIA_TYPES = {"mp4": "video/mp4", "mov": "video/quicktime", "avi": "video/x-msvideo"}
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+# Router for serving uploaded and processed videos
+media_router = APIRouter()
+
+
+def media_etag(path: str, st: os.stat_result) -> str:
+    """
+    Strong validator for a media file: its content hash when one is recorded
+    (uploads, content-addressed renders), otherwise size and mtime.
+    """
+    sidecar = hash_sidecar_path(path)
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            return f'"{f.read().strip()}"'
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single-range Range header, or None to send the whole file.
+    Raises ValueError when the range cannot be satisfied.
+    """
+    match = _RANGE.match(header.replace(" ", ""))
+    if match is None:
+        # Multiple or malformed ranges: serving the full body is always allowed
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class MediaFileResponse(Response):
+    """
+    File response for video playback: byte ranges (206/416), strong ETag and
+    Last-Modified validators with 304s, and long-lived Cache-Control.
+    The body goes through the ASGI zero-copy send extension (sendfile) when the
+    server offers it, and is otherwise read in large chunks on a worker thread.
+    """
+    def __init__(self, path: str, request: Request, media_type: str = "video/mp4",
+                 cache_control: str = MEDIA_CACHE_CONTROL):
+        super().__init__(status_code=200, media_type=media_type)
+        self.path = path
+        self.request = request
+        self.cache_control = cache_control
+        self.send_header_only = request.method == "HEAD"
+        self.range = None
+
+    def _not_modified(self, etag: str, last_modified: float) -> bool:
+        if_none_match = self.request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+        if_modified_since = self.request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _prepare(self, st: os.stat_result):
+        size = st.st_size
+        etag = media_etag(self.path, st)
+        self.headers["etag"] = etag
+        self.headers["last-modified"] = formatdate(st.st_mtime, usegmt=True)
+        self.headers["cache-control"] = self.cache_control
+        self.headers["accept-ranges"] = "bytes"
+
+        if self._not_modified(etag, st.st_mtime):
+            self.status_code = 304
+            self.send_header_only = True
+            del self.headers["content-type"]
+            del self.headers["content-length"]
+            return
+
+        range_header = self.request.headers.get("range")
+        if_range = self.request.headers.get("if-range")
+        # A stale If-Range means the client's partial copy is outdated: send everything
+        if range_header and (if_range is None or if_range.strip() == etag):
+            try:
+                self.range = parse_range(range_header, size)
+            except ValueError:
+                self.status_code = 416
+                self.send_header_only = True
+                self.headers["content-range"] = f"bytes */{size}"
+                self.headers["content-length"] = "0"
+                return
+
+        if self.range is None:
+            self.range = (0, size - 1)
+        else:
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {self.range[0]}-{self.range[1]}/{size}"
+        self.headers["content-length"] = str(max(0, self.range[1] - self.range[0] + 1))
+
+    async def __call__(self, scope, receive, send):
+        try:
+            st = await anyio.to_thread.run_sync(os.stat, self.path)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"Video file not found: {os.path.basename(self.path)}")
+        if not stat.S_ISREG(st.st_mode):
+            raise HTTPException(status_code=404, detail=f"Video file not found: {os.path.basename(self.path)}")
+        self._prepare(st)
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        start, end = self.range
+        remaining = end - start + 1
+        zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        with open(self.path, "rb") as file:
+            if zerocopy:
+                # The server copies straight from the page cache to the socket
+                await send({"type": "http.response.zerocopysend", "file": file.fileno(),
+                            "offset": start, "count": remaining, "more_body": False})
+                return
+            await anyio.to_thread.run_sync(file.seek, start)
+            more_body = True
+            while more_body:
+                chunk = await anyio.to_thread.run_sync(file.read, min(MEDIA_CHUNK_SIZE, remaining))
+                remaining -= len(chunk)
+                # Stop early if the file shrank underneath us
+                more_body = remaining > 0 and len(chunk) > 0
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+@media_router.api_route("/uploads/{filename}", methods=["GET", "HEAD"])
+async def uploaded_video(filename: str, request: Request):
+    """Serve an uploaded video with range, conditional-request and caching support"""
+    # Only videos directly under uploads/ are public, not sidecars or partial uploads
+    file_extension = os.path.splitext(filename)[1].lstrip(".").lower()
+    file_path = os.path.join(UPLOADS_DIR, filename)
+    if file_extension not in VIDEO_EXTENSIONS or not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail=f"Video file not found: {filename}")
+    return MediaFileResponse(file_path, request, media_type=MEDIA_TYPES[file_extension])
@@ -0,0 +1,209 @@
+# Self-hosted MediaPipe web runtime for the tracking and demo pages.
+#
+# Vendor the pinned packages once per deploy (the files are build output, not committed):
+#
+#     cd backendapi && python mediapipe_assets.py
+#
+# This downloads every runtime file (scripts, wasm, packed assets, tflite models) into
+# static/mediapipe/ under content-hashed names, with .gz/.br siblings and a manifest.
+# The pages then load everything from /static/mediapipe/ with immutable caching; without
+# a manifest, or for any file missing from it, they fall back to the pinned CDN copy.
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import urllib.request
+from typing import Dict, Optional
+from fastapi import APIRouter, HTTPException, Request
+from media_serving import MediaFileResponse
+from page_cache import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MEDIAPIPE_CDN = os.getenv("MEDIAPIPE_CDN", "https://cdn.jsdelivr.net/npm/@mediapipe")
+MEDIAPIPE_PACKAGE_INDEX = "https://data.jsdelivr.com/v1/package/npm/@mediapipe/{package}@{version}/flat"
+MEDIAPIPE_ASSETS_DIR = os.getenv(
+    "MEDIAPIPE_ASSETS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "mediapipe")
+)
+MEDIAPIPE_ASSETS_URL = "/static/mediapipe"
+MEDIAPIPE_MANIFEST = "manifest.json"
+
+# Pinned so vendored files and the CDN fallback are always the same build
+MEDIAPIPE_PACKAGES = {
+    "camera_utils": "0.3.1675466862",
+    "control_utils": "0.6.1675466023",
+    "drawing_utils": "0.3.1675466124",
+    "pose": "0.5.1675469404",
+}
+# Package files that are not fetched by the browser
+SKIPPED_SUFFIXES = (".d.ts", ".md", ".json")
+
+# Names are content hashed, so a cached copy can never be stale
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+ASSET_TYPES = {
+    ".js": "text/javascript",
+    # Required for WebAssembly.instantiateStreaming
+    ".wasm": "application/wasm",
+    ".data": "application/octet-stream",
+    ".tflite": "application/octet-stream",
+    ".binarypb": "application/octet-stream",
+}
+# Precompressed siblings are only kept when they save at least this fraction
+MIN_COMPRESSION_SAVING = 0.1
+
+# Router for the vendored files; included before the /static mount so it takes precedence
+mediapipe_assets_router = APIRouter()
+
+
+def load_manifest(directory: str = MEDIAPIPE_ASSETS_DIR) -> Optional[dict]:
+    """The vendoring manifest, or None when the assets have not been vendored"""
+    try:
+        with open(os.path.join(directory, MEDIAPIPE_MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # A manifest for other versions than the pinned ones would mix builds with the fallback
+    versions = {package: entry.get("version") for package, entry in manifest.get("packages", {}).items()}
+    if versions != MEDIAPIPE_PACKAGES:
+        print(f"⚠️  Ignoring MediaPipe manifest for {versions}, expected {MEDIAPIPE_PACKAGES}")
+        return None
+    return manifest
+
+
+manifest = load_manifest()
+if manifest is None:
+    print(f"⚠️  MediaPipe assets not vendored, pages load them from {MEDIAPIPE_CDN}")
+# Only files named in the manifest are served, never arbitrary paths under the directory
+served_files = set() if manifest is None else {
+    hashed for entry in manifest["packages"].values() for hashed in entry["files"].values()
+}
+
+
+def cdn_url(package: str, file: str) -> str:
+    return f"{MEDIAPIPE_CDN}/{package}@{MEDIAPIPE_PACKAGES[package]}/{file}"
+
+
+def asset_url(package: str, file: str) -> str:
+    """URL of one runtime file: vendored when available, otherwise the pinned CDN copy"""
+    if manifest is not None:
+        hashed = manifest["packages"][package]["files"].get(file)
+        if hashed is not None:
+            return f"{MEDIAPIPE_ASSETS_URL}/{hashed}"
+    return cdn_url(package, file)
+
+
+def script_tags(*packages: str) -> str:
+    """<script> tags for the main script of each package, in order"""
+    return "\n        ".join(
+        f'<script src="{asset_url(package, package + ".js")}" crossorigin="anonymous"></script>'
+        for package in packages
+    )
+
+
+def pose_files() -> Dict[str, str]:
+    """File name to URL for everything Pose fetches through locateFile (JSON for the page)"""
+    if manifest is None:
+        return {}
+    return {file: asset_url("pose", file) for file in manifest["packages"]["pose"]["files"]}
+
+
+def pose_cdn_base() -> str:
+    """locateFile fallback for files missing from pose_files"""
+    return f"{MEDIAPIPE_CDN}/pose@{MEDIAPIPE_PACKAGES['pose']}"
+
+
+def stats() -> dict:
+    if manifest is None:
+        return {"vendored": False, "cdn": MEDIAPIPE_CDN}
+    return {"vendored": True, "files": sum(len(entry["files"]) for entry in manifest["packages"].values())}
+
+
+@mediapipe_assets_router.api_route(MEDIAPIPE_ASSETS_URL + "/{filename}", methods=["GET", "HEAD"])
+async def mediapipe_asset(filename: str, request: Request):
+    """A vendored runtime file, precompressed when the client accepts it, cached forever"""
+    if filename not in served_files:
+        raise HTTPException(status_code=404, detail=f"Asset not found: {filename}")
+    path = os.path.join(MEDIAPIPE_ASSETS_DIR, filename)
+    media_type = ASSET_TYPES.get(os.path.splitext(filename)[1], "application/octet-stream")
+
+    accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+    encoding = None
+    for candidate, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if accepted.get(candidate, accepted.get("*", 0.0)) > 0 and os.path.isfile(path + suffix):
+            encoding = candidate
+            path += suffix
+            break
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Asset not found: {filename}")
+
+    response = MediaFileResponse(path, request, media_type=media_type, cache_control=ASSET_CACHE_CONTROL)
+    response.headers["vary"] = "Accept-Encoding"
+    if encoding is not None:
+        response.headers["content-encoding"] = encoding
+    return response
+
+
+def hashed_name(file: str, data: bytes) -> str:
+    """pose_web.binarypb -> pose_web.3fa2c81b90d4.binarypb"""
+    stem, dot, extension = file.partition(".")
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{dot}{extension}"
+
+
+def fetch(url: str) -> bytes:
+    with urllib.request.urlopen(url, timeout=60) as response:
+        return response.read()
+
+
+def write_compressed(path: str, data: bytes):
+    """Keep .gz (and .br when Brotli is installed) siblings that are worth serving"""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    for suffix, compressed in variants.items():
+        if len(compressed) <= len(data) * (1 - MIN_COMPRESSION_SAVING):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+
+
+def vendor(directory: str = MEDIAPIPE_ASSETS_DIR) -> dict:
+    """Download the pinned packages into directory and write the manifest"""
+    os.makedirs(directory, exist_ok=True)
+    packages = {}
+    for package, version in MEDIAPIPE_PACKAGES.items():
+        index = json.loads(fetch(MEDIAPIPE_PACKAGE_INDEX.format(package=package, version=version)))
+        files = {}
+        for entry in index["files"]:
+            file = entry["name"].lstrip("/")
+            if "/" in file or file.endswith(SKIPPED_SUFFIXES) or file.upper().startswith("LICENSE"):
+                continue
+            data = fetch(cdn_url(package, file))
+            files[file] = hashed_name(file, data)
+            path = os.path.join(directory, files[file])
+            with open(path, "wb") as f:
+                f.write(data)
+            write_compressed(path, data)
+            print(f"📦 {package}/{file} -> {files[file]} ({len(data) / 1024:.0f} KB)")
+        packages[package] = {"version": version, "files": files}
+
+    vendored = {"packages": packages}
+    # Written last, so a failed run never leaves a manifest pointing at missing files
+    with open(os.path.join(directory, MEDIAPIPE_MANIFEST), "w") as f:
+        json.dump(vendored, f, indent=2)
+    return vendored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vendor the pinned MediaPipe web runtime for the tracking pages")
+    parser.add_argument("--dir", default=MEDIAPIPE_ASSETS_DIR)
+    args = parser.parse_args()
+    vendored = vendor(args.dir)
+    count = sum(len(entry["files"]) for entry in vendored["packages"].values())
+    print(f"✅ Vendored {count} MediaPipe files into {args.dir}; restart the server to serve them")
+
+
+if __name__ == "__main__":
+    main()
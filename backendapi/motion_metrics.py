@@ -0,0 +1,166 @@
+import numpy as np
+from typing import Optional, Tuple
+from landmarks import LandmarkSequence, X, Y, VISIBILITY, VISIBILITY_THRESHOLD
+from joint_angles import AngleSeries, joint_angles
+
+# Joints scored when comparing two takes (nose plus limbs) and when scoring one take (limbs)
+COMPARISON_JOINTS = [0, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
+MOTION_JOINTS = [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
+# Shoulders and hips define the body center
+CENTER_JOINTS = [11, 12, 23, 24]
+LEFT_SHOULDER, LEFT_HIP = 11, 23
+
+
+class MotionFeatures:
+    """
+    Per-take intermediates shared by every metric: visibility masks, frame-to-frame
+    joint displacements, body-size normalization, spread around the body center and
+    joint-angle time series. Each is computed once as a masked array operation over the whole take.
+    """
+    def __init__(self, landmarks: LandmarkSequence):
+        self.landmarks = landmarks
+        self.data = landmarks.data.astype(np.float64)
+        self.visible = (self.data[:, :, VISIBILITY] > VISIBILITY_THRESHOLD) & landmarks.valid[:, None]
+        self.displacements = self._frame_displacements()
+        self.body_size = self._body_size()
+        self.center_variances = self._center_variances()
+        self.angles = AngleSeries(joint_angles(self.data, self.visible))
+
+    def __len__(self) -> int:
+        return len(self.landmarks)
+
+    def _frame_displacements(self) -> np.ndarray:
+        """Mean 3D displacement of the visible motion joints between consecutive detected frames"""
+        if len(self) < 2:
+            return np.empty(0)
+        points = self.data[:, MOTION_JOINTS, :3]
+        visible = self.visible[:, MOTION_JOINTS]
+        moved = visible[1:] & visible[:-1]
+        step = np.linalg.norm(points[1:] - points[:-1], axis=-1)
+        count = moved.sum(axis=1)
+        total = np.where(moved, step, 0.0).sum(axis=1)
+        scored = count > 0
+        return total[scored] / count[scored]
+
+    def _body_size(self) -> np.ndarray:
+        """Shoulder-to-hip length per frame, at least 1 pixel, 1 where the torso is not visible"""
+        shoulder = self.data[:, LEFT_SHOULDER]
+        hip = self.data[:, LEFT_HIP]
+        torso_visible = self.visible[:, LEFT_SHOULDER] & self.visible[:, LEFT_HIP]
+        torso = np.hypot(shoulder[:, X] - hip[:, X], shoulder[:, Y] - hip[:, Y])
+        return np.where(torso_visible, np.maximum(torso, 1.0), 1.0)
+
+    def _center_variances(self) -> np.ndarray:
+        """Variance of the visible motion joints' 2D distance to the body center, per scorable frame"""
+        center_visible = self.visible[:, CENTER_JOINTS]
+        center_count = center_visible.sum(axis=1)
+        safe_count = np.maximum(center_count, 1)
+        center_x = np.where(center_visible, self.data[:, CENTER_JOINTS, X], 0.0).sum(axis=1) / safe_count
+        center_y = np.where(center_visible, self.data[:, CENTER_JOINTS, Y], 0.0).sum(axis=1) / safe_count
+
+        visible = self.visible[:, MOTION_JOINTS] & (center_count > 0)[:, None]
+        dist = np.hypot(self.data[:, MOTION_JOINTS, X] - center_x[:, None],
+                        self.data[:, MOTION_JOINTS, Y] - center_y[:, None])
+        count = visible.sum(axis=1)
+        scored = count > 0
+
+        dist, visible, count = dist[scored], visible[scored], count[scored]
+        mean = np.where(visible, dist, 0.0).sum(axis=1) / count
+        return np.where(visible, (dist - mean[:, None]) ** 2, 0.0).sum(axis=1) / count
+
+    def smoothness(self) -> float:
+        """Inverse of the variance of per-frame joint velocity"""
+        if not len(self.displacements):
+            return 0.0
+        normalized_variance = min(np.var(self.displacements) / 100.0, 1.0)
+        return float((1.0 - normalized_variance) * 100)
+
+    def speed(self, fps: float) -> float:
+        """Average joint displacement per second, normalized to human movement range"""
+        if not len(self.displacements):
+            return 0.0
+        return float(min(np.mean(self.displacements * fps) / 10.0, 100.0))
+
+    def cohesion(self) -> float:
+        """Inverse of the variance of joint distances from the body center"""
+        if not len(self.center_variances):
+            return 0.0
+        normalized_variance = min(np.mean(self.center_variances) / 1000.0, 1.0)
+        return float((1.0 - normalized_variance) * 100)
+
+    def self_accuracy(self) -> float:
+        """Accuracy of a take against itself: 100 if any frame is scorable, else 0"""
+        return 100.0 if self.visible[:, COMPARISON_JOINTS].any() else 0.0
+
+
+class PairFeatures:
+    """
+    Joint distances between paired frames of two takes, shared by similarity and accuracy.
+    Frames are paired by index (truncated to the shorter take) unless pairs, a (k, 2)
+    array of (first frame, second frame) such as a DTW path, is given.
+    """
+    def __init__(self, first: MotionFeatures, second: MotionFeatures, pairs: Optional[np.ndarray] = None):
+        self.first = first
+        self.second = second
+        if pairs is None:
+            n = min(len(first), len(second))
+            first_frames = second_frames = slice(0, n)
+        else:
+            first_frames, second_frames = pairs[:, 0], pairs[:, 1]
+        visible = first.visible[first_frames][:, COMPARISON_JOINTS] & second.visible[second_frames][:, COMPARISON_JOINTS]
+        dist = np.linalg.norm(
+            first.data[first_frames][:, COMPARISON_JOINTS, :3] - second.data[second_frames][:, COMPARISON_JOINTS, :3], axis=-1
+        )
+        count = visible.sum(axis=1)
+        self.scored = count > 0
+        self.mean_distance = np.where(visible, dist, 0.0).sum(axis=1)[self.scored] / count[self.scored]
+        self.first_frames = first_frames
+        self.second_frames = second_frames
+
+    def angle_differences(self) -> dict:
+        """Mean absolute difference of each joint angle over paired frames, in degrees (None if never measured)"""
+        first = self.first.angles.angles[self.first_frames]
+        second = self.second.angles.angles[self.second_frames]
+        diff = np.abs(first - second)
+        measured = ~np.isnan(diff)
+        count = measured.sum(axis=0)
+        total = np.where(measured, diff, 0.0).sum(axis=0)
+        return {
+            name: round(float(total[k] / count[k]), 1) if count[k] else None
+            for k, name in enumerate(self.first.angles.names)
+        }
+
+    def score(self, normalize_by: MotionFeatures) -> float:
+        """Mean of 1 - joint distance / body size, with body size taken from one of the takes"""
+        if not len(self.first) or not len(self.second) or not len(self.mean_distance):
+            return 0.0
+        frames = self.first_frames if normalize_by is self.first else self.second_frames
+        body_size = normalize_by.body_size[frames][self.scored]
+        scores = 1.0 - np.minimum(self.mean_distance / body_size, 1.0)
+        return float(np.mean(scores) * 100)
+
+
+def score_features(past_features: MotionFeatures, new_features: MotionFeatures, fps: float,
+                   pairs: Optional[np.ndarray] = None) -> Tuple[dict, dict]:
+    """
+    All comparison metrics from one pass of shared intermediates.
+    Returns (past_metrics, new_metrics); similarity is only reported for the new take.
+    pairs (e.g. a DTW path) replaces frame-by-frame pairing for similarity and accuracy.
+    """
+    pair = PairFeatures(past_features, new_features, pairs=pairs)
+
+    past_metrics = {
+        'smoothness': past_features.smoothness(),
+        'speed': past_features.speed(fps),
+        'cohesion': past_features.cohesion(),
+        'accuracy': past_features.self_accuracy()  # Self-reference for baseline
+    }
+    new_metrics = {
+        'smoothness': new_features.smoothness(),
+        'speed': new_features.speed(fps),
+        'cohesion': new_features.cohesion(),
+        'accuracy': pair.score(normalize_by=new_features),  # Compare to past video
+        'similarity': pair.score(normalize_by=past_features),
+        'angle_differences': pair.angle_differences()
+    }
+    return past_metrics, new_metrics
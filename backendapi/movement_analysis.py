@@ -0,0 +1,183 @@
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import JSONResponse
+import os
+import time
+import numpy as np
+from typing import Optional
+from motion_metrics import MotionFeatures
+from rep_counting import EXERCISES, count_reps, exercise_angles, exercise_name
+from job_manager import job_manager, JobQueueFull
+from upload_storage import store_upload
+from video_comparison import (
+    SERVER_URL,
+    ProgressCallback,
+    extract_landmarks,
+    annotated_video_url,
+    check_sampling,
+    resolve_upload_url,
+)
+
+# Router for single-video movement analysis jobs
+movement_analysis_router = APIRouter(prefix="/movement-analysis")
+
+def _form_quality(score: float) -> str:
+    if score >= 85:
+        return "Excellent"
+    if score >= 70:
+        return "Good"
+    if score >= 50:
+        return "Fair"
+    return "Needs Work"
+
+def analyze_movement(video_path: str, movement: str, analysis_fps: Optional[float] = None,
+                     max_side: Optional[int] = None, progress: Optional[ProgressCallback] = None) -> dict:
+    """
+    Extract landmarks from one video and score the movement.
+    Runs on a job worker thread; the returned dict is the job result.
+    """
+    started = time.time()
+    landmarks = extract_landmarks(video_path, progress=progress, analysis_fps=analysis_fps, max_side=max_side)
+
+    fps = landmarks.fps or 30.0
+
+    # Angles, thresholds and side selection all come from the exercise table
+    spec = EXERCISES[exercise_name(movement)]
+    left, right, angles = exercise_angles(landmarks.data, landmarks.visible(), spec)
+    reps = count_reps(angles, spec, fps)
+
+    visible_angles = angles[~np.isnan(angles)]
+    if not len(visible_angles):
+        depth_score = 0.0
+    elif spec["kind"] == "hold":
+        # Share of the tracked time spent in position
+        depth_score = float((visible_angles >= spec["hold"]).mean() * 100)
+    else:
+        full_range = 180.0 - spec["depth"]
+        depth_score = float(np.clip((180.0 - visible_angles.min()) / full_range, 0.0, 1.0) * 100)
+
+    if spec["side"] == "min":
+        # Alternating sides: compare how deep each side goes rather than frame by frame
+        deepest = [side[~np.isnan(side)].min() for side in (left, right) if (~np.isnan(side)).any()]
+        pair_diffs = np.array([abs(deepest[0] - deepest[1])]) if len(deepest) == 2 else np.array([])
+    else:
+        pair_diffs = np.abs(left - right)
+    pair_diffs = pair_diffs[~np.isnan(pair_diffs)]
+    symmetry_score = float((1.0 - min(pair_diffs.mean() / 45.0, 1.0)) * 100) if len(pair_diffs) else 0.0
+
+    features = MotionFeatures(landmarks)
+    metrics = {
+        "depth_score": round(depth_score, 1),
+        "balance_score": round(features.cohesion(), 1),
+        "tempo_score": round(features.smoothness(), 1),
+        "symmetry_score": round(symmetry_score, 1),
+    }
+    overall_score = round(float(np.mean(list(metrics.values()))), 1)
+
+    recommendations = []
+    if metrics["depth_score"] < 70:
+        recommendations.append(spec["depth_tip"])
+    if metrics["symmetry_score"] < 70:
+        recommendations.append(spec["symmetry_tip"])
+    if metrics["balance_score"] < 70:
+        recommendations.append("Keep your torso stable and your joints stacked over your base")
+    if metrics["tempo_score"] < 70:
+        recommendations.append("Move at a steadier, more controlled tempo")
+    if not recommendations:
+        recommendations.append("Great form, keep it up!")
+
+    frames_with_pose = landmarks.frames_with_pose
+    return {
+        "movement_type": movement,
+        "overall_score": overall_score,
+        "form_quality": _form_quality(overall_score),
+        "metrics": metrics,
+        "recommendations": recommendations,
+        "rep_count": reps["rep_count"],
+        "hold_seconds": reps["hold_seconds"],
+        "analysis_duration": round(time.time() - started, 1),
+        "frames_processed": len(landmarks),
+        "video_info": {
+            "duration": round(len(landmarks) / fps, 1),
+            "fps": fps,
+            "frame_count": len(landmarks),
+        },
+        "pose_detection_stats": {
+            "total_frames": len(landmarks),
+            "frames_with_pose": frames_with_pose,
+            "detection_rate": round(frames_with_pose / len(landmarks) * 100, 1) if len(landmarks) else 0.0,
+        },
+        "processed_video_url": annotated_video_url(video_path, analysis_fps, max_side),
+    }
+
+def check_movement(movement: str):
+    """Reject movements the rep counting table does not know with a 400"""
+    try:
+        exercise_name(movement)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _queue_analysis(video_path: str, movement: str, analysis_fps: Optional[float] = None,
+                    max_side: Optional[int] = None) -> str:
+    check_sampling(analysis_fps, max_side)
+    check_movement(movement)
+    try:
+        return job_manager.submit("movement-analysis", analyze_movement, video_path, movement,
+                                  analysis_fps=analysis_fps, max_side=max_side)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Server busy, try again later: {str(e)}")
+
+@movement_analysis_router.post("/upload")
+async def upload_movement_video(
+    file: UploadFile = File(...),
+    movement: Optional[str] = Form(None),
+    analysis_fps: Optional[float] = Form(None),
+    max_side: Optional[int] = Form(None)
+):
+    """Store a video; when a movement is given, analysis is queued straight away"""
+    if movement:
+        check_movement(movement)
+    stored = await store_upload(file)
+    response = {**stored, "url": f"{SERVER_URL}/uploads/{stored['filename']}"}
+    if movement:
+        analysis_id = _queue_analysis(os.path.join("uploads", stored["filename"]), movement, analysis_fps, max_side)
+        response.update({"analysis_id": analysis_id, "status": "queued"})
+    print(f"Movement video uploaded: {response}")
+    return response
+
+@movement_analysis_router.post("/analyze")
+async def analyze_video(
+    video_url: str = Form(...),
+    movement: str = Form("squats"),
+    analysis_fps: Optional[float] = Form(None),
+    max_side: Optional[int] = Form(None)
+):
+    """
+    Queue analysis of an already uploaded video and return its id immediately.
+    analysis_fps and max_side override the server's sampling defaults for this video.
+    """
+    video_path = resolve_upload_url(video_url)
+    analysis_id = _queue_analysis(video_path, movement, analysis_fps, max_side)
+    return JSONResponse(status_code=202, content={
+        "analysis_id": analysis_id,
+        "status": "queued",
+        "status_url": f"{SERVER_URL}/movement-analysis/status/{analysis_id}"
+    })
+
+@movement_analysis_router.get("/status/{analysis_id}")
+async def analysis_status(analysis_id: str):
+    """Poll a queued job (movement analysis or comparison) for progress and results"""
+    job = job_manager.get(analysis_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired analysis: {analysis_id}")
+
+    response = {
+        "analysis_id": analysis_id,
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+    }
+    if job["status"] == "completed":
+        response["results"] = job["result"]
+    elif job["status"] == "failed":
+        response["error"] = job["error"]
+    return response
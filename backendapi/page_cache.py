@@ -0,0 +1,147 @@
+import asyncio
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Brotli is optional: without it pages are offered gzip-compressed only
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# The pages embed the tracker code, which changes on deploy: let clients keep a copy but
+# revalidate it every time (a 304 costs a few hundred bytes instead of ~70 KB)
+PAGE_CACHE_CONTROL = os.getenv("PAGE_CACHE_CONTROL", "no-cache")
+# Distinct parameter sets kept rendered; width/height come from the client, so bound it
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "64"))
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Content codings of an Accept-Encoding header with their q-values"""
+    encodings = {}
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        encodings[name] = q
+    return encodings
+
+
+class RenderedPage:
+    """
+    One rendered page (HTML, or a script such as the service worker) with its compressed
+    bodies precomputed and a strong ETag per representation, so a request only has to pick bytes.
+    """
+    def __init__(self, content: str, media_type: str = "text/html", headers: Optional[Dict[str, str]] = None):
+        self.media_type = media_type
+        self.headers = headers or {}
+        self.bodies = {"identity": content.encode("utf-8")}
+        # Compressed once at the highest level, since every later request reuses the result
+        self.bodies["gzip"] = gzip.compress(self.bodies["identity"], compresslevel=9, mtime=0)
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(self.bodies["identity"], quality=11, mode=brotli.MODE_TEXT)
+        digest = hashlib.sha256(self.bodies["identity"]).hexdigest()[:32]
+        self.etags = {
+            encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            for encoding in self.bodies
+        }
+
+    def encoding_for(self, accept_encoding: str) -> str:
+        """Smallest representation the client accepts"""
+        accepted = accepted_encodings(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and accepted.get(encoding, wildcard) > 0:
+                return encoding
+        return "identity"
+
+    def matches(self, if_none_match: str) -> bool:
+        """Weak comparison, as If-None-Match uses: any representation of this page matches"""
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return not tags.isdisjoint(self.etags.values())
+
+    def response(self, request: Request) -> Response:
+        encoding = self.encoding_for(request.headers.get("accept-encoding", ""))
+        headers = {
+            "etag": self.etags[encoding],
+            "cache-control": PAGE_CACHE_CONTROL,
+            "vary": "Accept-Encoding",
+            **self.headers,
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and self.matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["content-encoding"] = encoding
+        return Response(content=self.bodies[encoding], media_type=self.media_type, headers=headers)
+
+
+class PageCache:
+    """
+    LRU of rendered pages keyed by their distinct parameter sets. Pages are rendered
+    and compressed on first request; later requests skip the template entirely.
+    """
+    def __init__(self, max_pages: int = PAGE_CACHE_SIZE):
+        self.max_pages = max(1, max_pages)
+        self._pages: "OrderedDict[Hashable, RenderedPage]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, render: Callable[[], str], **options) -> RenderedPage:
+        """The cached page for key, rendering it with render() on a miss; options go to RenderedPage"""
+        page = self._lookup(key)
+        if page is None:
+            page = self._store(key, RenderedPage(render(), **options))
+        return page
+
+    async def response(self, request: Request, key: Hashable, render: Callable[[], str], **options) -> Response:
+        """
+        Response for the page cached under key. A miss renders and compresses on a worker
+        thread: gzip 9 plus brotli 11 of the tracking page takes long enough to stall the
+        event loop, and with it every live WebSocket.
+        """
+        page = self._lookup(key)
+        if page is None:
+            page = self._store(key, await asyncio.to_thread(lambda: RenderedPage(render(), **options)))
+        return page.response(request)
+
+    def _lookup(self, key: Hashable) -> Optional[RenderedPage]:
+        page = self._pages.get(key)
+        if page is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._pages.move_to_end(key)
+        return page
+
+    def _store(self, key: Hashable, page: RenderedPage) -> RenderedPage:
+        self._pages[key] = page
+        self._pages.move_to_end(key)
+        if len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return page
+
+    def clear(self):
+        self._pages.clear()
+
+    def stats(self) -> dict:
+        return {"pages": len(self._pages), "hits": self.hits, "misses": self.misses}
+
+
+# Shared by the tracking and demo pages and the service worker script
+page_cache = PageCache()
@@ -1,109 +1,139 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
 import cv2
 import numpy as np
 import mediapipe as mp
+from pose_state import PoseState
 
 # Initialize MediaPipe Pose with balanced settings
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
 
+# Number of independent Pose graphs; one per concurrent video or live session
+POSE_POOL_SIZE = int(os.getenv("POSE_POOL_SIZE", str(os.cpu_count() or 1)))
 # Use model_complexity=1 for better accuracy while maintaining performance
-pose = mp_pose.Pose(
-    static_image_mode=False,
-    model_complexity=1,  # Better accuracy than 0, still good performance
-    smooth_landmarks=True,
-    enable_segmentation=False,
-    smooth_segmentation=False,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
+POSE_MODEL_COMPLEXITY = int(os.getenv("POSE_MODEL_COMPLEXITY", "1"))
+# Graphs reserved for live sessions, which hold one for the whole connection. They come from
+# their own pool so open sockets can never starve video jobs of graphs, nor jobs the sockets
+LIVE_POSE_POOL_SIZE = int(os.getenv("LIVE_POSE_POOL_SIZE", "2"))
+# How long a live session waits for an idle graph of its own before being turned away
+LIVE_POSE_TIMEOUT = float(os.getenv("LIVE_POSE_TIMEOUT", "2"))
+# Seconds a video extraction waits for an idle graph before its job fails instead of hanging
+POSE_CHECKOUT_TIMEOUT = float(os.getenv("POSE_CHECKOUT_TIMEOUT", "300"))
 
-class PoseTracker:
-    def __init__(self):
-        self.rep_count = 0
-        self.is_down = False
-        self.ready_position = False
-        self.posture_direction = "center"
-        self.last_frame_time = 0
+def create_pose(model_complexity: int = POSE_MODEL_COMPLEXITY):
+    """Build a video-mode Pose graph with the server's standard settings"""
+    return mp_pose.Pose(
+        static_image_mode=False,
+        model_complexity=model_complexity,
+        smooth_landmarks=True,
+        enable_segmentation=False,
+        smooth_segmentation=False,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+class PosePool:
+    """
+    Checkout/return pool of Pose graphs.
+    MediaPipe graphs keep tracking and smoothing state between calls and are not
+    thread-safe, so every video or session gets a graph of its own for its whole run.
+    """
+    def __init__(self, size: int = POSE_POOL_SIZE, model_complexity: int = POSE_MODEL_COMPLEXITY):
+        self.size = max(1, size)
+        self.model_complexity = model_complexity
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def warm(self):
+        """Create every graph up front and push a blank frame through each to load the model"""
+        blank = np.zeros((64, 64, 3), dtype=np.uint8)
+        with self._lock:
+            missing = self.size - self._created
+            self._created = self.size
+        for _ in range(missing):
+            pose = create_pose(self.model_complexity)
+            pose.process(blank)
+            self._reset(pose)
+            self._idle.put(pose)
+        print(f"🔥 Pose pool warmed with {self.size} graphs")
+
+    def acquire(self, timeout: float = None):
+        """Take an idle graph, creating one lazily while under the pool size, else wait"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            return create_pose(self.model_complexity)
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No idle Pose graph available within {timeout:g}s")
+
+    def release(self, pose):
+        """Return a graph to the pool with its temporal state cleared"""
+        self._reset(pose)
+        self._idle.put(pose)
+
+    @contextmanager
+    def checkout(self, timeout: float = None):
+        pose = self.acquire(timeout)
+        try:
+            yield pose
+        finally:
+            self.release(pose)
+
+    def _reset(self, pose):
+        # Clears the landmark smoothing filters and tracking ROI from the previous video
+        pose.reset()
+
+    def stats(self) -> dict:
+        return {"size": self.size, "created": self._created, "idle": self._idle.qsize()}
+
+# Shared pool used by video processing
+pose_pool = PosePool()
+# Live WebSocket sessions and PoseTracker frames
+live_pose_pool = PosePool(LIVE_POSE_POOL_SIZE)
+
+class PoseTracker(PoseState):
+    """PoseState fed from the server's own Pose graph, checked out of live_pose_pool on the first frame"""
+    def __init__(self, exercise: str = "squats"):
+        super().__init__(exercise)
+        self.pose = None
         
     def reset(self):
-        self.rep_count = 0
-        self.is_down = False
-        self.ready_position = False
+        super().reset()
+        if self.pose is not None:
+            live_pose_pool.release(self.pose)
+            self.pose = None
+
+    def close(self):
+        """Give the session's Pose graph back to the pool"""
+        self.reset()
         
     def process_frame(self, frame):
-        """Process a frame and return pose data"""
+        """
+        Process a frame and return pose data. Raises TimeoutError when no live graph frees up
+        within LIVE_POSE_TIMEOUT; the session should then be turned away as busy.
+        """
         # Don't resize here - already done in main processing
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(frame_rgb)
+        # Each live session keeps one graph so tracking state carries over between its frames
+        if self.pose is None:
+            self.pose = live_pose_pool.acquire(timeout=LIVE_POSE_TIMEOUT)
+        results = self.pose.process(frame_rgb)
         
         if not results.pose_landmarks:
-            return {
-                "type": "info",
-                "ready": False,
-                "postureDirection": "not detected",
-            }
-        
-        ready, direction = self._check_positioning(results.pose_landmarks)
-        
-        if ready:
-            return self._track_exercise(results.pose_landmarks)
-        else:
-            return {
-                "type": "info",
-                "ready": False,
-                "postureDirection": direction
-            }
-    
-    def _check_positioning(self, landmarks):
-        """Check if person is positioned correctly in frame"""
-        hip = landmarks.landmark[mp_pose.PoseLandmark.LEFT_HIP]
-        shoulder = landmarks.landmark[mp_pose.PoseLandmark.LEFT_SHOULDER]
-        
-        if hip.visibility < 0.5:
-            return False, "move closer"
-            
-        if hip.x < 0.3:
-            return False, "right"
-        elif hip.x > 0.7:
-            return False, "left"
-            
-        self.ready_position = True
-        return True, "center"
-    
-    def _track_exercise(self, landmarks):
-        """Track the exercise and count reps"""
-        hip = landmarks.landmark[mp_pose.PoseLandmark.LEFT_HIP]
-        knee = landmarks.landmark[mp_pose.PoseLandmark.LEFT_KNEE]
-        ankle = landmarks.landmark[mp_pose.PoseLandmark.LEFT_ANKLE]
-        
-        knee_angle = self._calculate_angle(
-            (hip.x, hip.y),
-            (knee.x, knee.y),
-            (ankle.x, ankle.y)
+            return self.process_landmarks(None)
+        landmarks = np.array(
+            [(lm.x, lm.y, lm.z, lm.visibility) for lm in results.pose_landmarks.landmark], dtype=np.float32
         )
-        
-        if knee_angle < 110 and not self.is_down:
-            self.is_down = True
-        elif knee_angle > 160 and self.is_down:
-            self.is_down = False
-            self.rep_count += 1
-            
-        return {
-            "type": "counter",
-            "current_count": self.rep_count,
-            "ready": True
-        }
-        
-    def _calculate_angle(self, a, b, c):
-        """Calculate angle between three points"""
-        a = np.array(a)
-        b = np.array(b)
-        c = np.array(c)
-        
-        radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-        angle = np.abs(radians * 180.0 / np.pi)
-        
-        if angle > 180.0:
-            angle = 360 - angle
-            
-        return angle
\ No newline at end of file
+        return self.process_landmarks(landmarks)
@@ -0,0 +1,63 @@
+import cv2
+import numpy as np
+from landmarks import LandmarkSequence, VISIBILITY, VISIBILITY_THRESHOLD
+from pose_processor import mp_pose
+
+# mp_drawing.draw_landmarks with the DrawingSpecs process_video passes it
+LANDMARK_COLOR = (0, 255, 0)    # Green landmarks
+LANDMARK_BORDER_COLOR = (224, 224, 224)  # mp_drawing.WHITE_COLOR
+LANDMARK_RADIUS = 3
+LANDMARK_THICKNESS = 3
+CONNECTION_COLOR = (0, 0, 255)  # Red connections
+CONNECTION_THICKNESS = 2
+POSE_CONNECTIONS = [tuple(connection) for connection in mp_pose.POSE_CONNECTIONS]
+
+
+def draw_skeleton(frame: np.ndarray, landmarks: np.ndarray):
+    """
+    Draw one frame's (33, 4) pixel-space landmarks onto a BGR frame in place, the way
+    mp_drawing.draw_landmarks does: only visible landmarks inside the image, connections
+    first, then each landmark as a filled dot over a white border.
+    """
+    height, width = frame.shape[:2]
+    x, y = landmarks[:, 0], landmarks[:, 1]
+    visible = (landmarks[:, VISIBILITY] >= VISIBILITY_THRESHOLD) & (x >= 0) & (x <= width) & (y >= 0) & (y <= height)
+    points = np.minimum(np.floor(landmarks[:, :2]), (width - 1, height - 1)).astype(np.int32)
+    for start, end in POSE_CONNECTIONS:
+        if visible[start] and visible[end]:
+            cv2.line(frame, tuple(points[start]), tuple(points[end]), CONNECTION_COLOR, CONNECTION_THICKNESS)
+    border_radius = max(LANDMARK_RADIUS + 1, int(LANDMARK_RADIUS * 1.2))
+    for idx in np.flatnonzero(visible):
+        cv2.circle(frame, tuple(points[idx]), border_radius, LANDMARK_BORDER_COLOR, LANDMARK_THICKNESS)
+        cv2.circle(frame, tuple(points[idx]), LANDMARK_RADIUS, LANDMARK_COLOR, LANDMARK_THICKNESS)
+
+
+def render_annotated_video(video_path: str, landmarks: LandmarkSequence, output_path: str):
+    """
+    Re-encode a video with its already extracted skeleton drawn on each frame.
+    No inference runs here, so this is only a decode, draw and encode pass.
+    Landmarks sampled below the video's frame rate are held until the next sampled frame.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    step = max(1, round(fps / landmarks.fps)) if fps and landmarks.fps else 1
+
+    try:
+        for frame_index in range(len(landmarks) * step):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            sample = frame_index // step
+            if landmarks.valid[sample]:
+                draw_skeleton(frame, landmarks.data[sample])
+            out.write(frame)
+    finally:
+        cap.release()
+        out.release()
+    print(f"Annotated video rendered to: {output_path}")
@@ -0,0 +1,88 @@
+import time
+from typing import Optional, Tuple
+import numpy as np
+from landmarks import X, VISIBILITY
+from rep_counting import RepCounter
+
+# The athlete is framed once the left hip is visible and in the middle of the image
+LEFT_HIP = 23
+MIN_HIP_VISIBILITY = 0.5
+CENTER_BAND = (0.3, 0.7)
+
+
+class PoseState:
+    """
+    Live rep counting from one frame of landmarks at a time: the positioning check, the
+    session's RepCounter and the messages sent to the page. Needs no MediaPipe, so it runs
+    the same on landmarks from the server's graph (PoseTracker) and from the client
+    (LandmarkIngestSession).
+    """
+    def __init__(self, exercise: str = "squats"):
+        # Raises ValueError for exercises missing from rep_counting.EXERCISES
+        self.counter = RepCounter(exercise)
+        self.rep_count = 0
+        self.is_down = False
+        self.ready_position = False
+        self.last_frame_time = 0
+
+    def reset(self):
+        self.counter.reset()
+        self.rep_count = 0
+        self.is_down = False
+        self.ready_position = False
+
+    def process_landmarks(self, landmarks: Optional[np.ndarray]) -> dict:
+        """
+        Advance with one (33, 4) array of normalized x, y, z and visibility, or None when
+        no pose was found, and return the message for that frame.
+        """
+        if landmarks is None:
+            return {
+                "type": "info",
+                "ready": False,
+                "postureDirection": "not detected",
+            }
+
+        ready, direction = self._check_positioning(landmarks)
+
+        if ready:
+            return self._track_exercise(landmarks)
+        else:
+            return {
+                "type": "info",
+                "ready": False,
+                "postureDirection": direction
+            }
+
+    def _check_positioning(self, landmarks: np.ndarray) -> Tuple[bool, str]:
+        """Check if person is positioned correctly in frame"""
+        hip = landmarks[LEFT_HIP]
+
+        if hip[VISIBILITY] < MIN_HIP_VISIBILITY:
+            return False, "move closer"
+
+        if hip[X] < CENTER_BAND[0]:
+            return False, "right"
+        elif hip[X] > CENTER_BAND[1]:
+            return False, "left"
+
+        self.ready_position = True
+        return True, "center"
+
+    def _track_exercise(self, landmarks: np.ndarray) -> dict:
+        """Track the exercise and count reps"""
+        self.last_frame_time = time.monotonic()
+        self.counter.update(landmarks, self.last_frame_time)
+        self.rep_count = self.counter.rep_count
+        self.is_down = self.counter.is_down
+
+        message = {
+            "type": "counter",
+            "exercise": self.counter.exercise,
+            "current_count": self.rep_count,
+            "ready": True
+        }
+        if self.counter.spec["kind"] == "hold":
+            # Whole seconds, so change-only listeners hear about a plank once a second
+            message["hold_seconds"] = int(self.counter.hold_seconds)
+        return message
@@ -0,0 +1,171 @@
+import math
+from typing import Optional, Tuple
+import numpy as np
+from landmarks import VISIBILITY
+from joint_angles import JOINT_ANGLES, joint_angles
+
+# Declarative exercise table. Each entry names, per body side, the joint_angles.JOINT_ANGLES
+# angle that drives the count, and the angle band of the rep state machine:
+#   down  - the bottom phase of a rep starts once the angle drops below this
+#   up    - the rep completes once the angle rises back above this
+# The gap between the two is the hysteresis that stops jitter around a single threshold
+# from counting twice. depth is the angle of a full-range rep, used for scoring, and the
+# tips are the coaching advice for low depth and symmetry scores.
+# side picks the angle used each frame:
+#   "left" / "right" - that side only
+#   "min"            - the more bent side (the working leg of alternating lunges)
+#   "visible"        - whichever side the camera sees better (side-on push-ups, deadlifts)
+# Hold exercises (kind "hold") time how long the angle stays at or above hold instead.
+EXERCISES = {
+    "squats": {
+        "kind": "reps", "angles": {"left": "left_knee", "right": "right_knee"}, "side": "left",
+        "down": 110.0, "up": 160.0, "depth": 90.0,
+        "depth_tip": "Go deeper in your squat for better glute activation",
+        "symmetry_tip": "Keep your weight evenly distributed between both legs",
+    },
+    "pushups": {
+        "kind": "reps", "angles": {"left": "left_elbow", "right": "right_elbow"}, "side": "visible",
+        "down": 100.0, "up": 150.0, "depth": 90.0,
+        "depth_tip": "Lower your chest until your elbows reach 90 degrees",
+        "symmetry_tip": "Bend both arms evenly as you lower",
+    },
+    "deadlifts": {
+        "kind": "reps", "angles": {"left": "left_hip", "right": "right_hip"}, "side": "visible",
+        "down": 130.0, "up": 165.0, "depth": 100.0,
+        "depth_tip": "Hinge further at the hips while keeping your back flat",
+        "symmetry_tip": "Keep your hips square as you hinge",
+    },
+    "lunges": {
+        "kind": "reps", "angles": {"left": "left_knee", "right": "right_knee"}, "side": "min",
+        "down": 110.0, "up": 160.0, "depth": 90.0,
+        "depth_tip": "Lower your back knee closer to the floor",
+        "symmetry_tip": "Go equally deep on both legs",
+    },
+    "planks": {
+        "kind": "hold", "angles": {"left": "left_body_line", "right": "right_body_line"}, "side": "visible",
+        "hold": 160.0,
+        "depth_tip": "Keep your hips in line with your shoulders and ankles",
+        "symmetry_tip": "Keep your shoulders and hips level",
+    },
+}
+
+EXERCISE_ALIASES = {
+    "squat": "squats", "pushup": "pushups", "push-up": "pushups", "push-ups": "pushups", "push_ups": "pushups",
+    "deadlift": "deadlifts", "lunge": "lunges", "plank": "planks",
+}
+
+# A live frame gap longer than this (dropped connection, paused camera) does not count as hold time
+MAX_HOLD_GAP = 1.0
+
+
+def exercise_name(name: str) -> str:
+    """Canonical table key for an exercise name or alias; raises ValueError for unknown exercises"""
+    key = (name or "").strip().lower()
+    key = EXERCISE_ALIASES.get(key, key)
+    if key not in EXERCISES:
+        raise ValueError(f"Unsupported exercise '{name}', expected one of {sorted(EXERCISES)}")
+    return key
+
+
+def exercise_angles(data: np.ndarray, visible: np.ndarray, spec: dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(left, right, selected) angle series for an exercise; selected follows spec["side"]"""
+    names = (spec["angles"]["left"], spec["angles"]["right"])
+    left, right = joint_angles(data, visible, names=names).T
+    side = spec["side"]
+    if side == "left":
+        return left, right, left
+    if side == "right":
+        return left, right, right
+    if side == "min":
+        return left, right, np.fmin(left, right)
+    # "visible": prefer the side whose joints are more visible, falling back to the other
+    left_score, right_score = (data[:, list(JOINT_ANGLES[name]), VISIBILITY].sum(axis=1) for name in names)
+    preferred = np.where(left_score >= right_score, left, right)
+    other = np.where(left_score >= right_score, right, left)
+    return left, right, np.where(np.isnan(preferred), other, preferred)
+
+
+def frame_angle(landmarks: np.ndarray, spec: dict) -> float:
+    """The selected angle of exercise_angles for a single live (33, 4) frame, using scalar math"""
+    names = (spec["angles"]["left"], spec["angles"]["right"])
+    left, right = joint_angles(landmarks, names=names).tolist()
+    side = spec["side"]
+    if side == "left":
+        return left
+    if side == "right":
+        return right
+    if math.isnan(left) or math.isnan(right):
+        return right if math.isnan(left) else left
+    if side == "min":
+        return min(left, right)
+    left_score, right_score = (float(landmarks[list(JOINT_ANGLES[name]), VISIBILITY].sum()) for name in names)
+    return left if left_score >= right_score else right
+
+
+def rep_phases(angles: np.ndarray, down: float, up: float) -> np.ndarray:
+    """
+    Per-frame "in the bottom phase" state of the rep state machine, in one pass:
+    frames below down switch it on, frames above up switch it off, everything else
+    (including NaN) keeps the last state, so the state is the most recent switch carried forward.
+    """
+    events = np.where(angles < down, 1, np.where(angles > up, -1, 0))
+    frames = np.arange(len(angles))
+    last_event = np.maximum.accumulate(np.where(events != 0, frames, -1)) if len(angles) else frames
+    return (last_event >= 0) & (events[np.maximum(last_event, 0)] == 1)
+
+
+def count_reps(angles: np.ndarray, spec: dict, fps: float = 30.0) -> dict:
+    """
+    Whole-video count for an angle series: reps and the frames they completed on,
+    or for hold exercises the seconds spent holding the position.
+    """
+    if spec["kind"] == "hold":
+        held = angles >= spec["hold"]
+        return {"rep_count": 0, "rep_frames": [], "hold_seconds": round(float(held.sum()) / (fps or 30.0), 1)}
+    down = rep_phases(angles, spec["down"], spec["up"])
+    completed = np.flatnonzero(down[:-1] & ~down[1:]) + 1
+    return {"rep_count": int(len(completed)), "rep_frames": completed.tolist(), "hold_seconds": 0.0}
+
+
+class RepCounter:
+    """
+    Frame-by-frame form of count_reps for live sessions, driven by the same exercise table
+    and state machine so live and uploaded-video counts agree.
+    """
+    def __init__(self, exercise: str = "squats"):
+        self.exercise = exercise_name(exercise)
+        self.spec = EXERCISES[self.exercise]
+        self.reset()
+
+    def reset(self):
+        self.rep_count = 0
+        self.is_down = False
+        self.hold_seconds = 0.0
+        self.angle = None
+        self._last_time = None
+
+    def update(self, landmarks: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        """
+        Advance with one (33, 4) frame; timestamp in seconds drives hold timing.
+        Returns True when this frame completed a rep.
+        """
+        angle = frame_angle(landmarks, self.spec)
+        self.angle = None if math.isnan(angle) else angle
+        previous, self._last_time = self._last_time, timestamp
+
+        if self.spec["kind"] == "hold":
+            if self.angle is not None and self.angle >= self.spec["hold"] and previous is not None and timestamp is not None:
+                gap = timestamp - previous
+                if 0 < gap <= MAX_HOLD_GAP:
+                    self.hold_seconds += gap
+            return False
+
+        if self.angle is None:
+            return False
+        if self.angle < self.spec["down"]:
+            self.is_down = True
+        elif self.angle > self.spec["up"] and self.is_down:
+            self.is_down = False
+            self.rep_count += 1
+            return True
+        return False
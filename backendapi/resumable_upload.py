@@ -0,0 +1,274 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from fastapi import APIRouter, Form, Header, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from starlette.requests import ClientDisconnect
+from landmark_cache import hash_file, new_hasher, write_upload_hash, HASH_CHUNK_SIZE
+from upload_storage import UPLOADS_DIR, MAX_UPLOAD_BYTES, new_upload_path, upload_too_large, video_extension
+from video_comparison import SERVER_URL
+
+# Resumable uploads: create a session, PATCH chunks at the offset the server reports,
+# then finalize. A dropped connection only loses the chunk in flight; the client asks
+# for the current offset and carries on from there.
+RESUMABLE_CHUNK_MB = float(os.getenv("RESUMABLE_CHUNK_MB", "8"))
+RESUMABLE_UPLOAD_TTL = float(os.getenv("RESUMABLE_UPLOAD_TTL", str(24 * 3600)))
+PARTIAL_DIR = os.path.join(UPLOADS_DIR, "partial")
+
+# Router for resumable upload sessions
+resumable_upload_router = APIRouter(prefix="/uploads/sessions")
+
+# Per-session state that cannot be persisted: the running hash of the bytes received so far
+# and a lock so two requests for the same session never interleave. The offset is always the
+# size of the partial file on disk, so sessions survive a server restart.
+_hashers: Dict[str, tuple] = {}
+# Lock per session with the number of requests holding or waiting for it; the entry is
+# dropped by the last of them, never while anyone still waits on it
+_locks: Dict[str, asyncio.Lock] = {}
+_lock_users: Dict[str, int] = {}
+
+
+def _part_path(upload_id: str) -> str:
+    return os.path.join(PARTIAL_DIR, f"{upload_id}.part")
+
+
+def _meta_path(upload_id: str) -> str:
+    return os.path.join(PARTIAL_DIR, f"{upload_id}.json")
+
+
+def _load_session(upload_id: str) -> dict:
+    not_found = HTTPException(status_code=404, detail=f"Unknown or expired upload session: {upload_id}")
+    if not upload_id.isalnum():
+        raise not_found
+    try:
+        with open(_meta_path(upload_id)) as f:
+            session = json.load(f)
+        session["updated_at"] = os.path.getmtime(_meta_path(upload_id))
+        # No partial file (removed by hand or half-discarded): there is nothing to resume
+        session["offset"] = os.path.getsize(_part_path(upload_id))
+    except FileNotFoundError:
+        raise not_found
+    return session
+
+
+@asynccontextmanager
+async def _session_lock(upload_id: str):
+    """
+    Hold the lock of an existing session (404 otherwise, before anything is allocated for it).
+    Callers reload the session once they hold it, since it may have been discarded meanwhile.
+    """
+    _load_session(upload_id)
+    lock = _locks.setdefault(upload_id, asyncio.Lock())
+    _lock_users[upload_id] = _lock_users.get(upload_id, 0) + 1
+    try:
+        async with lock:
+            yield
+    finally:
+        _lock_users[upload_id] -= 1
+        if not _lock_users[upload_id]:
+            del _lock_users[upload_id]
+            del _locks[upload_id]
+
+
+def _discard_session(upload_id: str):
+    for path in (_part_path(upload_id), _meta_path(upload_id)):
+        if os.path.exists(path):
+            os.remove(path)
+    _hashers.pop(upload_id, None)
+
+
+def _purge_expired():
+    if not os.path.isdir(PARTIAL_DIR):
+        return
+    cutoff = time.time() - RESUMABLE_UPLOAD_TTL
+    for name in os.listdir(PARTIAL_DIR):
+        upload_id, extension = os.path.splitext(name)
+        if extension == ".json" and os.path.getmtime(os.path.join(PARTIAL_DIR, name)) < cutoff:
+            print(f"🧹 Upload session {upload_id} expired")
+            _discard_session(upload_id)
+
+
+def _session_status(session: dict) -> dict:
+    return {
+        "upload_id": session["upload_id"],
+        "offset": session["offset"],
+        "size": session["size"],
+        "chunk_size": int(RESUMABLE_CHUNK_MB * 1024 * 1024),
+        "expires_at": session["updated_at"] + RESUMABLE_UPLOAD_TTL,
+        "upload_url": f"{SERVER_URL}/uploads/sessions/{session['upload_id']}",
+    }
+
+
+def _offset_headers(session: dict) -> dict:
+    return {"Upload-Offset": str(session["offset"]), "Upload-Length": str(session["size"])}
+
+
+@resumable_upload_router.post("")
+async def create_upload_session(
+    filename: str = Form(...),
+    size: int = Form(...),
+    sha256: Optional[str] = Form(None)
+):
+    """
+    Start a resumable upload of a video of `size` bytes.
+    If sha256 is given here (or at finalize), the assembled file must match it.
+    """
+    file_extension = video_extension(filename)
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="size must be positive")
+    if size > MAX_UPLOAD_BYTES:
+        raise upload_too_large()
+
+    await asyncio.to_thread(_purge_expired)
+    os.makedirs(PARTIAL_DIR, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    session = {
+        "upload_id": upload_id,
+        "extension": file_extension,
+        "size": size,
+        "sha256": sha256.lower() if sha256 else None,
+        "created_at": time.time(),
+    }
+    open(_part_path(upload_id), "wb").close()
+    with open(_meta_path(upload_id), "w") as f:
+        json.dump(session, f)
+    _hashers[upload_id] = (new_hasher(), 0)
+
+    session.update(offset=0, updated_at=session["created_at"])
+    print(f"📤 Upload session {upload_id} created for {filename} ({size} bytes)")
+    return JSONResponse(status_code=201, content=_session_status(session), headers=_offset_headers(session))
+
+
+@resumable_upload_router.head("/{upload_id}")
+async def upload_session_offset(upload_id: str):
+    """Current offset in the Upload-Offset header, for clients resuming after a failure"""
+    session = _load_session(upload_id)
+    return Response(headers=_offset_headers(session))
+
+
+@resumable_upload_router.get("/{upload_id}")
+async def upload_session_status(upload_id: str):
+    session = _load_session(upload_id)
+    return JSONResponse(content=_session_status(session), headers=_offset_headers(session))
+
+
+def _write_at(path: str, offset: int, data: bytes):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+
+
+def _truncate(path: str, size: int):
+    with open(path, "r+b") as f:
+        f.truncate(size)
+
+
+@resumable_upload_router.patch("/{upload_id}")
+async def upload_session_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset")
+):
+    """
+    Append the raw request body at Upload-Offset, which must equal the current offset.
+    Bytes that arrive before a dropped connection are kept, so the client resumes
+    from whatever offset HEAD reports afterwards.
+    """
+    async with _session_lock(upload_id):
+        session = _load_session(upload_id)
+        if upload_offset != session["offset"]:
+            return JSONResponse(
+                status_code=409,
+                content={"detail": "Upload-Offset does not match the session offset", "offset": session["offset"]},
+                headers=_offset_headers(session),
+            )
+
+        part_path = _part_path(upload_id)
+        hasher, hashed = _hashers.get(upload_id, (None, -1))
+        if hashed != session["offset"]:
+            # Running hash lost (restart) or out of step; finalize re-reads the file instead
+            hasher = None
+
+        offset = session["offset"]
+        buffer = bytearray()
+
+        async def flush():
+            nonlocal offset
+            if buffer:
+                data = bytes(buffer)
+                await asyncio.to_thread(_write_at, part_path, offset, data)
+                if hasher is not None:
+                    hasher.update(data)
+                offset += len(data)
+                buffer.clear()
+
+        try:
+            async for chunk in request.stream():
+                if offset + len(buffer) + len(chunk) > session["size"]:
+                    # Reject the whole chunk, including anything already flushed from it
+                    buffer.clear()
+                    offset, hasher = session["offset"], None
+                    await asyncio.to_thread(_truncate, part_path, offset)
+                    raise HTTPException(status_code=413, detail="Chunk goes past the declared upload size")
+                buffer.extend(chunk)
+                if len(buffer) >= HASH_CHUNK_SIZE:
+                    await flush()
+        except ClientDisconnect:
+            print(f"⚠️  Upload session {upload_id} disconnected at offset {offset + len(buffer)}")
+        finally:
+            await flush()
+            _hashers[upload_id] = (hasher, offset)
+
+        session["offset"] = offset
+        os.utime(_meta_path(upload_id))
+        return JSONResponse(content={"upload_id": upload_id, "offset": offset, "size": session["size"]},
+                            headers=_offset_headers(session))
+
+
+@resumable_upload_router.post("/{upload_id}/finalize")
+async def finalize_upload_session(upload_id: str, sha256: Optional[str] = Form(None)):
+    """
+    Verify a complete upload and move it into uploads/.
+    Returns the same payload as POST /uploads. A hash mismatch discards the session.
+    """
+    async with _session_lock(upload_id):
+        session = _load_session(upload_id)
+        if session["offset"] != session["size"]:
+            return JSONResponse(
+                status_code=409,
+                content={"detail": "Upload is incomplete", "offset": session["offset"], "size": session["size"]},
+                headers=_offset_headers(session),
+            )
+
+        part_path = _part_path(upload_id)
+        hasher, hashed = _hashers.get(upload_id, (None, -1))
+        if hasher is not None and hashed == session["size"]:
+            digest = hasher.hexdigest()
+        else:
+            digest = await asyncio.to_thread(hash_file, part_path)
+
+        expected = [h.lower() for h in (session["sha256"], sha256) if h]
+        if any(h != digest for h in expected):
+            _discard_session(upload_id)
+            raise HTTPException(status_code=422, detail=f"Hash mismatch: received data hashes to {digest}")
+
+        unique_filename, file_path = new_upload_path(session["extension"])
+        os.replace(part_path, file_path)
+        write_upload_hash(file_path, digest)
+        _discard_session(upload_id)
+
+    file_url = f"{SERVER_URL}/uploads/{unique_filename}"
+    print(f"File uploaded: {file_url} ({session['size']} bytes, sha256 {digest[:12]}, resumable)")
+    return {"filename": unique_filename, "sha256": digest, "size": session["size"], "url": file_url}
+
+
+@resumable_upload_router.delete("/{upload_id}")
+async def abort_upload_session(upload_id: str):
+    async with _session_lock(upload_id):
+        _load_session(upload_id)
+        _discard_session(upload_id)
+    return {"upload_id": upload_id, "status": "aborted"}
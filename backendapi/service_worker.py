@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import statistics
+import threading
+from collections import deque
+from fastapi import APIRouter, HTTPException, Request
+from starlette.responses import Response
+import mediapipe_assets
+from page_cache import page_cache
+
+SERVICE_WORKER_URL = "/pose_tracker/sw.js"
+STARTUP_METRICS_URL = "/pose_tracker/startup"
+# Startup reports kept per page and cache state for /health percentiles
+STARTUP_METRICS_WINDOW = int(os.getenv("STARTUP_METRICS_WINDOW", "500"))
+STARTUP_PAGES = ("tracking", "demo")
+STARTUP_CACHE_STATES = ("warm", "cold", "unsupported")
+
+# Runtime files installed up front: the scripts, the SIMD wasm build, packed assets and the
+# complexity-1 model every page starts with. Other models and the non-SIMD build are
+# cached the first time a session fetches them.
+PRECACHE_FILES = {
+    "camera_utils": ["camera_utils.js"],
+    "control_utils": ["control_utils.js"],
+    "drawing_utils": ["drawing_utils.js"],
+    "pose": [
+        "pose.js",
+        "pose_solution_packed_assets_loader.js",
+        "pose_solution_packed_assets.data",
+        "pose_solution_simd_wasm_bin.js",
+        "pose_solution_simd_wasm_bin.wasm",
+        "pose_web.binarypb",
+        "pose_landmark_full.tflite",
+    ],
+}
+CACHE_PREFIX = "pose-runtime-"
+
+# Router for the service worker script and the startup metric beacons
+service_worker_router = APIRouter()
+
+
+def precache_urls() -> list:
+    return [mediapipe_assets.asset_url(package, file) for package, files in PRECACHE_FILES.items() for file in files]
+
+
+def cache_name() -> str:
+    """Versioned Cache Storage name: changes whenever any precached URL does"""
+    digest = hashlib.sha256(json.dumps(precache_urls()).encode()).hexdigest()[:12]
+    return CACHE_PREFIX + digest
+
+
+def startup_script(page: str) -> str:
+    """
+    Inline <script> for the pages: registers the service worker and records
+    time-to-first-pose, split by whether the runtime was already in the precache.
+    Call reportPoseStartup(post) from the first pose result.
+    """
+    return f"""<script>
+            // Time to first pose result since navigation start, cold or warm
+            const POSE_STARTUP = {{
+                page: '{page}',
+                cache: '{cache_name()}',
+                urls: {json.dumps(precache_urls())},
+                reported: false,
+            }};
+            POSE_STARTUP.state = (async () => {{
+                if (!('serviceWorker' in navigator) || !window.caches) return 'unsupported';
+                navigator.serviceWorker.register('{SERVICE_WORKER_URL}', {{ scope: '/' }})
+                    .catch((error) => console.warn('Service worker registration failed:', error));
+                // Warm only when the worker already controls this page and holds every precached file
+                if (!navigator.serviceWorker.controller) return 'cold';
+                const cache = await caches.open(POSE_STARTUP.cache);
+                const hits = await Promise.all(POSE_STARTUP.urls.map((url) => cache.match(url)));
+                return hits.every(Boolean) ? 'warm' : 'cold';
+            }})().catch(() => 'cold');
+
+            function reportPoseStartup(post) {{
+                if (POSE_STARTUP.reported) return;
+                POSE_STARTUP.reported = true;
+                const elapsed = Math.round(performance.now());
+                POSE_STARTUP.state.then((cache) => {{
+                    const metric = {{ page: POSE_STARTUP.page, cache, time_to_first_pose_ms: elapsed }};
+                    console.log(`Startup (${{cache}}): first pose after ${{elapsed}} ms`);
+                    post({{ type: 'startup', ...metric }});
+                    if (navigator.sendBeacon) {{
+                        navigator.sendBeacon('{STARTUP_METRICS_URL}', JSON.stringify(metric));
+                    }}
+                }});
+            }}
+        </script>"""
+
+
+def render_service_worker() -> str:
+    runtime_prefixes = [mediapipe_assets.MEDIAPIPE_ASSETS_URL + "/", mediapipe_assets.MEDIAPIPE_CDN + "/"]
+    return f"""// Precaches the versioned MediaPipe pose runtime so WebView sessions start from Cache Storage
+const CACHE = '{cache_name()}';
+const PRECACHE = {json.dumps(precache_urls())};
+// Vendored files are content hashed and CDN files pinned, so cached copies never go stale
+const RUNTIME_PREFIXES = {json.dumps(runtime_prefixes)}.map((prefix) => new URL(prefix, self.location.origin).href);
+
+self.addEventListener('install', (event) => {{
+    // One missing file must not keep the rest out of the cache
+    event.waitUntil(
+        caches.open(CACHE)
+            .then((cache) => Promise.allSettled(PRECACHE.map((url) => cache.add(new Request(url, {{ mode: 'cors' }})))))
+            .then(() => self.skipWaiting())
+    );
+}});
+
+self.addEventListener('activate', (event) => {{
+    event.waitUntil(
+        caches.keys()
+            .then((keys) => Promise.all(
+                keys.filter((key) => key.startsWith('{CACHE_PREFIX}') && key !== CACHE).map((key) => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+}});
+
+self.addEventListener('fetch', (event) => {{
+    const request = event.request;
+    if (request.method !== 'GET' || !RUNTIME_PREFIXES.some((prefix) => request.url.startsWith(prefix))) {{
+        return;
+    }}
+    event.respondWith(caches.open(CACHE).then(async (cache) => {{
+        const cached = await cache.match(request.url);
+        if (cached) return cached;
+        const response = await fetch(request);
+        if (response.ok) {{
+            cache.put(request.url, response.clone());
+        }}
+        return response;
+    }}));
+}});
+"""
+
+
+class StartupMetrics:
+    """Rolling time-to-first-pose reports per page and cache state"""
+    def __init__(self, window: int = STARTUP_METRICS_WINDOW):
+        self.window = window
+        self._reports = {}
+        self._lock = threading.Lock()
+
+    def record(self, page: str, cache: str, milliseconds: float):
+        with self._lock:
+            self._reports.setdefault((page, cache), deque(maxlen=self.window)).append(milliseconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            reports = {key: list(values) for key, values in self._reports.items()}
+        summary = {}
+        for (page, cache), values in sorted(reports.items()):
+            p90 = statistics.quantiles(values, n=10, method="inclusive")[8] if len(values) > 1 else values[0]
+            summary[f"{page}/{cache}"] = {
+                "count": len(values),
+                "p50_ms": round(statistics.median(values)),
+                "p90_ms": round(p90),
+            }
+        return summary
+
+
+startup_metrics = StartupMetrics()
+
+
+@service_worker_router.get(SERVICE_WORKER_URL)
+async def service_worker(request: Request):
+    """Service worker precaching the pose runtime; allowed to control the whole origin"""
+    return await page_cache.response(
+        request, ("service_worker",), render_service_worker,
+        media_type="text/javascript", headers={"service-worker-allowed": "/"},
+    )
+
+
+@service_worker_router.post(STARTUP_METRICS_URL)
+async def startup_metric(request: Request):
+    """Startup beacon from a tracking or demo page (sendBeacon posts it as text/plain)"""
+    try:
+        report = json.loads(await request.body())
+        page, cache = report["page"], report["cache"]
+        milliseconds = float(report["time_to_first_pose_ms"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Expected page, cache and time_to_first_pose_ms")
+    if page not in STARTUP_PAGES or cache not in STARTUP_CACHE_STATES or not 0 <= milliseconds < 600000:
+        raise HTTPException(status_code=400, detail="Invalid startup report")
+    startup_metrics.record(page, cache, milliseconds)
+    print(f"🚀 {page} startup ({cache}): first pose after {milliseconds:.0f} ms")
+    return Response(status_code=204)
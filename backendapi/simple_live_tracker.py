@@ -1,21 +1,52 @@
-from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
 import json
 from typing import Optional
+import mediapipe_assets
+import service_worker
+from page_cache import page_cache
+from rep_counting import exercise_name
+# Rep counting on client-side landmarks only needs numpy, so it works without MediaPipe
+from landmark_ingest import LandmarkIngestSession
+
+# Server-side inference needs MediaPipe on the server; the tracking page works without it
+try:
+    from live_inference import LiveInferenceSession, acquire_pose, release_pose
+except ImportError as e:
+    print(f"⚠️  Server-side live inference not available: {e}")
+    LiveInferenceSession = None
 
 # Router for high-performance pose tracking
 pose_tracking_router = APIRouter()
 
+# Where the tracking page runs MediaPipe: "worker" moves inference and skeleton drawing into
+# a dedicated Web Worker, "main" keeps the main-thread path, "auto" tries the worker first
+INFERENCE_MODES = ("auto", "worker", "main")
+
 @pose_tracking_router.get("/pose_tracker/tracking")
 async def tracking_page(
     request: Request,
     token: str = None,
     width: Optional[float] = None,
     height: Optional[float] = None,
-    skeleton: bool = True
+    skeleton: bool = True,
+    exercise: str = "squats",
+    inference: str = "auto"
 ):
     """High-performance pose tracking with client-side processing"""
-    
+    try:
+        exercise = exercise_name(exercise)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if inference not in INFERENCE_MODES:
+        raise HTTPException(status_code=400, detail=f"inference must be one of {list(INFERENCE_MODES)}")
+    # These are the only inputs of the page, so each combination is rendered once
+    return await page_cache.response(
+        request, ("tracking", skeleton, exercise, inference),
+        lambda: render_tracking_page(skeleton, exercise, inference)
+    )
+
+def render_tracking_page(skeleton: bool, exercise: str, inference: str = "auto") -> str:
+    """Tracking page HTML for one skeleton/exercise/inference-mode combination"""
     html_content = f"""
     <!DOCTYPE html>
     <html>
@@ -459,17 +490,350 @@ async def tracking_page(
             </div>
         </div>
 
-        <!-- MediaPipe CDN -->
-        <script src="https://cdn.jsdelivr.net/npm/@mediapipe/camera_utils/camera_utils.js" crossorigin="anonymous"></script>
-        <script src="https://cdn.jsdelivr.net/npm/@mediapipe/control_utils/control_utils.js" crossorigin="anonymous"></script>
-        <script src="https://cdn.jsdelivr.net/npm/@mediapipe/drawing_utils/drawing_utils.js" crossorigin="anonymous"></script>
-        <script src="https://cdn.jsdelivr.net/npm/@mediapipe/pose/pose.js" crossorigin="anonymous"></script>
+        <!-- Service worker precaching of the pose runtime, and the cold/warm startup metric -->
+        {service_worker.startup_script("tracking")}
+        <!-- MediaPipe runtime: self-hosted when vendored, pinned CDN otherwise -->
+        {mediapipe_assets.script_tags("camera_utils", "control_utils", "drawing_utils", "pose")}
+        <script>
+            // Pose fetches its wasm, packed assets and models through locateFile
+            const MEDIAPIPE_POSE_FILES = {json.dumps(mediapipe_assets.pose_files())};
+            const MEDIAPIPE_POSE_CDN = '{mediapipe_assets.pose_cdn_base()}';
+            const MEDIAPIPE_POSE_SCRIPT = '{mediapipe_assets.asset_url("pose", "pose.js")}';
+        </script>
         
         <script>
+            // Packed landmarks: 33 x (x, y, z, visibility) float32, the same layout as the
+            // rep-counting packets, plus the ROI (x, y, width, height) of the smoothing worker
+            const LANDMARK_VALUES = 33 * 4;
+            const ROI_OFFSET = LANDMARK_VALUES;
+            const PACKET_VALUES = LANDMARK_VALUES + 4;
+            
+            function packLandmarks(landmarks, packet) {{
+                for (let i = 0; i < 33; i++) {{
+                    const landmark = landmarks[i];
+                    packet[i * 4] = landmark ? landmark.x : NaN;
+                    packet[i * 4 + 1] = landmark ? landmark.y : NaN;
+                    packet[i * 4 + 2] = landmark ? landmark.z ?? 0 : 0;
+                    packet[i * 4 + 3] = landmark ? landmark.visibility ?? 0 : 0;
+                }}
+            }}
+            
+            function unpackLandmarks(packet, landmarks) {{
+                // Fills reused landmark objects in place instead of building new ones
+                for (let i = 0; i < 33; i++) {{
+                    const landmark = landmarks[i];
+                    landmark.x = packet[i * 4];
+                    landmark.y = packet[i * 4 + 1];
+                    landmark.z = packet[i * 4 + 2];
+                    landmark.visibility = packet[i * 4 + 3];
+                }}
+                return landmarks;
+            }}
+            
+            // Weighted moving average of the last frames, newest weighted most, over a ring
+            // buffer of packed frames: no per-frame allocation and no array shifting.
+            // Shared by the smoothing worker (via toString) and the main-thread fallback.
+            class LandmarkSmoother {{
+                constructor() {{
+                    const weights = [0.1, 0.15, 0.2, 0.25, 0.3];
+                    this.maxHistory = weights.length;
+                    this.history = new Float32Array(this.maxHistory * LANDMARK_VALUES);
+                    this.head = 0;
+                    this.count = 0;
+                    // Normalized weights, oldest first, for each history length
+                    this.weights = weights.map((_, i) => {{
+                        const active = weights.slice(-(i + 1));
+                        const sum = active.reduce((a, b) => a + b, 0);
+                        return Float32Array.from(active, (weight) => weight / sum);
+                    }});
+                }}
+                
+                reset() {{
+                    this.head = 0;
+                    this.count = 0;
+                }}
+                
+                smooth(packet) {{
+                    // Adds the frame to the history and overwrites it with the smoothed frame
+                    this.history.set(packet.subarray(0, LANDMARK_VALUES), this.head * LANDMARK_VALUES);
+                    this.head = (this.head + 1) % this.maxHistory;
+                    this.count = Math.min(this.count + 1, this.maxHistory);
+                    if (this.count < 2) return packet;
+                    
+                    const weights = this.weights[this.count - 1];
+                    const oldest = (this.head - this.count + this.maxHistory) % this.maxHistory;
+                    for (let i = 0; i < LANDMARK_VALUES; i++) {{
+                        let value = 0;
+                        for (let j = 0; j < this.count; j++) {{
+                            value += this.history[((oldest + j) % this.maxHistory) * LANDMARK_VALUES + i] * weights[j];
+                        }}
+                        packet[i] = value;
+                    }}
+                    return packet;
+                }}
+            }}
+            
+            function landmarkROI(packet) {{
+                // Bounding box of the visible landmarks into the packet's ROI slots, NaN if too few
+                let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity, visible = 0;
+                for (let i = 0; i < 33; i++) {{
+                    if (packet[i * 4 + 3] > 0.5) {{
+                        const x = packet[i * 4], y = packet[i * 4 + 1];
+                        minX = Math.min(minX, x);
+                        minY = Math.min(minY, y);
+                        maxX = Math.max(maxX, x);
+                        maxY = Math.max(maxY, y);
+                        visible++;
+                    }}
+                }}
+                if (visible < 4) {{
+                    packet.fill(NaN, ROI_OFFSET, ROI_OFFSET + 4);
+                    return;
+                }}
+                packet[ROI_OFFSET] = minX;
+                packet[ROI_OFFSET + 1] = minY;
+                packet[ROI_OFFSET + 2] = maxX - minX;
+                packet[ROI_OFFSET + 3] = maxY - minY;
+            }}
+            
+            // Closed-loop quality control. Keeps the average processing time of a frame inside
+            // its budget by stepping along a ladder of quality levels (0 = heaviest). It steps
+            // down quickly when over budget and up slowly when well under it. A level that had
+            // to be left again soon after stepping up to it is blocked for a growing backoff,
+            // so weak devices settle on a level instead of oscillating.
+            class FrameBudgetController {{
+                constructor(levels, level, targetFPS) {{
+                    this.levels = levels;
+                    this.frameBudgetMs = 1000 / targetFPS;
+                    this.overBudget = 1.0;      // load above this counts towards a lighter level
+                    this.underBudget = 0.6;     // load below this counts towards a heavier level
+                    this.stepDownAfter = 2;     // consecutive over-budget intervals before stepping down
+                    this.stepUpAfter = 5;       // consecutive under-budget intervals before stepping up
+                    this.intervalMs = 1000;
+                    this.minSamples = 5;
+                    this.warmupSamples = 5;     // frames ignored after a change (model reload, new input size)
+                    this.failedUpgradeMs = 10000;
+                    this.backoffMs = 30000;
+                    this.maxBackoffMs = 300000;
+                    this.blockedUntil = new Float64Array(levels);
+                    this.backoff = new Float64Array(levels).fill(this.backoffMs);
+                    this.reset(level, performance.now());
+                }}
+                
+                reset(level, now) {{
+                    this.level = level;
+                    this.over = 0;
+                    this.under = 0;
+                    this.sum = 0;
+                    this.count = 0;
+                    this.warmup = this.warmupSamples;
+                    this.intervalStart = now;
+                    this.upgradedAt = null;
+                }}
+                
+                observe(processTime) {{
+                    if (this.warmup > 0) {{
+                        this.warmup--;
+                        return;
+                    }}
+                    this.sum += processTime;
+                    this.count++;
+                }}
+                
+                evaluate(now, skipFrames) {{
+                    // Once per interval: a {{ from, to, reason, averageMs, budgetMs, load }} decision or null
+                    if (now - this.intervalStart < this.intervalMs || this.count < this.minSamples) return null;
+                    const averageMs = this.sum / this.count;
+                    // Skipped frames leave their share of the budget to the processed ones
+                    const budgetMs = this.frameBudgetMs * (skipFrames + 1);
+                    const load = averageMs / budgetMs;
+                    this.sum = 0;
+                    this.count = 0;
+                    this.intervalStart = now;
+                    
+                    if (load > this.overBudget) {{
+                        this.over++;
+                        this.under = 0;
+                    }} else if (load < this.underBudget) {{
+                        this.under++;
+                        this.over = 0;
+                    }} else {{
+                        this.over = 0;
+                        this.under = 0;
+                    }}
+                    const stats = {{ averageMs, budgetMs, load }};
+                    
+                    if (this.over >= this.stepDownAfter && this.level < this.levels - 1) {{
+                        if (this.upgradedAt !== null && now - this.upgradedAt < this.failedUpgradeMs) {{
+                            // The heavier level could not hold the budget: stay away from it for a while
+                            this.blockedUntil[this.level] = now + this.backoff[this.level];
+                            this.backoff[this.level] = Math.min(this.backoff[this.level] * 2, this.maxBackoffMs);
+                        }}
+                        return this.step(this.level + 1, now, 'over budget', stats, false);
+                    }}
+                    if (this.under >= this.stepUpAfter && this.level > 0 && now >= this.blockedUntil[this.level - 1]) {{
+                        return this.step(this.level - 1, now, 'under budget', stats, true);
+                    }}
+                    return null;
+                }}
+                
+                step(level, now, reason, stats, upgrade) {{
+                    const from = this.level;
+                    this.reset(level, now);
+                    this.upgradedAt = upgrade ? now : null;
+                    return {{ from, to: level, reason, ...stats }};
+                }}
+            }}
+            
+            // Skeleton renderer shared by the main thread and the inference worker (which gets
+            // its source via toString), so both modes draw exactly the same overlay.
+            // Returns how many connections and landmarks were drawn.
+            function drawSkeleton(ctx, landmarks, rect, connections, width, height) {{
+                // Normalized landmark to canvas coordinates inside the letterboxed video area
+                const transformed = landmarks.map(landmark => ({{
+                    x: rect.x + landmark.x * rect.width,
+                    y: rect.y + landmark.y * rect.height
+                }}));
+                const inside = (point) => point.x >= 0 && point.y >= 0 && point.x <= width && point.y <= height;
+                
+                // Draw connections first
+                ctx.strokeStyle = 'rgb(255, 76, 72, 1)';
+                ctx.lineWidth = 5;
+                ctx.lineCap = 'round';
+                ctx.shadowColor = 'rgba(255, 76, 72, 0.1)';
+                ctx.shadowBlur = 5;
+                
+                let drawnConnections = 0;
+                connections.forEach(([startIdx, endIdx]) => {{
+                    const start = transformed[startIdx];
+                    const end = transformed[endIdx];
+                    if (!start || !end) return;
+                    const startVis = landmarks[startIdx].visibility || 1;
+                    const endVis = landmarks[endIdx].visibility || 1;
+                    
+                    // Only draw visible joints with valid coordinates
+                    if (startVis > 0.3 && endVis > 0.3 && inside(start) && inside(end)) {{
+                        ctx.beginPath();
+                        ctx.moveTo(start.x, start.y);
+                        ctx.lineTo(end.x, end.y);
+                        ctx.stroke();
+                        drawnConnections++;
+                    }}
+                }});
+                
+                // Reset shadow for landmarks
+                ctx.shadowBlur = 0;
+                
+                // Draw landmarks as circles
+                let drawnLandmarks = 0;
+                transformed.forEach((point, idx) => {{
+                    const visibility = landmarks[idx].visibility || 1;
+                    if (visibility <= 0.3 || !inside(point)) return;
+                    
+                    // Different colors for different body parts
+                    if (idx < 11) {{
+                        ctx.fillStyle = '#ff4c48'; // Face - accent red
+                    }} else if (idx < 23) {{
+                        ctx.fillStyle = '#4ECDC4'; // Arms - teal
+                    }} else {{
+                        ctx.fillStyle = '#45B7D1'; // Legs - blue
+                    }}
+                    
+                    ctx.beginPath();
+                    ctx.arc(point.x, point.y, idx < 11 ? 4 : 6, 0, Math.PI * 2);
+                    ctx.fill();
+                    
+                    // Add a white border with glow
+                    ctx.strokeStyle = 'rgba(255, 255, 255, 0.8)';
+                    ctx.lineWidth = 2;
+                    ctx.shadowColor = ctx.fillStyle;
+                    ctx.shadowBlur = 8;
+                    ctx.stroke();
+                    ctx.shadowBlur = 0;
+                    
+                    drawnLandmarks++;
+                }});
+                
+                return {{ connections: drawnConnections, landmarks: drawnLandmarks }};
+            }}
+            
+            // Dedicated inference worker: runs MediaPipe Pose on transferred ImageBitmap frames
+            // and draws the skeleton on the overlay canvas handed over as an OffscreenCanvas
+            function inferenceWorkerSource() {{
+                return `
+                    ${{drawSkeleton.toString()}}
+                    
+                    let pose = null;
+                    let canvas = null;
+                    let ctx = null;
+                    let connections = [];
+                    let current = null;
+                    
+                    async function initialize(message) {{
+                        importScripts(message.poseScript);
+                        connections = message.connections;
+                        pose = new Pose({{
+                            locateFile: (file) => message.files[file] || message.cdn + '/' + file
+                        }});
+                        pose.setOptions(message.options);
+                        pose.onResults((results) => {{
+                            self.postMessage({{
+                                type: 'results',
+                                id: current.id,
+                                landmarks: results.poseLandmarks || null,
+                                inferenceMs: performance.now() - current.start
+                            }});
+                        }});
+                        // Loads the wasm and model, so a failure shows up here and not on the first frame
+                        await pose.initialize();
+                    }}
+                    
+                    async function infer(message) {{
+                        current = {{ id: message.id, start: performance.now() }};
+                        try {{
+                            await pose.send({{ image: message.bitmap }});
+                        }} catch (error) {{
+                            self.postMessage({{ type: 'results', id: message.id, landmarks: null, error: String(error) }});
+                        }} finally {{
+                            message.bitmap.close();
+                        }}
+                    }}
+                    
+                    self.onmessage = async (e) => {{
+                        const message = e.data;
+                        if (message.type === 'init') {{
+                            try {{
+                                await initialize(message);
+                                self.postMessage({{ type: 'ready' }});
+                            }} catch (error) {{
+                                self.postMessage({{ type: 'error', message: String(error && error.message || error) }});
+                            }}
+                        }} else if (message.type === 'frame') {{
+                            await infer(message);
+                        }} else if (message.type === 'options') {{
+                            // May arrive before init has created the graph
+                            if (pose) pose.setOptions(message.options);
+                        }} else if (message.type === 'canvas') {{
+                            canvas = message.canvas;
+                            ctx = canvas.getContext('2d');
+                        }} else if (message.type === 'resize' && canvas) {{
+                            canvas.width = message.width;
+                            canvas.height = message.height;
+                        }} else if (message.type === 'draw' && ctx) {{
+                            ctx.clearRect(0, 0, canvas.width, canvas.height);
+                            drawSkeleton(ctx, message.landmarks, message.rect, connections, canvas.width, canvas.height);
+                        }} else if (message.type === 'clear' && ctx) {{
+                            ctx.clearRect(0, 0, canvas.width, canvas.height);
+                        }}
+                    }};
+                `;
+            }}
+            
             // High-Performance Pose Tracking System
             class HighPerformancePoseTracker {{
                 constructor() {{
                     this.showSkeleton = {str(skeleton).lower()};
+                    this.exercise = '{exercise}';
                     this.initializeElements();
                     this.initializeSettings();
                     this.initializePerformanceMonitoring();
@@ -518,25 +882,51 @@ async def tracking_page(
                         useROI: false,
                         targetFPS: 30,
                         skipFrames: 0,
-                        adaptiveQuality: true
+                        adaptiveQuality: true,
+                        inferenceMode: '{inference}' // auto, worker, main
                     }};
                     
+                    // Worker inference: one frame in flight, resolved by its results message
+                    this.inferenceWorker = null;
+                    this.pendingInference = null;
+                    this.frameId = 0;
+                    this.inferenceWorkerTimeout = 15000;
+                    // A frame without results after this long means the worker hung; inference moves to the main thread
+                    this.inferenceFrameTimeout = 5000;
+                    
                     // Initialize button states
                     this.smoothBtn.textContent = '✨ Smooth ✓';
                     this.toggleSkeletonBtn.textContent = 'Skeleton ✓';
                     
-                    // Processing modes based on device capability
-                    this.modes = {{
-                        'high': {{ resolution: {{ width: 640, height: 480 }}, skipFrames: 0, modelComplexity: 2 }},
-                        'medium': {{ resolution: {{ width: 480, height: 360 }}, skipFrames: 1, modelComplexity: 1 }},
-                        'low': {{ resolution: {{ width: 320, height: 240 }}, skipFrames: 2, modelComplexity: 0 }}
-                    }};
+                    // Quality ladder, heaviest first. The frame-budget controller moves along it one
+                    // step at a time; high/medium/low are the presets of the quality button
+                    this.qualityLevels = [
+                        {{ name: 'high', resolution: {{ width: 640, height: 480 }}, skipFrames: 0, modelComplexity: 2 }},
+                        {{ name: 'high-', resolution: {{ width: 640, height: 480 }}, skipFrames: 0, modelComplexity: 1 }},
+                        {{ name: 'medium+', resolution: {{ width: 480, height: 360 }}, skipFrames: 0, modelComplexity: 1 }},
+                        {{ name: 'medium', resolution: {{ width: 480, height: 360 }}, skipFrames: 1, modelComplexity: 1 }},
+                        {{ name: 'medium-', resolution: {{ width: 320, height: 240 }}, skipFrames: 1, modelComplexity: 1 }},
+                        {{ name: 'low+', resolution: {{ width: 320, height: 240 }}, skipFrames: 1, modelComplexity: 0 }},
+                        {{ name: 'low', resolution: {{ width: 320, height: 240 }}, skipFrames: 2, modelComplexity: 0 }}
+                    ];
+                    this.presetLevels = {{ 'high': 0, 'medium': 3, 'low': 6 }};
                     
                     this.currentMode = 'medium';
-                    
-                    // Landmark smoothing
-                    this.landmarkHistory = [];
-                    this.maxHistory = 5;
+                    this.qualityLevel = this.presetLevels[this.currentMode];
+                    this.budgetController = null;
+                    // Recent controller decisions, newest last
+                    this.qualityDecisions = [];
+                    
+                    // Landmark smoothing: packed buffers travel to the worker and back (transferred,
+                    // not copied) and results land in reused landmark objects
+                    this.smoother = new LandmarkSmoother();
+                    this.mainPacket = new Float32Array(PACKET_VALUES);
+                    this.packetPool = [];
+                    this.packetsInFlight = 0;
+                    this.maxPacketsInFlight = 2;
+                    this.smoothedLandmarks = Array.from({{ length: 33 }}, () => ({{ x: 0, y: 0, z: 0, visibility: 0 }}));
+                    this.smoothedReady = false;
+                    this.roiBox = {{ x: 0, y: 0, width: 0, height: 0 }};
                     
                     // ROI tracking
                     this.roi = null;
@@ -556,71 +946,41 @@ async def tracking_page(
                         lastFrameTime: 0,
                         frameSkipCounter: 0
                     }};
+                    
+                    // Per-frame inference numbers, comparable between worker and main-thread modes:
+                    // latency is capture to landmarks, mainThread the main-thread time spent on it
+                    this.inferenceStats = {{
+                        mode: 'main',
+                        results: 0,
+                        fps: 0,
+                        latencies: [],
+                        mainThreadTimes: []
+                    }};
                 }}
                 
                 async initializeWorkers() {{
                     // Initialize Web Worker for background processing
                     try {{
                         this.worker = new Worker(URL.createObjectURL(new Blob([`
-                            // Web Worker for background pose processing
-                            let landmarkHistory = [];
-                            const maxHistory = 5;
+                            // Web Worker for background pose processing on packed landmark buffers
+                            const LANDMARK_VALUES = ${{LANDMARK_VALUES}};
+                            const ROI_OFFSET = ${{ROI_OFFSET}};
+                            ${{LandmarkSmoother.toString()}}
+                            ${{landmarkROI.toString()}}
                             
-                            function smoothLandmarks(landmarks) {{
-                                landmarkHistory.push(landmarks);
-                                if (landmarkHistory.length > maxHistory) {{
-                                    landmarkHistory.shift();
-                                }}
-                                
-                                if (landmarkHistory.length < 2) return landmarks;
-                                
-                                const smoothed = [];
-                                const weights = [0.1, 0.15, 0.2, 0.25, 0.3];
-                                const activeWeights = weights.slice(-landmarkHistory.length);
-                                const weightSum = activeWeights.reduce((a, b) => a + b, 0);
-                                
-                                for (let i = 0; i < landmarks.length; i++) {{
-                                    let x = 0, y = 0, z = 0, visibility = 0;
-                                    
-                                    for (let j = 0; j < landmarkHistory.length; j++) {{
-                                        const weight = activeWeights[j] / weightSum;
-                                        const landmark = landmarkHistory[j][i];
-                                        x += landmark.x * weight;
-                                        y += landmark.y * weight;
-                                        z += landmark.z * weight;
-                                        visibility += landmark.visibility * weight;
-                                    }}
-                                    
-                                    smoothed.push({{ x, y, z, visibility }});
-                                }}
-                                
-                                return smoothed;
-                            }}
-                            
-                            function calculateROI(landmarks) {{
-                                const visibleLandmarks = landmarks.filter(l => l.visibility > 0.5);
-                                if (visibleLandmarks.length < 4) return null;
-                                
-                                const xs = visibleLandmarks.map(l => l.x);
-                                const ys = visibleLandmarks.map(l => l.y);
-                                
-                                return {{
-                                    x: Math.min(...xs),
-                                    y: Math.min(...ys),
-                                    width: Math.max(...xs) - Math.min(...xs),
-                                    height: Math.max(...ys) - Math.min(...ys)
-                                }};
-                            }}
+                            const smoother = new LandmarkSmoother();
                             
                             self.onmessage = function(e) {{
-                                const {{ type, data }} = e.data;
+                                const message = e.data;
                                 
-                                if (type === 'smoothLandmarks') {{
-                                    const smoothed = smoothLandmarks(data);
-                                    self.postMessage({{ type: 'smoothed', data: smoothed }});
-                                }} else if (type === 'calculateROI') {{
-                                    const roi = calculateROI(data);
-                                    self.postMessage({{ type: 'roi', data: roi }});
+                                if (message.type === 'landmarks') {{
+                                    // Smoothed and measured in place, then handed straight back
+                                    const packet = message.packet;
+                                    if (message.smooth) smoother.smooth(packet);
+                                    if (message.roi) landmarkROI(packet);
+                                    self.postMessage({{ type: 'landmarks', packet, smooth: message.smooth, roi: message.roi }}, [packet.buffer]);
+                                }} else if (message.type === 'reset') {{
+                                    smoother.reset();
                                 }}
                             }};
                         `], {{ type: 'application/javascript' }})));
@@ -633,13 +993,44 @@ async def tracking_page(
                 }}
                 
                 handleWorkerMessage(e) {{
-                    const {{ type, data }} = e.data;
-                    
-                    if (type === 'smoothed') {{
-                        this.lastSmoothedLandmarks = data;
-                    }} else if (type === 'roi') {{
-                        this.roi = data;
+                    const message = e.data;
+                    if (message.type !== 'landmarks') return;
+                    
+                    const packet = message.packet;
+                    this.packetsInFlight--;
+                    if (message.smooth && this.settings.useSmoothing) {{
+                        unpackLandmarks(packet, this.smoothedLandmarks);
+                        this.smoothedReady = true;
+                    }}
+                    if (message.roi && this.settings.useROI) {{
+                        if (Number.isNaN(packet[ROI_OFFSET])) {{
+                            this.roi = null;
+                        }} else {{
+                            this.roiBox.x = packet[ROI_OFFSET];
+                            this.roiBox.y = packet[ROI_OFFSET + 1];
+                            this.roiBox.width = packet[ROI_OFFSET + 2];
+                            this.roiBox.height = packet[ROI_OFFSET + 3];
+                            this.roi = this.roiBox;
+                        }}
+                    }}
+                    this.packetPool.push(packet);
+                }}
+                
+                postLandmarksToWorker(landmarks) {{
+                    // Buffers are recycled; a busy worker makes this frame skip the worker
+                    let packet = this.packetPool.pop();
+                    if (!packet) {{
+                        if (this.packetsInFlight >= this.maxPacketsInFlight) return;
+                        packet = new Float32Array(PACKET_VALUES);
                     }}
+                    packLandmarks(landmarks, packet);
+                    this.packetsInFlight++;
+                    this.worker.postMessage({{
+                        type: 'landmarks',
+                        packet,
+                        smooth: this.settings.useSmoothing,
+                        roi: this.settings.useROI
+                    }}, [packet.buffer]);
                 }}
                 
                 setupEventListeners() {{
@@ -672,6 +1063,7 @@ async def tracking_page(
                         this.hideLoading();
                         this.updateStatus('High-performance pose tracking active');
                         this.startProcessing();
+                        this.connectRepCounter();
                     }} catch (error) {{
                         console.error('Initialization error:', error);
                         this.updateStatus(`Error: ${{error.message}}`);
@@ -688,36 +1080,154 @@ async def tracking_page(
                             return;
                         }}
                         
-                        // Initialize MediaPipe Pose
-                        this.pose = new Pose({{
-                            locateFile: (file) => {{
-                                return `https://cdn.jsdelivr.net/npm/@mediapipe/pose/${{file}}`;
-                            }}
-                        }});
-                        
-                        this.pose.setOptions({{
-                            modelComplexity: this.modes[this.currentMode].modelComplexity,
-                            smoothLandmarks: true,
-                            enableSegmentation: false,
-                            smoothSegmentation: false,
-                            minDetectionConfidence: 0.5,
-                            minTrackingConfidence: 0.5
-                        }});
-                        
-                        this.pose.onResults((results) => this.onPoseResults(results));
-                        
-                        // Set up pose connections for drawing
                         this.connections = POSE_CONNECTIONS || this.getDefaultConnections();
-                        this.modeDisplay.textContent = 'MediaPipe';
-                        
-                        console.log('MediaPipe initialized successfully');
+                        if (this.settings.inferenceMode !== 'main' && await this.initializeInferenceWorker()) {{
+                            this.modeDisplay.textContent = 'MediaPipe (Worker)';
+                            console.log('MediaPipe initialized in inference worker');
+                            return;
+                        }}
                         
+                        this.initializeMainThreadPose();
                     }} catch (error) {{
                         console.error('MediaPipe initialization failed:', error);
                         await this.initializeFallback();
                     }}
                 }}
                 
+                initializeMainThreadPose() {{
+                    // Initialize MediaPipe Pose
+                    this.pose = new Pose({{
+                        locateFile: (file) => {{
+                            return MEDIAPIPE_POSE_FILES[file] || `${{MEDIAPIPE_POSE_CDN}}/${{file}}`;
+                        }}
+                    }});
+                    
+                    this.pose.setOptions(this.poseOptions());
+                    
+                    this.pose.onResults((results) => this.onPoseResults(results));
+                    this.modeDisplay.textContent = 'MediaPipe';
+                    
+                    console.log('MediaPipe initialized successfully');
+                }}
+                
+                supportsWorkerInference() {{
+                    return typeof Worker !== 'undefined' &&
+                        typeof OffscreenCanvas !== 'undefined' &&
+                        typeof createImageBitmap === 'function' &&
+                        'transferControlToOffscreen' in HTMLCanvasElement.prototype;
+                }}
+                
+                async initializeInferenceWorker() {{
+                    if (!this.supportsWorkerInference()) {{
+                        console.warn('Worker inference not supported, using main thread');
+                        return false;
+                    }}
+                    
+                    let worker;
+                    try {{
+                        worker = new Worker(URL.createObjectURL(new Blob([inferenceWorkerSource()], {{ type: 'application/javascript' }})));
+                        // Blob workers resolve nothing relative to the page, so send absolute URLs
+                        const absolute = (url) => new URL(url, window.location.href).href;
+                        const files = {{}};
+                        Object.entries(MEDIAPIPE_POSE_FILES).forEach(([file, url]) => {{ files[file] = absolute(url); }});
+                        
+                        await new Promise((resolve, reject) => {{
+                            const timer = setTimeout(() => reject(new Error('Inference worker timed out')), this.inferenceWorkerTimeout);
+                            worker.onmessage = (e) => {{
+                                if (e.data.type === 'ready') {{
+                                    clearTimeout(timer);
+                                    resolve();
+                                }} else if (e.data.type === 'error') {{
+                                    clearTimeout(timer);
+                                    reject(new Error(e.data.message));
+                                }}
+                            }};
+                            worker.onerror = (event) => {{
+                                clearTimeout(timer);
+                                reject(new Error(event.message || 'Inference worker failed'));
+                            }};
+                            worker.postMessage({{
+                                type: 'init',
+                                poseScript: absolute(MEDIAPIPE_POSE_SCRIPT),
+                                files,
+                                cdn: MEDIAPIPE_POSE_CDN,
+                                connections: this.connections,
+                                options: this.poseOptions()
+                            }});
+                        }});
+                    }} catch (error) {{
+                        console.warn('Inference worker unavailable, using main thread:', error.message);
+                        if (worker) worker.terminate();
+                        return false;
+                    }}
+                    
+                    // The 2D context already taken on the overlay rules out transferring it,
+                    // so a fresh canvas takes its place and is handed to the worker
+                    const overlay = this.canvas.cloneNode(false);
+                    this.canvas.replaceWith(overlay);
+                    this.canvas = overlay;
+                    this.ctx = null;
+                    const offscreen = overlay.transferControlToOffscreen();
+                    worker.postMessage({{ type: 'canvas', canvas: offscreen }}, [offscreen]);
+                    
+                    worker.onmessage = (e) => this.handleInferenceMessage(e);
+                    worker.onerror = (event) => this.abandonInferenceWorker(event.message || 'Inference worker failed');
+                    this.inferenceWorker = worker;
+                    this.inferenceStats.mode = 'worker';
+                    this.updateCanvasSize();
+                    return true;
+                }}
+                
+                abandonInferenceWorker(reason) {{
+                    // A crashed or hung worker never answers: settle the frame waiting on it and
+                    // carry on with main-thread inference, as if the worker had failed to start
+                    if (!this.inferenceWorker) return;
+                    console.error('Inference worker failed, using main thread:', reason);
+                    this.inferenceWorker.terminate();
+                    this.inferenceWorker = null;
+                    const pending = this.pendingInference;
+                    this.pendingInference = null;
+                    
+                    // The overlay was transferred to the worker and went with it; draw on a fresh one
+                    const overlay = this.canvas.cloneNode(false);
+                    this.canvas.replaceWith(overlay);
+                    this.canvas = overlay;
+                    this.ctx = overlay.getContext('2d');
+                    this.inferenceStats.mode = 'main';
+                    this.updateCanvasSize();
+                    try {{
+                        this.initializeMainThreadPose();
+                    }} catch (error) {{
+                        console.error('MediaPipe initialization failed:', error);
+                        this.initializeFallback();
+                    }}
+                    if (pending) pending.resolve({{ id: pending.id, landmarks: null }});
+                }}
+                
+                handleInferenceMessage(e) {{
+                    const message = e.data;
+                    if (message.type !== 'results' || !this.pendingInference || message.id !== this.pendingInference.id) {{
+                        return;
+                    }}
+                    if (message.error) {{
+                        console.error('Worker inference error:', message.error);
+                    }}
+                    const pending = this.pendingInference;
+                    this.pendingInference = null;
+                    pending.resolve(message);
+                }}
+                
+                poseOptions() {{
+                    return {{
+                        modelComplexity: this.activeMode().modelComplexity,
+                        smoothLandmarks: true,
+                        enableSegmentation: false,
+                        smoothSegmentation: false,
+                        minDetectionConfidence: 0.5,
+                        minTrackingConfidence: 0.5
+                    }};
+                }}
+                
                 async initializeFallback() {{
                     // Simple fallback pose detection without external libraries
                     this.modeDisplay.textContent = 'Fallback Mode';
@@ -843,11 +1353,15 @@ async def tracking_page(
                         }}
                     }}
                     
-                    this.updateModeDisplay();
+                    // The device guess is only the starting point; the controller corrects it at runtime
+                    this.budgetController = new FrameBudgetController(
+                        this.qualityLevels.length, this.presetLevels[this.currentMode], this.settings.targetFPS
+                    );
+                    this.setQualityLevel(this.presetLevels[this.currentMode]);
                 }}
                 
                 async startCamera() {{
-                    const mode = this.modes[this.currentMode];
+                    const mode = this.activeMode();
                     
                     const constraints = {{
                         video: {{
@@ -892,8 +1406,15 @@ async def tracking_page(
                 
                 updateCanvasSize() {{
                     const rect = this.container.getBoundingClientRect();
-                    this.canvas.width = rect.width;
-                    this.canvas.height = rect.height;
+                    if (this.inferenceWorker) {{
+                        // The overlay belongs to the worker now; its size is set there
+                        this.canvasWidth = rect.width;
+                        this.canvasHeight = rect.height;
+                        this.inferenceWorker.postMessage({{ type: 'resize', width: rect.width, height: rect.height }});
+                    }} else {{
+                        this.canvas.width = rect.width;
+                        this.canvas.height = rect.height;
+                    }}
                     
                     // Calculate video content area for coordinate transformation
                     this.calculateVideoContentRect();
@@ -945,19 +1466,6 @@ async def tracking_page(
                     console.log('Container dimensions:', containerRect.width, 'x', containerRect.height);
                 }}
                 
-                transformLandmarkCoordinates(landmark) {{
-                    if (!this.videoContentRect) {{
-                        this.calculateVideoContentRect();
-                    }}
-                    
-                    return {{
-                        x: this.videoContentRect.x + (landmark.x * this.videoContentRect.width),
-                        y: this.videoContentRect.y + (landmark.y * this.videoContentRect.height),
-                        z: landmark.z,
-                        visibility: landmark.visibility
-                    }};
-                }}
-                
                 startProcessing() {{
                     const processFrame = async () => {{
                         if (!this.video.videoWidth) {{
@@ -973,8 +1481,16 @@ async def tracking_page(
                             const startTime = performance.now();
                             
                             try {{
-                                await this.processCurrentFrame();
-                                this.updatePerformanceMetrics(performance.now() - startTime);
+                                const mainThreadTime = await this.processCurrentFrame();
+                                const processTime = performance.now() - startTime;
+                                this.updatePerformanceMetrics(processTime);
+                                // On the main thread pose.send occupies the thread for the whole frame
+                                this.recordInference(processTime, mainThreadTime ?? processTime);
+                                
+                                // Adaptive quality adjustment, also while nobody is in frame
+                                if (this.settings.adaptiveQuality) {{
+                                    this.adjustQualityBasedOnPerformance();
+                                }}
                             }} catch (error) {{
                                 console.error('Processing error:', error);
                             }} finally {{
@@ -990,7 +1506,7 @@ async def tracking_page(
                 }}
                 
                 shouldSkipFrame() {{
-                    const mode = this.modes[this.currentMode];
+                    const mode = this.activeMode();
                     this.performance.frameSkipCounter++;
                     
                     if (this.performance.frameSkipCounter <= mode.skipFrames) {{
@@ -1001,44 +1517,115 @@ async def tracking_page(
                     return false;
                 }}
                 
+                frameCrop() {{
+                    // Source rectangle of the video to process: the expanded ROI if enabled, else everything
+                    if (this.settings.useROI && this.roi) {{
+                        const roi = this.roi;
+                        const expandedROI = {{
+                            x: Math.max(0, roi.x - roi.width * (this.expandROI - 1) / 2),
+                            y: Math.max(0, roi.y - roi.height * (this.expandROI - 1) / 2),
+                            width: Math.min(1, roi.width * this.expandROI),
+                            height: Math.min(1, roi.height * this.expandROI)
+                        }};
+                        return {{
+                            x: expandedROI.x * this.video.videoWidth,
+                            y: expandedROI.y * this.video.videoHeight,
+                            width: expandedROI.width * this.video.videoWidth,
+                            height: expandedROI.height * this.video.videoHeight
+                        }};
+                    }}
+                    return {{ x: 0, y: 0, width: this.video.videoWidth, height: this.video.videoHeight }};
+                }}
+                
                 async processCurrentFrame() {{
+                    if (this.inferenceWorker) {{
+                        return this.processFrameInWorker();
+                    }}
                     if (!this.pose) return;
                     
                     // Create processing canvas
                     const processCanvas = document.createElement('canvas');
                     const processCtx = processCanvas.getContext('2d');
                     
-                    const mode = this.modes[this.currentMode];
+                    const mode = this.activeMode();
                     processCanvas.width = mode.resolution.width;
                     processCanvas.height = mode.resolution.height;
                     
-                    // Apply ROI if enabled
-                    if (this.settings.useROI && this.roi) {{
-                        const roi = this.roi;
-                        const expandedROI = {{
-                            x: Math.max(0, roi.x - roi.width * (this.expandROI - 1) / 2),
-                            y: Math.max(0, roi.y - roi.height * (this.expandROI - 1) / 2),
-                            width: Math.min(1, roi.width * this.expandROI),
-                            height: Math.min(1, roi.height * this.expandROI)
-                        }};
-                        
-                        processCtx.drawImage(
-                            this.video,
-                            expandedROI.x * this.video.videoWidth,
-                            expandedROI.y * this.video.videoHeight,
-                            expandedROI.width * this.video.videoWidth,
-                            expandedROI.height * this.video.videoHeight,
-                            0, 0, processCanvas.width, processCanvas.height
-                        );
-                    }} else {{
-                        processCtx.drawImage(this.video, 0, 0, processCanvas.width, processCanvas.height);
-                    }}
+                    const crop = this.frameCrop();
+                    processCtx.drawImage(
+                        this.video, crop.x, crop.y, crop.width, crop.height,
+                        0, 0, processCanvas.width, processCanvas.height
+                    );
                     
                     // Send to MediaPipe
                     await this.pose.send({{ image: processCanvas }});
                 }}
                 
+                async processFrameInWorker() {{
+                    // Returns the main-thread time spent; inference and drawing happen in the worker
+                    const mode = this.activeMode();
+                    const crop = this.frameCrop();
+                    let mainThreadTime = 0;
+                    let start = performance.now();
+                    // Scaled off the main thread by the browser, then transferred without a copy
+                    const capture = createImageBitmap(this.video, crop.x, crop.y, crop.width, crop.height, {{
+                        resizeWidth: mode.resolution.width,
+                        resizeHeight: mode.resolution.height
+                    }});
+                    mainThreadTime += performance.now() - start;
+                    const bitmap = await capture;
+                    if (!this.inferenceWorker) {{
+                        // The worker failed while the frame was captured
+                        bitmap.close();
+                        return mainThreadTime;
+                    }}
+                    
+                    start = performance.now();
+                    const id = ++this.frameId;
+                    const done = new Promise(resolve => {{ this.pendingInference = {{ id, resolve }}; }});
+                    const timer = setTimeout(() => {{
+                        if (this.pendingInference && this.pendingInference.id === id) {{
+                            this.abandonInferenceWorker(`No results for frame ${{id}} after ${{this.inferenceFrameTimeout}} ms`);
+                        }}
+                    }}, this.inferenceFrameTimeout);
+                    this.inferenceWorker.postMessage({{ type: 'frame', id, bitmap }}, [bitmap]);
+                    mainThreadTime += performance.now() - start;
+                    
+                    const message = await done;
+                    clearTimeout(timer);
+                    start = performance.now();
+                    this.onPoseResults({{ poseLandmarks: message.landmarks }});
+                    mainThreadTime += performance.now() - start;
+                    return mainThreadTime;
+                }}
+                
+                recordInference(latency, mainThreadTime) {{
+                    const stats = this.inferenceStats;
+                    stats.results++;
+                    stats.latencies.push(latency);
+                    stats.mainThreadTimes.push(mainThreadTime);
+                    if (stats.latencies.length > 60) {{
+                        stats.latencies.shift();
+                        stats.mainThreadTimes.shift();
+                    }}
+                }}
+                
+                getInferenceStats() {{
+                    const stats = this.inferenceStats;
+                    const mean = (values) => values.length ? values.reduce((a, b) => a + b, 0) / values.length : 0;
+                    const sorted = [...stats.latencies].sort((a, b) => a - b);
+                    return {{
+                        mode: stats.mode,
+                        requestedMode: this.settings.inferenceMode,
+                        fps: stats.fps,
+                        latencyMs: Math.round(mean(stats.latencies) * 10) / 10,
+                        p95LatencyMs: Math.round((sorted[Math.floor(sorted.length * 0.95)] || 0) * 10) / 10,
+                        mainThreadMs: Math.round(mean(stats.mainThreadTimes) * 10) / 10
+                    }};
+                }}
+                
                 onPoseResults(results) {{
+                    reportPoseStartup((message) => this.sendToReactNative(message));
                     let landmarks = null;
                     
                     // Handle different result formats
@@ -1049,9 +1636,10 @@ async def tracking_page(
                     }}
                     
                     if (!landmarks || landmarks.length === 0) {{
+                        this.sendLandmarks(null);
                         this.updateQualityIndicator(0, 'none');
                         if (this.showSkeleton) {{
-                            this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
+                            this.clearOverlay();
                         }}
                         return;
                     }}
@@ -1061,20 +1649,18 @@ async def tracking_page(
                     // Store landmarks for debugging
                     this.lastLandmarks = landmarks;
                     
-                    // Apply smoothing
-                    if (this.settings.useSmoothing) {{
-                        if (this.worker) {{
-                            this.worker.postMessage({{ type: 'smoothLandmarks', data: landmarks }});
-                            landmarks = this.lastSmoothedLandmarks || landmarks;
-                        }} else {{
-                            landmarks = this.applySmoothingMainThread(landmarks);
+                    // Smoothing and the ROI for the next frame; worker results arrive one frame later
+                    if (this.worker && (this.settings.useSmoothing || this.settings.useROI)) {{
+                        this.postLandmarksToWorker(landmarks);
+                        if (this.settings.useSmoothing && this.smoothedReady) {{
+                            landmarks = this.smoothedLandmarks;
                         }}
+                    }} else if (this.settings.useSmoothing) {{
+                        landmarks = this.applySmoothingMainThread(landmarks);
                     }}
                     
-                    // Calculate ROI for next frame
-                    if (this.settings.useROI && this.worker) {{
-                        this.worker.postMessage({{ type: 'calculateROI', data: landmarks }});
-                    }}
+                    // Rep counting happens server-side on these landmarks
+                    this.sendLandmarks(landmarks);
                     
                     // Calculate quality metrics
                     const confidence = this.calculateConfidence(landmarks);
@@ -1089,11 +1675,6 @@ async def tracking_page(
                     // Update UI
                     this.updateQualityIndicator(confidence, quality);
                     
-                    // Adaptive quality adjustment
-                    if (this.settings.adaptiveQuality) {{
-                        this.adjustQualityBasedOnPerformance();
-                    }}
-                    
                     // Send to React Native
                     this.sendToReactNative({{
                         type: 'pose_data',
@@ -1105,34 +1686,9 @@ async def tracking_page(
                 }}
                 
                 applySmoothingMainThread(landmarks) {{
-                    this.landmarkHistory.push(landmarks);
-                    if (this.landmarkHistory.length > this.maxHistory) {{
-                        this.landmarkHistory.shift();
-                    }}
-                    
-                    if (this.landmarkHistory.length < 2) return landmarks;
-                    
-                    const smoothed = [];
-                    const weights = [0.1, 0.15, 0.2, 0.25, 0.3];
-                    const activeWeights = weights.slice(-this.landmarkHistory.length);
-                    const weightSum = activeWeights.reduce((a, b) => a + b, 0);
-                    
-                    for (let i = 0; i < landmarks.length; i++) {{
-                        let x = 0, y = 0, z = 0, visibility = 0;
-                        
-                        for (let j = 0; j < this.landmarkHistory.length; j++) {{
-                            const weight = activeWeights[j] / weightSum;
-                            const landmark = this.landmarkHistory[j][i];
-                            x += landmark.x * weight;
-                            y += landmark.y * weight;
-                            z += landmark.z * weight;
-                            visibility += landmark.visibility * weight;
-                        }}
-                        
-                        smoothed.push({{ x, y, z, visibility }});
-                    }}
-                    
-                    return smoothed;
+                    packLandmarks(landmarks, this.mainPacket);
+                    this.smoother.smooth(this.mainPacket);
+                    return unpackLandmarks(this.mainPacket, this.smoothedLandmarks);
                 }}
                 
                 calculateConfidence(landmarks) {{
@@ -1147,111 +1703,42 @@ async def tracking_page(
                     return 'poor';
                 }}
                 
+                clearOverlay() {{
+                    if (this.inferenceWorker) {{
+                        this.inferenceWorker.postMessage({{ type: 'clear' }});
+                    }} else {{
+                        this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
+                    }}
+                }}
+                
                 drawPoseResults(landmarks) {{
+                    if (!landmarks || landmarks.length < 10) {{
+                        console.warn('Insufficient landmarks for drawing:', landmarks?.length || 0);
+                        this.clearOverlay();
+                        return;
+                    }}
+                    
+                    // Update video content rectangle for current frame
+                    this.calculateVideoContentRect();
+                    
+                    if (this.inferenceWorker) {{
+                        // Drawn by the worker on its OffscreenCanvas
+                        this.inferenceWorker.postMessage({{ type: 'draw', landmarks, rect: this.videoContentRect }});
+                        return;
+                    }}
+                    
                     try {{
                         console.log('Drawing pose with', landmarks.length, 'landmarks, canvas size:', this.canvas.width, 'x', this.canvas.height);
                         
                         // Clear canvas
                         this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
                         
-                        if (!landmarks || landmarks.length < 10) {{
-                            console.warn('Insufficient landmarks for drawing:', landmarks?.length || 0);
-                            return;
-                        }}
-                        
-                        // Update video content rectangle for current frame
-                        this.calculateVideoContentRect();
-                        
-                        // Transform all landmarks to screen coordinates
-                        const transformedLandmarks = landmarks.map(landmark => this.transformLandmarkCoordinates(landmark));
-                        
-                        // Draw connections first
-                        this.ctx.strokeStyle = 'rgb(255, 76, 72, 1)';
-                        this.ctx.lineWidth = 5;
-                        this.ctx.lineCap = 'round';
-                        this.ctx.shadowColor = 'rgba(255, 76, 72, 0.1)';
-                        this.ctx.shadowBlur = 5;
-                        
-                        let drawnConnections = 0;
-                        this.connections.forEach(([startIdx, endIdx]) => {{
-                            const startLandmark = transformedLandmarks[startIdx];
-                            const endLandmark = transformedLandmarks[endIdx];
-                            const originalStart = landmarks[startIdx];
-                            const originalEnd = landmarks[endIdx];
-                            
-                            if (startLandmark && endLandmark && originalStart && originalEnd) {{
-                                const startVis = originalStart.visibility || 1;
-                                const endVis = originalEnd.visibility || 1;
-                                
-                                if (startVis > 0.3 && endVis > 0.3) {{
-                                    const startX = startLandmark.x;
-                                    const startY = startLandmark.y;
-                                    const endX = endLandmark.x;
-                                    const endY = endLandmark.y;
-                                    
-                                    // Only draw if coordinates are valid
-                                    if (startX >= 0 && startY >= 0 && endX >= 0 && endY >= 0 &&
-                                        startX <= this.canvas.width && startY <= this.canvas.height &&
-                                        endX <= this.canvas.width && endY <= this.canvas.height) {{
-                                        
-                                        this.ctx.beginPath();
-                                        this.ctx.moveTo(startX, startY);
-                                        this.ctx.lineTo(endX, endY);
-                                        this.ctx.stroke();
-                                        drawnConnections++;
-                                    }}
-                                }}
-                            }}
-                        }});
-                        
-                        // Reset shadow for landmarks
-                        this.ctx.shadowBlur = 0;
-                        
-                        console.log('Drew', drawnConnections, 'connections');
-                        
-                        // Draw landmarks as circles using transformed coordinates
-                        let drawnLandmarks = 0;
-                        transformedLandmarks.forEach((transformedLandmark, idx) => {{
-                            const originalLandmark = landmarks[idx];
-                            if (transformedLandmark && originalLandmark) {{
-                                const visibility = originalLandmark.visibility || 1;
-                                
-                                if (visibility > 0.3) {{
-                                    const x = transformedLandmark.x;
-                                    const y = transformedLandmark.y;
-                                    
-                                    // Only draw if coordinates are valid
-                                    if (x >= 0 && y >= 0 && x <= this.canvas.width && y <= this.canvas.height) {{
-                                        // Different colors for different body parts
-                                        if (idx < 11) {{
-                                            this.ctx.fillStyle = '#ff4c48'; // Face - accent red
-                                        }} else if (idx < 23) {{
-                                            this.ctx.fillStyle = '#4ECDC4'; // Arms - teal
-                                        }} else {{
-                                            this.ctx.fillStyle = '#45B7D1'; // Legs - blue
-                                        }}
-                                        
-                                        this.ctx.beginPath();
-                                        this.ctx.arc(x, y, idx < 11 ? 4 : 6, 0, Math.PI * 2);
-                                        this.ctx.fill();
-                                        
-                                        // Add a white border with glow
-                                        this.ctx.strokeStyle = 'rgba(255, 255, 255, 0.8)';
-                                        this.ctx.lineWidth = 2;
-                                        this.ctx.shadowColor = this.ctx.fillStyle;
-                                        this.ctx.shadowBlur = 8;
-                                        this.ctx.stroke();
-                                        this.ctx.shadowBlur = 0;
-                                        
-                                        drawnLandmarks++;
-                                    }}
-                                }}
-                            }}
-                        }});
-                        
-                        console.log('Drew', drawnLandmarks, 'landmarks');
+                        const drawn = drawSkeleton(
+                            this.ctx, landmarks, this.videoContentRect, this.connections, this.canvas.width, this.canvas.height
+                        );
+                        console.log('Drew', drawn.connections, 'connections and', drawn.landmarks, 'landmarks');
                         
-                        if (drawnLandmarks === 0 && drawnConnections === 0) {{
+                        if (drawn.landmarks === 0 && drawn.connections === 0) {{
                             console.warn('No landmarks or connections were drawn - check landmark data and video content rect');
                         }}
                         
@@ -1276,6 +1763,10 @@ async def tracking_page(
                         this.performance.processTimes.length;
                     
                     this.processTimeDisplay.textContent = Math.round(processTime);
+                    
+                    if (this.budgetController) {{
+                        this.budgetController.observe(processTime);
+                    }}
                 }}
                 
                 updateFPS() {{
@@ -1288,6 +1779,13 @@ async def tracking_page(
                         this.performance.lastFPSTime = now;
                         
                         this.fpsDisplay.textContent = this.performance.currentFPS;
+                        
+                        // Pose results per second, the FPS that matters for tracking
+                        this.inferenceStats.fps = this.inferenceStats.results;
+                        this.inferenceStats.results = 0;
+                        const stats = this.getInferenceStats();
+                        window.poseInferenceStats = stats;
+                        this.sendToReactNative({{ type: 'inference_stats', ...stats }});
                     }}
                 }}
                 
@@ -1299,35 +1797,62 @@ async def tracking_page(
                     this.qualityDot.className = `quality-dot quality-${{quality}}`;
                 }}
                 
+                activeMode() {{
+                    return this.qualityLevels[this.qualityLevel];
+                }}
+                
                 adjustQualityBasedOnPerformance() {{
-                    const targetFPS = this.settings.targetFPS;
-                    const currentFPS = this.performance.currentFPS;
-                    const avgProcessTime = this.performance.averageProcessTime;
+                    if (!this.budgetController) return;
+                    const decision = this.budgetController.evaluate(performance.now(), this.activeMode().skipFrames);
+                    if (!decision) return;
+                    
+                    const from = this.activeMode();
+                    this.setQualityLevel(decision.to);
+                    const to = this.activeMode();
+                    const entry = {{
+                        time: Math.round(performance.now()),
+                        reason: decision.reason,
+                        from: from.name,
+                        to: to.name,
+                        averageMs: Math.round(decision.averageMs * 10) / 10,
+                        budgetMs: Math.round(decision.budgetMs * 10) / 10,
+                        load: Math.round(decision.load * 100) / 100
+                    }};
+                    this.qualityDecisions.push(entry);
+                    if (this.qualityDecisions.length > 20) {{
+                        this.qualityDecisions.shift();
+                    }}
+                    window.poseQualityDecisions = this.qualityDecisions;
                     
-                    if (currentFPS < targetFPS * 0.8 || avgProcessTime > 33) {{
-                        // Performance is poor, lower quality
-                        if (this.currentMode === 'high') {{
-                            this.currentMode = 'medium';
-                            this.updateModeDisplay();
-                        }} else if (this.currentMode === 'medium') {{
-                            this.currentMode = 'low';
-                            this.updateModeDisplay();
-                        }}
-                    }} else if (currentFPS > targetFPS * 1.2 && avgProcessTime < 16) {{
-                        // Performance is good, try higher quality
-                        if (this.currentMode === 'low') {{
-                            this.currentMode = 'medium';
-                            this.updateModeDisplay();
-                        }} else if (this.currentMode === 'medium') {{
-                            this.currentMode = 'high';
-                            this.updateModeDisplay();
+                    const describe = (mode) => `${{mode.name}} (${{mode.resolution.width}}x${{mode.resolution.height}}, skip ${{mode.skipFrames}}, model ${{mode.modelComplexity}})`;
+                    console.log(`[FrameBudget] ${{entry.reason}}: ${{entry.averageMs}} ms per frame vs ${{entry.budgetMs}} ms budget, ${{describe(from)}} -> ${{describe(to)}}`);
+                    this.sendToReactNative({{ type: 'quality_change', ...entry }});
+                }}
+                
+                setQualityLevel(level) {{
+                    // Applied in place: input size and frame skipping take effect on the next frame,
+                    // a model change reconfigures the running Pose graph; the camera keeps running
+                    const previous = this.activeMode();
+                    this.qualityLevel = level;
+                    const mode = this.activeMode();
+                    
+                    if (mode.modelComplexity !== previous.modelComplexity) {{
+                        if (this.inferenceWorker) {{
+                            this.inferenceWorker.postMessage({{ type: 'options', options: this.poseOptions() }});
+                        }} else if (this.pose && this.pose.setOptions) {{
+                            this.pose.setOptions(this.poseOptions());
                         }}
                     }}
+                    this.performance.frameSkipCounter = 0;
+                    // The window now describes the old level
+                    this.performance.processTimes.length = 0;
+                    this.updateModeDisplay();
                 }}
                 
                 updateModeDisplay() {{
-                    const mode = this.currentMode.charAt(0).toUpperCase() + this.currentMode.slice(1);
-                    this.modeDisplay.textContent = `MediaPipe (${{mode}})`;
+                    const mode = this.activeMode().name;
+                    const name = mode.charAt(0).toUpperCase() + mode.slice(1);
+                    this.modeDisplay.textContent = `MediaPipe${{this.inferenceWorker ? ' Worker' : ''}} (${{name}})`;
                 }}
                 
                 // Control methods
@@ -1368,7 +1893,7 @@ async def tracking_page(
                     console.log('Skeleton toggled:', this.showSkeleton ? 'ON' : 'OFF');
                     
                     if (!this.showSkeleton) {{
-                        this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
+                        this.clearOverlay();
                         console.log('Cleared canvas');
                     }} else {{
                         // Force a redraw if we have recent landmarks
@@ -1392,11 +1917,15 @@ async def tracking_page(
                     if (this.settings.qualityMode !== 'auto') {{
                         this.currentMode = this.settings.qualityMode;
                         this.settings.adaptiveQuality = false;
+                        this.setQualityLevel(this.presetLevels[this.currentMode]);
                     }} else {{
+                        // Back to closed-loop control, starting from wherever the user left it
                         this.settings.adaptiveQuality = true;
+                        if (this.budgetController) {{
+                            this.budgetController.reset(this.qualityLevel, performance.now());
+                        }}
+                        this.updateModeDisplay();
                     }}
-                    
-                    this.updateModeDisplay();
                 }}
                 
                 toggleGPU() {{
@@ -1411,7 +1940,11 @@ async def tracking_page(
                     this.smoothBtn.className = this.settings.useSmoothing ? 'primary-button' : 'secondary-button';
                     
                     if (!this.settings.useSmoothing) {{
-                        this.landmarkHistory = [];
+                        this.smoother.reset();
+                        this.smoothedReady = false;
+                        if (this.worker) {{
+                            this.worker.postMessage({{ type: 'reset' }});
+                        }}
                     }}
                 }}
                 
@@ -1435,6 +1968,54 @@ async def tracking_page(
                     this.loadingIndicator.style.display = 'none';
                 }}
                 
+                connectRepCounter() {{
+                    // Landmarks go up as 528-byte float32 packets; rep and positioning events come back
+                    const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+                    const socket = new WebSocket(`${{protocol}}//${{window.location.host}}/pose_tracker/landmarks?exercise=${{this.exercise}}`);
+                    socket.binaryType = 'arraybuffer';
+                    this.repSocket = socket;
+                    this.landmarkPacket = new Float32Array(33 * 4);
+                    
+                    socket.onmessage = (event) => {{
+                        const message = JSON.parse(event.data);
+                        if (message.type === 'counter') {{
+                            this.updateStatus(`Reps: ${{message.current_count}}`);
+                        }} else if (message.type === 'info') {{
+                            this.updateStatus(`Position: ${{message.postureDirection}}`);
+                        }}
+                        if (message.type !== 'ready') {{
+                            this.sendToReactNative(message);
+                        }}
+                    }};
+                    socket.onclose = () => {{
+                        this.repSocket = null;
+                        if (!this.closed) {{
+                            setTimeout(() => this.connectRepCounter(), 2000);
+                        }}
+                    }};
+                }}
+                
+                sendLandmarks(landmarks) {{
+                    const socket = this.repSocket;
+                    if (!socket || socket.readyState !== WebSocket.OPEN) return;
+                    // Skip frames rather than queue them when the network falls behind
+                    if (socket.bufferedAmount > 8 * this.landmarkPacket.byteLength) return;
+                    
+                    if (!landmarks) {{
+                        socket.send(new ArrayBuffer(0));
+                        return;
+                    }}
+                    const packet = this.landmarkPacket;
+                    for (let i = 0; i < 33; i++) {{
+                        const landmark = landmarks[i] || {{}};
+                        packet[i * 4] = landmark.x ?? NaN;
+                        packet[i * 4 + 1] = landmark.y ?? NaN;
+                        packet[i * 4 + 2] = landmark.z ?? 0;
+                        packet[i * 4 + 3] = landmark.visibility ?? 0;
+                    }}
+                    socket.send(packet);
+                }}
+                
                 sendToReactNative(data) {{
                     try {{
                         const messageData = JSON.stringify(data);
@@ -1454,6 +2035,11 @@ async def tracking_page(
                 }}
                 
                 cleanup() {{
+                    this.closed = true;
+                    if (this.repSocket) {{
+                        this.repSocket.close();
+                    }}
+                    
                     if (this.currentStream) {{
                         this.currentStream.getTracks().forEach(track => track.stop());
                     }}
@@ -1462,6 +2048,10 @@ async def tracking_page(
                         this.worker.terminate();
                     }}
                     
+                    if (this.inferenceWorker) {{
+                        this.inferenceWorker.terminate();
+                    }}
+                    
                     if (this.pose) {{
                         this.pose.close();
                     }}
@@ -1482,4 +2072,56 @@ async def tracking_page(
     </html>
     """
     
-    return HTMLResponse(content=html_content)
\ No newline at end of file
+    return html_content
+
+@pose_tracking_router.websocket("/pose_tracker/ws")
+async def pose_tracker_ws(websocket: WebSocket):
+    """
+    Live pose inference for clients too slow to run MediaPipe themselves.
+    Send JPEG/WebP frames as binary messages and receive one binary landmark reply per
+    processed frame (format in live_inference.REPLY_HEADER). Frames sent faster than the
+    server keeps up are dropped, newest wins. Text {"type": "reset"} clears tracking state.
+    """
+    await websocket.accept()
+    if LiveInferenceSession is None:
+        await websocket.close(code=1011, reason="Server-side inference not available")
+        return
+    try:
+        pose = await acquire_pose()
+    except TimeoutError:
+        await websocket.close(code=1013, reason="Server busy, try again later")
+        return
+
+    session = LiveInferenceSession(websocket, pose)
+    try:
+        await session.run()
+    except (WebSocketDisconnect, RuntimeError):
+        # Client went away while a reply was being sent
+        pass
+    finally:
+        release_pose(pose)
+        print(f"📡 Live inference session closed: {session.stats()}")
+
+@pose_tracking_router.websocket("/pose_tracker/landmarks")
+async def pose_tracker_landmarks_ws(websocket: WebSocket, exercise: str = "squats"):
+    """
+    Rep counting on landmarks the client already computed.
+    Send each frame's 33 x 4 float32 landmarks as a binary message (format in
+    landmark_ingest.PACKET_BYTES) and receive JSON rep and positioning events as they change.
+    exercise is any rep_counting.EXERCISES entry. Text {"type": "reset", "exercise": ...}
+    starts a new count, {"type": "stats"} reports session totals.
+    """
+    await websocket.accept()
+    try:
+        session = LandmarkIngestSession(websocket, exercise)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    try:
+        await session.run()
+    except (WebSocketDisconnect, RuntimeError):
+        # Client went away while an event was being sent
+        pass
+    finally:
+        print(f"📡 Landmark session closed: {session.stats()}")
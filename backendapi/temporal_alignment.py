@@ -0,0 +1,210 @@
+import os
+from typing import Optional, Tuple
+import numpy as np
+from landmarks import X, Y
+from motion_metrics import COMPARISON_JOINTS, MotionFeatures
+
+# Sakoe-Chiba band half-width as a fraction of the longer take; at least this many frames
+DTW_WINDOW_FRACTION = float(os.getenv("DTW_WINDOW_FRACTION", "0.1"))
+DTW_MIN_WINDOW = int(os.getenv("DTW_MIN_WINDOW", "10"))
+# Cost of pairing frames that share no visible joint, in torso lengths
+MISSING_COST = 1.0
+# Banded cost cells (times joints) computed per vectorized block, bounding temporary memory
+COST_BLOCK_ELEMENTS = 1 << 21
+
+HIP_JOINTS = [23, 24]
+SHOULDER_JOINTS = [11, 12]
+JOINT_NAMES = {
+    0: "nose", 11: "left_shoulder", 12: "right_shoulder", 13: "left_elbow", 14: "right_elbow",
+    15: "left_wrist", 16: "right_wrist", 23: "left_hip", 24: "right_hip",
+    25: "left_knee", 26: "right_knee", 27: "left_ankle", 28: "right_ankle",
+}
+
+
+def pose_features(features: MotionFeatures) -> np.ndarray:
+    """
+    Per-frame pose vectors that ignore where the athlete stands and how big they appear:
+    comparison joints' 2D positions relative to the hip center, in torso lengths.
+    Returns (frames, joints, 2); invisible joints are NaN.
+    """
+    xy = features.data[:, :, [X, Y]]
+    visible = features.visible
+
+    def center(joints):
+        mask = visible[:, joints]
+        count = mask.sum(axis=1)
+        total = np.where(mask[:, :, None], xy[:, joints], 0.0).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count[:, None] > 0, total / np.maximum(count, 1)[:, None], np.nan)
+
+    hips = center(HIP_JOINTS)
+    torso = np.linalg.norm(center(SHOULDER_JOINTS) - hips, axis=1)
+    # Frames where the torso is not measurable use the take's typical torso length
+    typical = np.nanmedian(torso) if np.isfinite(torso).any() else 1.0
+    torso = np.where(np.isfinite(torso) & (torso > 1.0), torso, max(typical, 1.0))
+
+    joints = xy[:, COMPARISON_JOINTS]
+    normalized = (joints - hips[:, None, :]) / torso[:, None, None]
+    return np.where(visible[:, COMPARISON_JOINTS, None], normalized, np.nan)
+
+
+def band_limits(n: int, m: int, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First and last column of each row's band: within `window` frames of the diagonal
+    from (0, 0) to (n - 1, m - 1), so takes of different length can still be aligned.
+    """
+    rows = np.arange(n)
+    center = np.rint(rows * ((m - 1) / max(n - 1, 1))).astype(np.int64)
+    return np.maximum(center - window, 0), np.minimum(center + window, m - 1)
+
+
+def cost_inputs(pose: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """x, y and visibility planes of a pose sequence as float32, with invisible joints zeroed"""
+    visible = ~np.isnan(pose[..., 0])
+    filled = np.nan_to_num(pose).astype(np.float32)
+    return np.ascontiguousarray(filled[..., 0]), np.ascontiguousarray(filled[..., 1]), visible.astype(np.float32)
+
+
+def banded_costs(first: Tuple[np.ndarray, ...], second: Tuple[np.ndarray, ...],
+                 lo: np.ndarray, width: int) -> np.ndarray:
+    """
+    (rows, width) matrix of frame distances where column k of row i is frame lo[i] + k of
+    the second take: mean joint distance over joints visible in both frames.
+    Takes cost_inputs() planes; cells past the end of the second take are inf.
+    """
+    (first_x, first_y, first_visible), (second_x, second_y, second_visible) = first, second
+    m = len(second_visible)
+    columns = lo[:, None] + np.arange(width)
+    paired = np.minimum(columns, m - 1)
+    # Squared distances are built in place to keep the block's temporaries to two arrays
+    distances = second_x[paired]
+    distances -= first_x[:, None]
+    np.square(distances, out=distances)
+    dy = second_y[paired]
+    dy -= first_y[:, None]
+    np.square(dy, out=dy)
+    distances += dy
+    np.sqrt(distances, out=distances)
+    shared = second_visible[paired]
+    shared *= first_visible[:, None]
+    distances *= shared
+    count = shared.sum(axis=-1)
+    costs = np.where(count > 0, distances.sum(axis=-1) / np.maximum(count, 1), MISSING_COST)
+    costs[columns >= m] = np.inf
+    return costs
+
+
+# Backtracking moves stored per band cell
+DIAGONAL, UP, LEFT = 0, 1, 2
+
+
+def banded_dtw(first: np.ndarray, second: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Dynamic time warping of two pose sequences restricted to a Sakoe-Chiba band.
+    Memory is O(n * width) bytes: costs are computed a block of rows at a time, only the
+    previous row of cumulative costs is kept, and each cell stores its one-byte move.
+    Each row is solved with whole-array operations: with t[j] the best way into (i, j)
+    from row i - 1, the left-to-right recurrence D[i, j] = min(t[j], D[i, j - 1] + c[i, j])
+    equals C[j] + min over k <= j of (t[k] - C[k]), where C is the row's running cost sum.
+    Returns the warping path as (length, 2) frame pairs and its total cost.
+    """
+    n = len(first)
+    lengths = hi - lo + 1
+    width = int(lengths.max())
+    moves = np.empty((n, width), dtype=np.uint8)
+    block_rows = max(1, COST_BLOCK_ELEMENTS // (width * first.shape[1]))
+    first, second = cost_inputs(first), cost_inputs(second)
+
+    # padded[k + 1] holds D[i - 1, lo[i - 1] + k]; the borders stay inf
+    padded = np.full(2 * width + 1, np.inf)
+    previous = padded[1:width + 1]
+    for start in range(0, n, block_rows):
+        block = slice(start, start + block_rows)
+        costs = banded_costs(tuple(plane[block] for plane in first), second, lo[block], width)
+        for r, row in enumerate(costs):
+            i = start + r
+            length = lengths[i]
+            row = row[:length]
+            running = np.cumsum(row)
+            if i == 0:
+                moves[0, :length] = LEFT
+                previous[:] = np.inf
+                previous[:length] = running
+                continue
+            shift = lo[i] - lo[i - 1]
+            up = padded[shift + 1:shift + 1 + length]
+            diagonal = padded[shift:shift + length]
+            from_above = np.minimum(up, diagonal)
+            entry = row + from_above
+            with np.errstate(invalid="ignore"):
+                offsets = entry - running
+                best = np.minimum.accumulate(offsets)
+            # A cell enters from the previous row unless some cell to its left is cheaper
+            moves[i, :length] = np.where(best < offsets, LEFT, np.where(diagonal <= up, DIAGONAL, UP))
+            previous[:] = np.inf
+            previous[:length] = running + best
+    cost = float(previous[lengths[n - 1] - 1])
+
+    # Walk back from the last pair of frames along the recorded moves
+    i, j = n - 1, int(hi[n - 1])
+    path = [(i, j)]
+    while i > 0 or j > 0:
+        move = moves[i, j - lo[i]] if i > 0 else LEFT
+        if move != UP:
+            j -= 1
+        if move != LEFT:
+            i -= 1
+        path.append((i, j))
+    return np.array(path[::-1], dtype=np.int64), cost
+
+
+class Alignment:
+    """
+    DTW alignment of two takes: path[k] = (frame in first, frame in second), plus the
+    per-joint distance in torso lengths for every aligned pair (NaN where not visible in both).
+    """
+    def __init__(self, path: np.ndarray, cost: float, joint_errors: np.ndarray, window: int):
+        self.path = path
+        self.cost = cost
+        self.joint_errors = joint_errors
+        self.window = window
+
+    def mean_joint_errors(self) -> dict:
+        """Average aligned error per comparison joint in torso lengths, None if never visible in both"""
+        measured = ~np.isnan(self.joint_errors)
+        count = measured.sum(axis=0)
+        total = np.where(measured, self.joint_errors, 0.0).sum(axis=0)
+        return {
+            JOINT_NAMES[joint]: round(float(total[k] / count[k]), 4) if count[k] else None
+            for k, joint in enumerate(COMPARISON_JOINTS)
+        }
+
+    def summary(self) -> dict:
+        offsets = self.path[:, 1] - self.path[:, 0]
+        return {
+            "mode": "dtw",
+            "window": self.window,
+            "path_length": int(len(self.path)),
+            "mean_cost": round(self.cost / max(len(self.path), 1), 4),
+            "mean_offset_frames": round(float(offsets.mean()), 2) if len(offsets) else 0.0,
+            "joint_errors": self.mean_joint_errors(),
+        }
+
+
+def align_takes(first: MotionFeatures, second: MotionFeatures, window: Optional[int] = None) -> Alignment:
+    """Align two takes with banded DTW over normalized pose vectors"""
+    n, m = len(first), len(second)
+    if not n or not m:
+        return Alignment(np.empty((0, 2), dtype=np.int64), 0.0, np.empty((0, len(COMPARISON_JOINTS))), 0)
+
+    if window is None:
+        window = max(DTW_MIN_WINDOW, int(DTW_WINDOW_FRACTION * max(n, m)))
+    # Consecutive rows' bands must overlap or no path fits inside them
+    window = max(window, int(np.ceil(m / n)))
+
+    first_pose, second_pose = pose_features(first), pose_features(second)
+    lo, hi = band_limits(n, m, window)
+    path, cost = banded_dtw(first_pose, second_pose, lo, hi)
+
+    joint_errors = np.linalg.norm(first_pose[path[:, 0]] - second_pose[path[:, 1]], axis=-1)
+    return Alignment(path, cost, joint_errors, window)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The backend modules import each other flat, as they do when run from backendapi/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from landmarks import LandmarkSequence, NUM_LANDMARKS  # noqa: E402
+
+
+def random_sequence(rng: np.random.Generator, frames: int, detection: float = 0.9,
+                    visibility: float = 0.8, fps: float = 30.0) -> LandmarkSequence:
+    """Random take in pixel coordinates with some undetected frames and low-visibility landmarks"""
+    data = np.zeros((frames, NUM_LANDMARKS, 4), dtype=np.float32)
+    data[:, :, 0] = rng.uniform(0, 640, (frames, NUM_LANDMARKS))
+    data[:, :, 1] = rng.uniform(0, 480, (frames, NUM_LANDMARKS))
+    data[:, :, 2] = rng.uniform(-200, 200, (frames, NUM_LANDMARKS))
+    data[:, :, 3] = np.where(rng.random((frames, NUM_LANDMARKS)) < visibility,
+                             rng.uniform(0.6, 1.0, (frames, NUM_LANDMARKS)),
+                             rng.uniform(0.0, 0.4, (frames, NUM_LANDMARKS)))
+    valid = rng.random(frames) < detection
+    data[~valid] = 0
+    return LandmarkSequence(data, valid, fps=fps, width=640, height=480)
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(1234)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from chunked_extraction import plan_chunks, stitch_chunks
+
+
+def chunk(start: int, frames: int, value: float):
+    data = np.full((frames, 33, 4), value, dtype=np.float32)
+    return start, data, np.ones(frames, dtype=bool)
+
+
+def test_seam_is_cross_faded():
+    # Frames 6-9 are inferred by both chunks
+    data, valid = stitch_chunks([chunk(0, 10, 0.0), chunk(6, 8, 1.0)])
+    assert data.shape == (14, 33, 4) and valid.all()
+    np.testing.assert_allclose(data[:6, 0, 0], 0.0)
+    # The later chunk's weight ramps up across the overlap, never reaching either end
+    np.testing.assert_allclose(data[6:10, 0, 0], [0.2, 0.4, 0.6, 0.8], rtol=1e-6)
+    np.testing.assert_allclose(data[10:, 0, 0], 1.0)
+    assert (data[6:10] == data[6:10, :1, :1]).all()
+
+
+def test_seam_frames_detected_by_one_chunk_only():
+    first = chunk(0, 10, 0.0)
+    second = chunk(6, 8, 1.0)
+    first[2][7] = False
+    second[2][8 - 6] = False
+    data, valid = stitch_chunks([first, second])
+    assert valid.all()
+    # Frame 7: only the later chunk found a pose, so it is taken as is
+    assert data[7, 0, 0] == 1.0
+    # Frame 8: only the earlier chunk did
+    assert data[8, 0, 0] == 0.0
+    np.testing.assert_allclose(data[[6, 9], 0, 0], [0.2, 0.8], rtol=1e-6)
+
+
+def test_undetected_frames_stay_invalid_and_contiguous_chunks_do_not_blend():
+    first = chunk(0, 5, 0.0)
+    first[2][4] = False
+    data, valid = stitch_chunks([first, chunk(5, 5, 1.0)])
+    assert valid.tolist() == [True] * 4 + [False] + [True] * 5
+    np.testing.assert_array_equal(data[5:, 0, 0], 1.0)
+
+
+@pytest.mark.parametrize("total, workers, min_frames, expected", [
+    (100, 4, 900, [(0, 100)]),
+    (2000, 4, 900, [(0, 1000), (1000, 2000)]),
+    (10000, 4, 900, [(0, 2500), (2500, 5000), (5000, 7500), (7500, 10000)]),
+])
+def test_plan_chunks(total, workers, min_frames, expected):
+    assert plan_chunks(total, workers, min_frames) == expected
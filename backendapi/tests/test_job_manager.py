@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from job_manager import JobManager, JobQueueFull
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=1, max_pending=2, result_ttl=60)
+    yield manager
+    manager.shutdown()
+
+
+def wait(manager: JobManager, job_id: str):
+    try:
+        manager.future(job_id).result(timeout=5)
+    except Exception:
+        pass
+    return manager.get(job_id)
+
+
+def test_bounded_queue(manager):
+    release = threading.Event()
+    blocked = [manager.submit("test", lambda progress: release.wait(5)) for _ in range(2)]
+    with pytest.raises(JobQueueFull):
+        manager.submit("test", lambda progress: None)
+
+    release.set()
+    for job_id in blocked:
+        assert wait(manager, job_id)["status"] == "completed"
+    # Finished jobs no longer count against the limit
+    assert wait(manager, manager.submit("test", lambda progress: None))["status"] == "completed"
+    assert manager.stats() == {"workers": 1, "jobs": {"completed": 3}}
+
+
+def test_progress_result_and_failure(manager):
+    seen = threading.Event()
+    release = threading.Event()
+
+    def work(frames, progress):
+        progress(frames // 4, frames)
+        seen.set()
+        release.wait(5)
+        progress(frames, frames)
+        return {"frames": frames}
+
+    job_id = manager.submit("test", work, 40)
+    assert seen.wait(5)
+    job = manager.get(job_id)
+    assert job["status"] == "processing"
+    assert job["progress"] == {"frames_done": 10, "frames_total": 40, "percent": 25.0}
+
+    release.set()
+    job = wait(manager, job_id)
+    assert job["result"] == {"frames": 40}
+    assert job["progress"]["percent"] == 100.0
+    assert job["finished_at"] >= job["started_at"] >= job["created_at"]
+
+    def fail(progress):
+        raise RuntimeError("no frames")
+
+    failed = wait(manager, manager.submit("test", fail))
+    assert failed["status"] == "failed"
+    assert failed["error"] == "no frames"
+
+
+def test_finished_jobs_expire_after_ttl(manager):
+    job_id = manager.submit("test", lambda progress: 1)
+    assert wait(manager, job_id)["status"] == "completed"
+    manager.result_ttl = 0
+    time.sleep(0.01)
+    assert manager.get(job_id) is None
+    assert manager.future(job_id) is None
+
+
+def test_submit_once_reuses_active_job(manager):
+    release = threading.Event()
+    first = manager.submit_once("render", "a.mp4", lambda progress: release.wait(5))
+    assert manager.submit_once("render", "a.mp4", lambda progress: None) == first
+    other = manager.submit_once("render", "b.mp4", lambda progress: None)
+    assert other != first
+
+    release.set()
+    wait(manager, first)
+    wait(manager, other)
+    # Once the job is finished the same key starts a new one
+    again = manager.submit_once("render", "a.mp4", lambda progress: None)
+    assert again != first
+    wait(manager, again)
+    manager.result_ttl = 0
+    time.sleep(0.01)
+    manager.purge_expired()
+    assert not manager._keys
@@ -0,0 +1,72 @@
+"""joint_angles, batched and single-frame, against the original per-call PoseTracker._calculate_angle"""
+import math
+
+import numpy as np
+import pytest
+
+from conftest import random_sequence
+from joint_angles import ANGLE_NAMES, JOINT_ANGLES, AngleSeries, joint_angles
+
+
+def legacy_calculate_angle(a, b, c):
+    # PoseTracker._calculate_angle as it was
+    a = np.array(a)
+    b = np.array(b)
+    c = np.array(c)
+
+    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
+    angle = np.abs(radians * 180.0 / np.pi)
+
+    if angle > 180.0:
+        angle = 360 - angle
+
+    return angle
+
+
+def legacy_angles(frame: np.ndarray) -> list:
+    angles = []
+    for a, b, c in JOINT_ANGLES.values():
+        visible = all(frame[joint, 3] > 0.5 for joint in (a, b, c))
+        angles.append(legacy_calculate_angle(frame[a, :2], frame[b, :2], frame[c, :2]) if visible else math.nan)
+    return angles
+
+
+@pytest.mark.parametrize("frames, visibility", [(1, 1.0), (50, 0.8), (200, 0.5)])
+def test_batched_and_single_frame_match_legacy(rng, frames, visibility):
+    take = random_sequence(rng, frames, detection=1.0, visibility=visibility)
+    triplets = len(JOINT_ANGLES)
+
+    batched = joint_angles(take.data, take.visible())
+    assert batched.shape == (frames, len(ANGLE_NAMES))
+    for i, frame in enumerate(take.data):
+        expected = legacy_angles(frame.astype(np.float64))
+        np.testing.assert_allclose(batched[i, :triplets], expected, atol=1e-6)
+        np.testing.assert_allclose(joint_angles(frame), batched[i], atol=1e-9, equal_nan=True)
+    assert (batched[~np.isnan(batched)] >= 0).all() and (batched[~np.isnan(batched)] <= 180).all()
+
+
+def test_undetected_frames_and_named_subsets(rng):
+    take = random_sequence(rng, 40, detection=0.5)
+    angles = joint_angles(take.data, take.visible())
+    assert np.isnan(angles[~take.valid]).all()
+
+    names = ["trunk", "right_knee", "left_elbow"]
+    subset = joint_angles(take.data, take.visible(), names=names)
+    series = AngleSeries(angles)
+    for column, name in enumerate(names):
+        np.testing.assert_array_equal(subset[:, column], series[name])
+    with pytest.raises(ValueError):
+        joint_angles(take.data, names=["left_wrist"])
+
+
+def test_trunk_lean():
+    frame = np.zeros((33, 4), dtype=np.float32)
+    frame[:, 3] = 1.0
+    # Shoulders straight above the hips (image y grows downwards), then leaning 45 degrees
+    frame[[11, 12], 1] = 0.0
+    frame[[23, 24], 1] = 1.0
+    trunk = ANGLE_NAMES.index("trunk")
+    assert joint_angles(frame)[trunk] == pytest.approx(0.0)
+    frame[[11, 12], 0] = 1.0
+    assert joint_angles(frame)[trunk] == pytest.approx(45.0)
+    assert joint_angles(frame[None])[0, trunk] == pytest.approx(45.0)
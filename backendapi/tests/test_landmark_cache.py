@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+
+from conftest import random_sequence
+from landmark_cache import LandmarkCache, hash_file, hash_sidecar_path, upload_hash, write_upload_hash
+
+
+def key(name: str):
+    return (name, 1, 1, "")
+
+
+def test_memory_lru_is_bounded_by_bytes(tmp_path, rng):
+    takes = {name: random_sequence(rng, 100) for name in "abc"}
+    size = takes["a"].nbytes
+    cache = LandmarkCache(str(tmp_path), max_bytes=2 * size)
+
+    cache.put(key("a"), takes["a"])
+    cache.put(key("b"), takes["b"])
+    assert cache.get(key("a")) is takes["a"]
+    # Over budget: b is the least recently used and goes; a stays in memory
+    cache.put(key("c"), takes["c"])
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["bytes"] == 2 * size
+    assert cache.get(key("a")) is takes["a"]
+    assert cache.get(key("c")) is takes["c"]
+
+    # Evicted entries come back from disk
+    reloaded = cache.get(key("b"))
+    assert reloaded is not takes["b"]
+    np.testing.assert_array_equal(reloaded.valid, takes["b"].valid)
+    assert cache.stats()["entries"] == 2
+    assert cache.get(key("missing")) is None
+    assert cache.stats()["misses"] == 1
+
+    # A take larger than the whole budget is only kept on disk
+    huge = random_sequence(rng, 300)
+    cache.put(key("huge"), huge)
+    assert cache.stats()["bytes"] <= 2 * size
+    assert len(cache.get(key("huge"))) == 300
+
+
+def test_keys_keep_sampling_settings_apart(tmp_path, rng):
+    cache = LandmarkCache(str(tmp_path))
+    cache.put(("abc", 1, 1, "_f10"), random_sequence(rng, 10))
+    assert cache.get(("abc", 1, 1, "")) is None
+    assert cache.get(("abc", 0, 1, "_f10")) is None
+    assert cache.open(("abc", 1, 1, "_f10")) is not None
+
+
+def test_upload_hash_reuses_sidecar(tmp_path):
+    video = tmp_path / "take.mp4"
+    video.write_bytes(b"frames" * 1000)
+    # Files stored before hashing existed get hashed once and the sidecar written
+    digest = upload_hash(str(video))
+    assert digest == hash_file(str(video))
+    assert os.path.exists(hash_sidecar_path(str(video)))
+
+    # Later lookups trust the sidecar instead of re-reading the video
+    write_upload_hash(str(video), "recorded-at-upload")
+    assert upload_hash(str(video)) == "recorded-at-upload"
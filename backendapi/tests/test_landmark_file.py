@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from conftest import random_sequence
+from landmark_file import HEADER_SIZE, LandmarkFile, write_landmark_file
+
+
+def test_float32_round_trip(tmp_path, rng):
+    landmarks = random_sequence(rng, 50, fps=29.97)
+    path = str(tmp_path / "take.lmk")
+    write_landmark_file(path, landmarks, model_complexity=2, pipeline_version=7, dtype="float32")
+
+    lmk = LandmarkFile(path)
+    assert len(lmk) == 50
+    assert not lmk.quantized
+    assert (lmk.fps, lmk.width, lmk.height) == (29.97, 640, 480)
+    assert (lmk.model_complexity, lmk.pipeline_version) == (2, 7)
+    restored = lmk.read()
+    np.testing.assert_array_equal(restored.data, landmarks.data)
+    np.testing.assert_array_equal(restored.valid, landmarks.valid)
+    # Frame ranges come straight off the mapping
+    part = lmk.read(10, 20)
+    np.testing.assert_array_equal(part.data, landmarks.data[10:20])
+    np.testing.assert_array_equal(part.valid, landmarks.valid[10:20])
+
+
+def test_int16_quantization_error_is_bounded(tmp_path, rng):
+    landmarks = random_sequence(rng, 50)
+    path = str(tmp_path / "take.lmk")
+    write_landmark_file(path, landmarks, dtype="int16")
+
+    lmk = LandmarkFile(path)
+    assert lmk.quantized
+    restored = lmk.read()
+    np.testing.assert_array_equal(restored.valid, landmarks.valid)
+    # Each channel is scaled to its own peak, so the error is at most half a step of that channel
+    peak = np.abs(landmarks.data).reshape(-1, 4).max(axis=0)
+    error = np.abs(restored.data - landmarks.data).reshape(-1, 4).max(axis=0)
+    assert np.all(error <= peak / 32767.0 / 2 * 1.001 + 1e-6)
+    # Undetected frames stay exactly zero
+    assert not restored.data[~landmarks.valid].any()
+
+
+def test_int16_is_smaller(tmp_path, rng):
+    landmarks = random_sequence(rng, 200)
+    float_path, int_path = tmp_path / "f.lmk", tmp_path / "i.lmk"
+    write_landmark_file(str(float_path), landmarks, dtype="float32")
+    write_landmark_file(str(int_path), landmarks, dtype="int16")
+    assert int_path.stat().st_size < float_path.stat().st_size * 0.55
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int16"])
+def test_empty_sequence(tmp_path, rng, dtype):
+    path = str(tmp_path / "empty.lmk")
+    write_landmark_file(path, random_sequence(rng, 0), dtype=dtype)
+    restored = LandmarkFile(path).read()
+    assert len(restored) == 0
+    assert restored.data.shape == (0, 33, 4)
+
+
+def test_rejects_other_files(tmp_path, rng):
+    path = tmp_path / "not.lmk"
+    path.write_bytes(b"\0" * HEADER_SIZE)
+    with pytest.raises(ValueError):
+        LandmarkFile(str(path))
+    with pytest.raises(ValueError):
+        write_landmark_file(str(tmp_path / "x.lmk"), random_sequence(rng, 1), dtype="float16")
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from landmark_ingest import LandmarkIngestSession, PACKET_BYTES
+from landmarks import NUM_LANDMARKS
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def squat_frame(knee_angle_bent: bool, hip_x: float = 0.5) -> np.ndarray:
+    """Normalized frame with the left hip-knee-ankle at about 90 degrees when bent, 180 when straight"""
+    frame = np.full((NUM_LANDMARKS, 4), 0.5, dtype="<f4")
+    frame[:, 3] = 1.0
+    frame[23, :2] = (hip_x, 0.5)
+    frame[25, :2] = (hip_x, 0.7)
+    frame[27, :2] = (hip_x + 0.2, 0.7) if knee_angle_bent else (hip_x, 0.9)
+    return frame
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.websocket("/landmarks")
+    async def landmarks_ws(websocket: WebSocket, exercise: str = "squats"):
+        await websocket.accept()
+        await LandmarkIngestSession(websocket, exercise).run()
+
+    return TestClient(app)
+
+
+def test_counts_reps_and_reports_only_changes(client):
+    with client.websocket_connect("/landmarks") as ws:
+        ready = ws.receive_json()
+        assert ready == {"type": "ready", "packet_bytes": PACKET_BYTES, "exercise": "squats"}
+
+        ws.send_bytes(b"")
+        assert ws.receive_json()["postureDirection"] == "not detected"
+        ws.send_bytes(squat_frame(False, hip_x=0.1).tobytes())
+        assert ws.receive_json()["postureDirection"] == "right"
+
+        ws.send_bytes(squat_frame(False).tobytes())
+        assert ws.receive_json()["current_count"] == 0
+        # Two reps in one packet; the frames in between change nothing and are not reported
+        reps = [squat_frame(bent) for bent in (True, False, False, True, False)]
+        ws.send_bytes(np.concatenate(reps).tobytes())
+        assert ws.receive_json()["current_count"] == 1
+        assert ws.receive_json()["current_count"] == 2
+
+        ws.send_text('{"type": "stats"}')
+        assert ws.receive_json() == {"type": "stats", "exercise": "squats", "frames": 8, "events": 5, "rep_count": 2}
+
+        ws.send_bytes(b"\0" * (PACKET_BYTES - 1))
+        assert ws.receive_json()["type"] == "error"
+        ws.send_text('{"type": "reset", "exercise": "cartwheels"}')
+        assert ws.receive_json()["type"] == "error"
+
+        ws.send_text('{"type": "reset", "exercise": "plank"}')
+        ws.send_text('{"type": "stats"}')
+        assert ws.receive_json()["exercise"] == "planks"
+
+
+def test_importable_without_mediapipe():
+    # Rep counting on client landmarks must keep working on servers without MediaPipe
+    code = "import sys; sys.modules['mediapipe'] = None; import simple_live_tracker; " \
+           "assert simple_live_tracker.LiveInferenceSession is None; assert simple_live_tracker.LandmarkIngestSession"
+    subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, check=True, capture_output=True)
@@ -0,0 +1,104 @@
+import os
+from email.utils import formatdate
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from landmark_cache import write_upload_hash
+from media_serving import media_router, parse_range
+
+BODY = os.urandom(1000)
+DIGEST = "ab" * 32
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("uploads")
+    with open(os.path.join("uploads", "take.mp4"), "wb") as f:
+        f.write(BODY)
+    write_upload_hash(os.path.join("uploads", "take.mp4"), DIGEST)
+    app = FastAPI()
+    app.include_router(media_router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=500-100", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+
+def test_full_body_with_validators(client):
+    response = client.get("/uploads/take.mp4")
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["etag"] == f'"{DIGEST}"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-type"] == "video/mp4"
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_range_request(client):
+    response = client.get("/uploads/take.mp4", headers={"range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.content == BODY[100:200]
+    assert response.headers["content-range"] == "bytes 100-199/1000"
+    assert response.headers["content-length"] == "100"
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/uploads/take.mp4", headers={"range": "bytes=2000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1000"
+    assert response.content == b""
+
+
+def test_if_range(client):
+    matching = client.get("/uploads/take.mp4", headers={"range": "bytes=0-9", "if-range": f'"{DIGEST}"'})
+    assert matching.status_code == 206
+    assert matching.content == BODY[:10]
+    # The client's partial copy is of another version: the whole current file comes back
+    stale = client.get("/uploads/take.mp4", headers={"range": "bytes=0-9", "if-range": '"other"'})
+    assert stale.status_code == 200
+    assert stale.content == BODY
+
+
+def test_not_modified(client):
+    etag = client.head("/uploads/take.mp4").headers["etag"]
+    response = client.get("/uploads/take.mp4", headers={"if-none-match": f'"x", {etag}'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert client.get("/uploads/take.mp4", headers={"if-none-match": '"x"'}).status_code == 200
+
+    later = formatdate(os.path.getmtime(os.path.join("uploads", "take.mp4")) + 60, usegmt=True)
+    assert client.get("/uploads/take.mp4", headers={"if-modified-since": later}).status_code == 304
+    assert client.get("/uploads/take.mp4", headers={"if-modified-since": "Thu, 01 Jan 1970 00:00:00 GMT"}).status_code == 200
+
+
+def test_head_sends_headers_only(client):
+    response = client.head("/uploads/take.mp4")
+    assert response.status_code == 200
+    assert response.headers["content-length"] == "1000"
+    assert response.content == b""
+
+
+@pytest.mark.parametrize("path", ["/uploads/missing.mp4", "/uploads/take.mp4.sha256", "/uploads/notes.txt"])
+def test_only_videos_are_served(client, path):
+    assert client.get(path).status_code == 404
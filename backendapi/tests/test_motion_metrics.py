@@ -0,0 +1,132 @@
+"""score_features / MotionFeatures against the original per-frame dict implementations"""
+import numpy as np
+import pytest
+
+from conftest import random_sequence
+from motion_metrics import MotionFeatures, score_features
+
+SCORED_JOINTS = [0, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
+KEY_JOINTS = [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
+
+
+def legacy_pose_distance(landmarks1, landmarks2):
+    # compute_similarity(a, b) and compute_accuracy(a, b) were the same loop,
+    # normalized by the first take's shoulder-to-hip length
+    if not landmarks1 or not landmarks2:
+        return 0.0
+    scores = []
+    for i in range(min(len(landmarks1), len(landmarks2))):
+        if landmarks1[i] and landmarks2[i]:
+            frame_dist = 0.0
+            count = 0
+            for idx in SCORED_JOINTS:
+                lm1, lm2 = landmarks1[i][idx], landmarks2[i][idx]
+                if lm1['visibility'] > 0.5 and lm2['visibility'] > 0.5:
+                    frame_dist += np.sqrt((lm1['x'] - lm2['x'])**2 + (lm1['y'] - lm2['y'])**2 + (lm1['z'] - lm2['z'])**2)
+                    count += 1
+            if count > 0:
+                shoulder, hip = landmarks1[i][11], landmarks1[i][23]
+                if shoulder['visibility'] > 0.5 and hip['visibility'] > 0.5:
+                    body_size = max(np.sqrt((shoulder['x'] - hip['x'])**2 + (shoulder['y'] - hip['y'])**2), 1.0)
+                else:
+                    body_size = 1.0
+                scores.append(1.0 - min((frame_dist / count) / body_size, 1.0))
+    return np.mean(scores) * 100 if scores else 0.0
+
+
+def legacy_velocities(landmarks_per_frame):
+    velocities = []
+    for i in range(1, len(landmarks_per_frame)):
+        if landmarks_per_frame[i] and landmarks_per_frame[i-1]:
+            frame_vel = 0.0
+            count = 0
+            for idx in KEY_JOINTS:
+                lm1, lm2 = landmarks_per_frame[i][idx], landmarks_per_frame[i-1][idx]
+                if lm1['visibility'] > 0.5 and lm2['visibility'] > 0.5:
+                    frame_vel += np.sqrt((lm1['x'] - lm2['x'])**2 + (lm1['y'] - lm2['y'])**2 + (lm1['z'] - lm2['z'])**2)
+                    count += 1
+            if count > 0:
+                velocities.append(frame_vel / count)
+    return velocities
+
+
+def legacy_smoothness(landmarks_per_frame):
+    velocities = legacy_velocities(landmarks_per_frame)
+    if not velocities:
+        return 0.0
+    return (1.0 - min(np.var(velocities) / 100.0, 1.0)) * 100
+
+
+def legacy_speed(landmarks_per_frame, fps):
+    displacements = [v * fps for v in legacy_velocities(landmarks_per_frame)]
+    if not displacements:
+        return 0.0
+    return min(np.mean(displacements) / 10.0, 100.0)
+
+
+def legacy_cohesion(landmarks_per_frame):
+    variances = []
+    for landmarks in landmarks_per_frame:
+        if landmarks:
+            center = [lm for idx, lm in enumerate(landmarks) if idx in [11, 12, 23, 24] and lm['visibility'] > 0.5]
+            if center:
+                center_x = np.mean([lm['x'] for lm in center])
+                center_y = np.mean([lm['y'] for lm in center])
+                distances = [
+                    np.sqrt((landmarks[idx]['x'] - center_x)**2 + (landmarks[idx]['y'] - center_y)**2)
+                    for idx in KEY_JOINTS if landmarks[idx]['visibility'] > 0.5
+                ]
+                if distances:
+                    variances.append(np.var(distances))
+    if not variances:
+        return 0.0
+    return (1.0 - min(np.mean(variances) / 1000.0, 1.0)) * 100
+
+
+@pytest.mark.parametrize("frames, detection, visibility", [
+    (60, 0.9, 0.8),
+    (45, 0.5, 0.5),
+    (30, 1.0, 0.2),
+    (1, 1.0, 1.0),
+    (20, 0.0, 0.8),
+])
+def test_score_features_matches_legacy(rng, frames, detection, visibility):
+    past = random_sequence(rng, frames, detection, visibility)
+    new = random_sequence(rng, frames + 7, detection, visibility)
+    # Small motions so smoothness and cohesion are not clipped to 0
+    past.data[:, :, :3] *= 0.05
+    new.data[:, :, :3] *= 0.05
+    past_dicts, new_dicts = past.to_dicts(), new.to_dicts()
+    fps = 30.0
+
+    past_metrics, new_metrics = score_features(MotionFeatures(past), MotionFeatures(new), fps)
+
+    expected_past = {
+        'smoothness': legacy_smoothness(past_dicts),
+        'speed': legacy_speed(past_dicts, fps),
+        'cohesion': legacy_cohesion(past_dicts),
+        'accuracy': legacy_pose_distance(past_dicts, past_dicts),
+    }
+    expected_new = {
+        'smoothness': legacy_smoothness(new_dicts),
+        'speed': legacy_speed(new_dicts, fps),
+        'cohesion': legacy_cohesion(new_dicts),
+        'accuracy': legacy_pose_distance(new_dicts, past_dicts),
+        'similarity': legacy_pose_distance(past_dicts, new_dicts),
+    }
+    for name, value in expected_past.items():
+        assert past_metrics[name] == pytest.approx(value, abs=1e-9), name
+    for name, value in expected_new.items():
+        assert new_metrics[name] == pytest.approx(value, abs=1e-9), name
+
+
+def test_empty_take_scores_zero(rng):
+    empty = random_sequence(rng, 0)
+    features = MotionFeatures(empty)
+    assert features.smoothness() == 0.0
+    assert features.speed(30.0) == 0.0
+    assert features.cohesion() == 0.0
+    assert features.self_accuracy() == 0.0
+    _, new_metrics = score_features(MotionFeatures(random_sequence(rng, 10)), MotionFeatures(empty), 30.0)
+    assert new_metrics['similarity'] == 0.0
+    assert new_metrics['accuracy'] == 0.0
@@ -0,0 +1,102 @@
+import gzip
+import threading
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import page_cache
+from page_cache import PageCache, RenderedPage, accepted_encodings
+
+PAGE = "<html><body>" + "tracker code " * 500 + "</body></html>"
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("") == {}
+    assert accepted_encodings("gzip, br;q=0.5, identity;q=0") == {"gzip": 1.0, "br": 0.5, "identity": 0.0}
+    assert accepted_encodings(" GZIP ;q=bad , *;q=0.1") == {"gzip": 0.0, "*": 0.1}
+
+
+def test_encoding_for_prefers_smallest_accepted():
+    page = RenderedPage(PAGE)
+    best = "br" if page_cache.brotli is not None else "gzip"
+    assert page.encoding_for("gzip, deflate, br") == best
+    assert page.encoding_for("gzip;q=0.8, br;q=0") == "gzip"
+    assert page.encoding_for("*") == best
+    assert page.encoding_for("*, gzip;q=0, br;q=0") == "identity"
+    assert page.encoding_for("deflate") == "identity"
+    assert page.encoding_for("") == "identity"
+
+
+def test_etag_per_representation():
+    page = RenderedPage(PAGE)
+    assert len(set(page.etags.values())) == len(page.bodies)
+    assert gzip.decompress(page.bodies["gzip"]) == page.bodies["identity"]
+    # Same content, same tags: clients keep revalidating successfully across restarts
+    assert RenderedPage(PAGE).etags == page.etags
+    assert RenderedPage(PAGE + " ").etags["identity"] != page.etags["identity"]
+    assert page.matches(page.etags["identity"])
+    assert page.matches(f'"other", W/{page.etags["gzip"]}')
+    assert page.matches("*")
+    assert not page.matches('"other"')
+
+
+@pytest.fixture
+def cache():
+    return PageCache(max_pages=2)
+
+
+@pytest.fixture
+def client(cache):
+    app = FastAPI()
+    renders = []
+
+    @app.get("/page/{name}")
+    async def page(request: Request, name: str):
+        loop_thread = threading.get_ident()
+
+        def render():
+            # Misses render and compress off the event loop
+            assert threading.get_ident() != loop_thread
+            renders.append(name)
+            return PAGE
+        return await cache.response(request, name, render, headers={"x-page": name})
+
+    client = TestClient(app)
+    client.renders = renders
+    return client
+
+
+def test_response_headers_and_revalidation(client):
+    plain = client.get("/page/a", headers={"accept-encoding": "identity"})
+    assert plain.status_code == 200
+    assert plain.text == PAGE
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+    assert plain.headers["cache-control"] == page_cache.PAGE_CACHE_CONTROL
+    assert plain.headers["x-page"] == "a"
+
+    zipped = client.get("/page/a", headers={"accept-encoding": "gzip"})
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.text == PAGE
+    assert zipped.headers["etag"] != plain.headers["etag"]
+
+    # A copy cached under either representation revalidates with an empty 304
+    for etag in (plain.headers["etag"], zipped.headers["etag"]):
+        response = client.get("/page/a", headers={"accept-encoding": "gzip", "if-none-match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == zipped.headers["etag"]
+        assert response.headers["vary"] == "Accept-Encoding"
+    assert client.get("/page/a", headers={"if-none-match": '"stale"'}).status_code == 200
+    assert client.renders == ["a"]
+
+
+def test_lru_eviction_and_stats(client, cache):
+    for name in ("a", "b", "a", "c", "b"):
+        client.get(f"/page/{name}")
+    # c pushed out b, the least recently used page, so b renders again
+    assert client.renders == ["a", "b", "c", "b"]
+    assert cache.stats() == {"pages": 2, "hits": 1, "misses": 4}
+    cache.clear()
+    assert cache.stats()["pages"] == 0
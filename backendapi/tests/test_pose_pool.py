@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+import pose_processor
+from pose_processor import PosePool
+
+
+class FakePose:
+    """Stands in for a MediaPipe graph: counts frames since its last reset"""
+    def __init__(self, model_complexity):
+        self.model_complexity = model_complexity
+        self.frames = 0
+        self.resets = 0
+
+    def process(self, image):
+        self.frames += 1
+
+    def reset(self):
+        self.frames = 0
+        self.resets += 1
+
+
+@pytest.fixture(autouse=True)
+def fake_graphs(monkeypatch):
+    monkeypatch.setattr(pose_processor, "create_pose", FakePose)
+
+
+def test_graphs_created_lazily_up_to_size_and_reset_on_release():
+    pool = PosePool(size=2, model_complexity=0)
+    first, second = pool.acquire(), pool.acquire()
+    assert first is not second and first.model_complexity == 0
+    assert pool.stats() == {"size": 2, "created": 2, "idle": 0}
+
+    first.process(None)
+    pool.release(first)
+    # Tracking state from the previous video never reaches the next one
+    assert first.frames == 0 and first.resets == 1
+    assert pool.acquire() is first
+    assert pool.stats()["created"] == 2
+
+
+def test_checkout_times_out_and_returns_graph_on_error():
+    pool = PosePool(size=1)
+    with pool.checkout(timeout=1) as pose:
+        with pytest.raises(TimeoutError, match="0.05s"):
+            pool.acquire(timeout=0.05)
+        pose.process(None)
+    assert pool.stats()["idle"] == 1
+
+    with pytest.raises(RuntimeError):
+        with pool.checkout(timeout=1) as pose:
+            raise RuntimeError("decode failed")
+    assert pose.resets == 2
+    assert pool.stats()["idle"] == 1
+
+
+def test_waiting_checkout_gets_released_graph():
+    pool = PosePool(size=1)
+    pose = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=5)))
+    waiter.start()
+    pool.release(pose)
+    waiter.join(5)
+    assert got == [pose]
+
+
+def test_warm_creates_every_graph():
+    pool = PosePool(size=3)
+    pool.warm()
+    assert pool.stats() == {"size": 3, "created": 3, "idle": 3}
+    # The blank warm-up frame is cleared before first use
+    assert all(pool.acquire().frames == 0 for _ in range(3))
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from landmarks import NUM_LANDMARKS
+from pose_state import LEFT_HIP, PoseState
+
+
+def frame(hip_x: float = 0.5, hip_visibility: float = 1.0) -> np.ndarray:
+    landmarks = np.full((NUM_LANDMARKS, 4), 0.5, dtype=np.float32)
+    landmarks[:, 3] = 1.0
+    landmarks[LEFT_HIP, 0] = hip_x
+    landmarks[LEFT_HIP, 3] = hip_visibility
+    return landmarks
+
+
+@pytest.mark.parametrize("landmarks, direction", [
+    (None, "not detected"),
+    (frame(hip_visibility=0.2), "move closer"),
+    (frame(hip_x=0.1), "right"),
+    (frame(hip_x=0.9), "left"),
+])
+def test_positioning_messages(landmarks, direction):
+    state = PoseState()
+    assert state.process_landmarks(landmarks) == {"type": "info", "ready": False, "postureDirection": direction}
+    assert not state.ready_position
+
+
+def test_counter_messages():
+    state = PoseState("squats")
+    assert state.process_landmarks(frame()) == {"type": "counter", "exercise": "squats", "current_count": 0, "ready": True}
+    assert state.ready_position
+    assert state.process_landmarks(frame())["current_count"] == state.rep_count == 0
+
+    plank = PoseState("plank")
+    assert plank.process_landmarks(frame())["hold_seconds"] == 0
+    with pytest.raises(ValueError):
+        PoseState("cartwheels")
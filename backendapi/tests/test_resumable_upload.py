@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+import resumable_upload
+from resumable_upload import resumable_upload_router
+
+DATA = bytes(range(256)) * 200
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # Sessions and finished uploads live under the relative uploads/ directory
+    monkeypatch.chdir(tmp_path)
+    app = FastAPI()
+    app.include_router(resumable_upload_router)
+    return TestClient(app)
+
+
+def create(client, **data) -> str:
+    response = client.post("/uploads/sessions", data={"filename": "take.mp4", "size": str(len(DATA)), **data})
+    assert response.status_code == 201
+    assert response.headers["upload-offset"] == "0"
+    return response.json()["upload_id"]
+
+
+def patch(client, upload_id, offset, body):
+    return client.patch(f"/uploads/sessions/{upload_id}", content=body, headers={"Upload-Offset": str(offset)})
+
+
+def test_offset_and_finalize_protocol(client):
+    upload_id = create(client, sha256=DIGEST)
+    url = f"/uploads/sessions/{upload_id}"
+
+    assert patch(client, upload_id, 0, DATA[:10000]).json()["offset"] == 10000
+    # A retried chunk at a stale offset is refused with the offset to resume from
+    stale = patch(client, upload_id, 0, DATA[:10000])
+    assert stale.status_code == 409
+    assert stale.json()["offset"] == 10000
+    assert client.head(url).headers["upload-offset"] == "10000"
+    assert client.post(url + "/finalize").status_code == 409
+
+    # A chunk going past the declared size is rejected whole
+    overflow = patch(client, upload_id, 10000, DATA[10000:] + b"extra")
+    assert overflow.status_code == 413
+    assert client.get(url).json()["offset"] == 10000
+
+    # Without the running hash (e.g. after a restart) finalize re-reads the file
+    resumable_upload._hashers.clear()
+    assert patch(client, upload_id, 10000, DATA[10000:]).json()["offset"] == len(DATA)
+    result = client.post(url + "/finalize").json()
+    assert result["sha256"] == DIGEST
+    assert result["size"] == len(DATA)
+    with open(os.path.join("uploads", result["filename"]), "rb") as f:
+        assert f.read() == DATA
+    assert client.head(url).status_code == 404
+    assert not resumable_upload._locks and not resumable_upload._lock_users
+
+
+def test_hash_mismatch_discards_session(client):
+    upload_id = create(client)
+    patch(client, upload_id, 0, DATA)
+    response = client.post(f"/uploads/sessions/{upload_id}/finalize", data={"sha256": "0" * 64})
+    assert response.status_code == 422
+    assert client.get(f"/uploads/sessions/{upload_id}").status_code == 404
+
+
+def test_unknown_sessions_allocate_nothing(client):
+    assert patch(client, "deadbeef", 0, b"x").status_code == 404
+    assert client.post("/uploads/sessions/deadbeef/finalize").status_code == 404
+    assert client.delete("/uploads/sessions/deadbeef").status_code == 404
+    assert not resumable_upload._locks and not resumable_upload._lock_users
+
+
+def test_missing_partial_file_is_not_found(client):
+    upload_id = create(client)
+    os.remove(resumable_upload._part_path(upload_id))
+    assert client.head(f"/uploads/sessions/{upload_id}").status_code == 404
+    assert patch(client, upload_id, 0, DATA).status_code == 404
+    assert client.post(f"/uploads/sessions/{upload_id}/finalize").status_code == 404
+
+
+def test_waiter_sees_session_discarded_while_it_waited(client):
+    upload_id = create(client)
+
+    async def scenario():
+        order = []
+
+        async def abort():
+            async with resumable_upload._session_lock(upload_id):
+                await asyncio.sleep(0.01)
+                resumable_upload._discard_session(upload_id)
+                order.append("aborted")
+
+        async def late_patch():
+            await asyncio.sleep(0)
+            async with resumable_upload._session_lock(upload_id):
+                # Same lock as abort, so this only runs once the session is gone
+                order.append("patch")
+                resumable_upload._load_session(upload_id)
+
+        results = await asyncio.gather(abort(), late_patch(), return_exceptions=True)
+        return order, results
+
+    order, results = asyncio.run(scenario())
+    assert order == ["aborted", "patch"]
+    assert isinstance(results[1], HTTPException) and results[1].status_code == 404
+    assert not resumable_upload._locks and not resumable_upload._lock_users
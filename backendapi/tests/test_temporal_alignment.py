@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+import temporal_alignment
+from conftest import random_sequence
+from motion_metrics import MotionFeatures
+from temporal_alignment import MISSING_COST, align_takes, band_limits, banded_dtw, pose_features
+
+
+def frame_cost(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean 2D distance over joints visible in both (joints, 2) frames"""
+    shared = ~np.isnan(a[:, 0]) & ~np.isnan(b[:, 0])
+    if not shared.any():
+        return MISSING_COST
+    return float(np.linalg.norm(a[shared] - b[shared], axis=1).mean())
+
+
+def brute_force_dtw(first: np.ndarray, second: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> float:
+    """Textbook O(n * m) DTW with cells outside the band forbidden"""
+    n, m = len(first), len(second)
+    total = np.full((n, m), np.inf)
+    for i in range(n):
+        for j in range(lo[i], hi[i] + 1):
+            cost = frame_cost(first[i], second[j])
+            if i == 0 and j == 0:
+                total[i, j] = cost
+                continue
+            best = min(
+                total[i - 1, j - 1] if i and j else np.inf,
+                total[i - 1, j] if i else np.inf,
+                total[i, j - 1] if j else np.inf,
+            )
+            total[i, j] = cost + best
+    return total[n - 1, m - 1]
+
+
+def poses(rng, frames, **kwargs) -> np.ndarray:
+    return pose_features(MotionFeatures(random_sequence(rng, frames, **kwargs)))
+
+
+# Windows of at least ceil(m / n), the smallest for which consecutive bands overlap (as align_takes ensures)
+@pytest.mark.parametrize("n, m, window", [(30, 30, 3), (25, 40, 5), (40, 22, 4), (12, 12, 20), (1, 9, 9), (9, 1, 2)])
+def test_banded_dtw_matches_brute_force(rng, n, m, window):
+    first, second = poses(rng, n, visibility=0.7), poses(rng, m, visibility=0.7)
+    lo, hi = band_limits(n, m, window)
+    path, cost = banded_dtw(first, second, lo, hi)
+
+    assert cost == pytest.approx(brute_force_dtw(first, second, lo, hi), rel=1e-5)
+    # A valid warping path inside the band whose cells add up to the reported cost
+    assert tuple(path[0]) == (0, 0) and tuple(path[-1]) == (n - 1, m - 1)
+    steps = np.diff(path, axis=0)
+    assert np.all((steps >= 0) & (steps <= 1)) and np.all(steps.sum(axis=1) >= 1)
+    assert np.all((path[:, 1] >= lo[path[:, 0]]) & (path[:, 1] <= hi[path[:, 0]]))
+    assert sum(frame_cost(first[i], second[j]) for i, j in path) == pytest.approx(cost, rel=1e-5)
+
+
+def test_small_cost_blocks_give_the_same_result(rng, monkeypatch):
+    first, second = poses(rng, 40), poses(rng, 50)
+    lo, hi = band_limits(40, 50, 6)
+    expected_path, expected_cost = banded_dtw(first, second, lo, hi)
+    # Force one row per cost block
+    monkeypatch.setattr(temporal_alignment, "COST_BLOCK_ELEMENTS", 1)
+    path, cost = banded_dtw(first, second, lo, hi)
+    np.testing.assert_array_equal(path, expected_path)
+    assert cost == expected_cost
+
+
+def test_align_takes_recovers_a_time_stretch(rng):
+    # The second take is the first one played at half speed
+    base = random_sequence(rng, 40, detection=1.0, visibility=1.0)
+    slow = base.__class__(np.repeat(base.data, 2, axis=0), np.repeat(base.valid, 2), fps=base.fps,
+                          width=base.width, height=base.height)
+    aligned = align_takes(MotionFeatures(base), MotionFeatures(slow))
+    assert np.all(aligned.path[:, 1] // 2 == aligned.path[:, 0])
+    assert aligned.cost == pytest.approx(0.0, abs=1e-4)
+
+
+@pytest.mark.parametrize("n, m", [(1, 30), (30, 1), (1, 1)])
+def test_align_takes_covers_both_takes(rng, n, m):
+    aligned = align_takes(MotionFeatures(random_sequence(rng, n)), MotionFeatures(random_sequence(rng, m)))
+    assert tuple(aligned.path[0]) == (0, 0)
+    assert tuple(aligned.path[-1]) == (n - 1, m - 1)
@@ -0,0 +1,60 @@
+import importlib
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from upload_storage import UploadSizeLimitMiddleware
+
+LIMIT = 1000
+ORIGIN = {"origin": "http://localhost:8081"}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # main creates uploads/ in the working directory on import
+    monkeypatch.chdir(tmp_path)
+    main = importlib.import_module("main")
+
+    # The server's own middleware stack, in its order, with a small limit to test against
+    app = FastAPI()
+    for middleware in reversed(main.app.user_middleware):
+        options = dict(middleware.options)
+        if middleware.cls is UploadSizeLimitMiddleware:
+            options["max_bytes"] = LIMIT
+        app.add_middleware(middleware.cls, **options)
+
+    @app.post("/uploads")
+    async def upload(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_declared_oversized_body_is_rejected_with_cors_headers(client):
+    response = client.post("/uploads", content=b"x" * (LIMIT + 1), headers=ORIGIN)
+    assert response.status_code == 413
+    assert "File too large" in response.json()["detail"]
+    # The limit sits inside CORS, so the browser can read the 413 instead of a CORS error
+    assert response.headers.get("access-control-allow-origin") in ("*", ORIGIN["origin"])
+
+
+def test_streamed_oversized_body_is_cut_off(client):
+    def chunks():
+        for _ in range(5):
+            yield b"x" * 300
+
+    # A generator body goes out chunked, without a Content-Length to check up front
+    response = client.post("/uploads", content=chunks(), headers=ORIGIN)
+    assert response.status_code == 413
+    assert response.headers.get("access-control-allow-origin") in ("*", ORIGIN["origin"])
+
+
+def test_bodies_within_limit_and_other_routes_pass(client):
+    assert client.post("/uploads", content=b"x" * LIMIT).json() == {"size": LIMIT}
+    assert client.post("/uploads", content=(b"x" * 100 for _ in range(3))).json() == {"size": 300}
+    assert client.post("/echo", content=b"x" * (LIMIT * 2)).json() == {"size": LIMIT * 2}
@@ -0,0 +1,95 @@
+import cv2
+import numpy as np
+import pytest
+
+from video_pipeline import seek_frame
+
+FPS = 30.0
+FRAMES = 120
+
+
+def frame_with_index(index: int) -> np.ndarray:
+    """Frame whose index is readable back after lossy encoding: one white block per set bit"""
+    frame = np.zeros((32, 160, 3), dtype=np.uint8)
+    for bit in range(10):
+        if index >> bit & 1:
+            frame[8:24, bit * 16:(bit + 1) * 16] = 255
+    return frame
+
+
+def index_of(frame: np.ndarray) -> int:
+    return sum(1 << bit for bit in range(10) if frame[8:24, bit * 16 + 4:bit * 16 + 12].mean() > 128)
+
+
+@pytest.fixture(scope="module")
+def indexed_video(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("video") / "indexed.mp4")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), FPS, (160, 32))
+    if not out.isOpened():
+        pytest.skip("no mp4v encoder in this OpenCV build")
+    for index in range(FRAMES):
+        out.write(frame_with_index(index))
+    out.release()
+    return path
+
+
+class KeyframeCapture:
+    """
+    Capture whose seeks land on the keyframe at or before the requested frame while
+    still reporting the requested position, as some backends do on long-GOP mp4
+    """
+    def __init__(self, frames: int, gop: int):
+        self.frames = frames
+        self.gop = gop
+        self.next = 0
+        self.reported = 0
+
+    def set(self, prop, value):
+        assert prop == cv2.CAP_PROP_POS_FRAMES
+        self.next = int(value) - int(value) % self.gop
+        self.reported = int(value)
+        return True
+
+    def grab(self):
+        if self.next >= self.frames:
+            return False
+        self.next += 1
+        self.reported += 1
+        return True
+
+    def read(self):
+        if self.next >= self.frames:
+            return False, None
+        index = self.next
+        self.grab()
+        return True, index
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return (self.next - 1) * 1000.0 / FPS
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.reported)
+        raise AssertionError(prop)
+
+
+@pytest.mark.parametrize("target", [0, 1, 29, 30, 31, 77, FRAMES - 1])
+def test_seek_frame_lands_on_target(indexed_video, target):
+    cap = cv2.VideoCapture(indexed_video)
+    try:
+        assert seek_frame(cap, target, cap.get(cv2.CAP_PROP_FPS))
+        ok, frame = cap.read()
+        assert ok
+        assert index_of(frame) == target
+    finally:
+        cap.release()
+
+
+@pytest.mark.parametrize("target", [1, 29, 30, 31, 77, FRAMES - 1])
+def test_seek_frame_corrects_keyframe_seeks(target):
+    cap = KeyframeCapture(FRAMES, gop=30)
+    assert seek_frame(cap, target, FPS)
+    assert cap.read() == (True, target)
+
+
+def test_seek_frame_past_end():
+    assert not seek_frame(KeyframeCapture(FRAMES, gop=30), FRAMES + 5, FPS)
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import uuid
+from typing import Iterable, Tuple
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from landmark_cache import new_hasher, write_upload_hash, HASH_CHUNK_SIZE
+
+UPLOADS_DIR = "uploads"
+VIDEO_EXTENSIONS = ["mp4", "mov", "avi"]
+
+# Largest video accepted in one upload
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "500"))
+MAX_UPLOAD_BYTES = int(MAX_UPLOAD_MB * 1024 * 1024)
+# Room for multipart boundaries and the other form fields around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def upload_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large. The limit is {MAX_UPLOAD_MB:g} MB.")
+
+
+def video_extension(filename: str) -> str:
+    """Lower-case extension of an uploaded video, or a 400 if it is not a supported format"""
+    file_extension = (filename or "").split(".")[-1].lower()
+    if file_extension not in VIDEO_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Unsupported file format. Only .mp4, .mov, .avi are allowed.")
+    return file_extension
+
+
+def new_upload_path(file_extension: str) -> Tuple[str, str]:
+    """(unique filename, path) for a new video under uploads/"""
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+    unique_filename = f"{uuid.uuid4()}.{file_extension}"
+    return unique_filename, os.path.join(UPLOADS_DIR, unique_filename)
+
+
+def save_upload(file: UploadFile) -> dict:
+    """
+    Validate the extension of an uploaded video and store it under uploads/.
+    The file is copied in chunks and hashed and counted in the same pass; the
+    copy stops as soon as it goes over MAX_UPLOAD_BYTES.
+    Returns {"filename", "sha256", "size"}. Blocking: call store_upload from async code.
+    """
+    unique_filename, file_path = new_upload_path(video_extension(file.filename))
+
+    hasher = new_hasher()
+    size = 0
+    try:
+        with open(file_path, "wb") as buffer:
+            for chunk in iter(lambda: file.file.read(HASH_CHUNK_SIZE), b""):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise upload_too_large()
+                hasher.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        os.remove(file_path)
+        raise
+
+    digest = hasher.hexdigest()
+    # The landmark cache keys on this hash, so it never has to re-read the video
+    write_upload_hash(file_path, digest)
+    return {"filename": unique_filename, "sha256": digest, "size": size}
+
+
+async def store_upload(file: UploadFile) -> dict:
+    """save_upload on a worker thread so large writes never block the event loop"""
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise upload_too_large()
+    return await asyncio.to_thread(save_upload, file)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects oversized request bodies on upload routes before they are parsed.
+    A declared Content-Length over the limit gets a 413 without reading the body;
+    bodies without one are counted as they stream in and cut off once over it.
+    """
+    def __init__(self, app, paths: Iterable[str], max_bytes: int = MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD):
+        self.app = app
+        self.paths = tuple(paths)
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH") \
+                or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": upload_too_large().detail})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise upload_too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,12 +1,23 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
 from fastapi.responses import JSONResponse
+import asyncio
 import cv2
-import numpy as np
 import os
-import shutil
-import uuid
-from typing import List, Tuple
-from pose_processor import pose, mp_pose, mp_drawing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+from pose_processor import pose_pool, mp_pose, mp_drawing, POSE_CHECKOUT_TIMEOUT
+from landmarks import LandmarkSequence, LandmarkSequenceBuilder
+from chunked_extraction import should_chunk, extract_chunked
+from pose_rendering import render_annotated_video
+from video_pipeline import FramePipeline, resolve_sampling, sampling_tag, frame_step, inference_size, prepare_for_inference
+from motion_metrics import MotionFeatures, PairFeatures, score_features
+from temporal_alignment import align_takes
+from landmark_cache import landmark_cache, upload_hash
+from upload_storage import store_upload
+from media_serving import MediaFileResponse
+from job_manager import job_manager, JobQueueFull
 
 # Router for video comparison endpoints
 video_comparison_router = APIRouter()
@@ -15,11 +26,23 @@ video_comparison_router = APIRouter()
 # Update this to use your ngrok URL for consistency
 SERVER_URL = os.getenv("SERVER_URL", "https://fc11-196-75-83-156.ngrok-free.app")
 
-def process_video(video_path: str, output_path: str) -> List[List[dict]]:
+# Bump when landmark extraction changes so cached landmarks are recomputed
+PIPELINE_VERSION = 2
+
+ProgressCallback = Callable[[int, int], None]
+
+def process_video(video_path: str, output_path: Optional[str] = None,
+                  progress: Optional[ProgressCallback] = None,
+                  analysis_fps: Optional[float] = None, max_side: Optional[int] = None) -> LandmarkSequence:
     """
-    Process a video to extract pose landmarks and save a new video with landmarks drawn.
-    Returns a list of frames, each containing a list of landmark dictionaries.
+    Process a video to extract pose landmarks, optionally saving a new video with landmarks drawn.
+    Without output_path nothing is drawn or encoded (analysis-only mode).
+    analysis_fps and max_side trade accuracy for speed: frames are sampled down to about
+    analysis_fps and shrunk so their longest side is at most max_side before inference.
+    Returns the landmarks of every sampled frame as a LandmarkSequence at the sampled frame rate.
+    If given, progress(frames_done, frames_total) is called as frames are processed.
     """
+    analysis_fps, max_side = resolve_sampling(analysis_fps, max_side)
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         raise ValueError(f"Cannot open video: {video_path}")
@@ -27,237 +50,172 @@ def process_video(video_path: str, output_path: str) -> List[List[dict]]:
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps = cap.get(cv2.CAP_PROP_FPS)
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-
-    landmarks_per_frame = []
-    frame_count = 0
-    
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame_count += 1
-        print(f"Processing frame {frame_count}")
-        
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(rgb_frame)
-
-        if results.pose_landmarks:
+    step = frame_step(fps, analysis_fps)
+    size = inference_size(width, height, max_side)
+    total_frames = -(-int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) // step)
+    out = None
+    if output_path is not None:
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(output_path, fourcc, fps / step, (width, height))
+
+    # Landmarks stay in source-resolution pixels whatever size inference runs at
+    landmarks_per_frame = LandmarkSequenceBuilder(width, height, fps / step, capacity=total_frames)
+
+    def draw(frame, pose_landmarks):
+        if pose_landmarks:
             # Draw landmarks on the frame
             mp_drawing.draw_landmarks(
                 frame,
-                results.pose_landmarks,
+                pose_landmarks,
                 mp_pose.POSE_CONNECTIONS,
                 mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=3, circle_radius=3),  # Green landmarks
                 mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2)  # Red connections
             )
 
-            landmarks = [
-                {
-                    'x': lm.x * width,
-                    'y': lm.y * height,
-                    'z': lm.z * width,
-                    'visibility': lm.visibility
-                } for lm in results.pose_landmarks.landmark
-            ]
-            landmarks_per_frame.append(landmarks)
+    # Check out a private Pose graph so tracking state never leaks between videos; a job that
+    # cannot get one in time fails (TimeoutError) rather than tying up its worker forever.
+    # Decoding and drawing/encoding run on their own threads around this inference loop.
+    with pose_pool.checkout(timeout=POSE_CHECKOUT_TIMEOUT) as pose:
+        try:
+            with FramePipeline(cap, out, draw, step=step) as pipeline:
+                for frame in pipeline:
+                    started = time.perf_counter()
+                    results = pose.process(prepare_for_inference(frame, size))
+                    landmarks_per_frame.append(results.pose_landmarks)
+                    pipeline.timings.add("infer", busy=time.perf_counter() - started)
+
+                    pipeline.emit(frame, results.pose_landmarks)
+                    if progress is not None:
+                        progress(pipeline.frames, max(total_frames, pipeline.frames))
+        finally:
+            cap.release()
+            if out is not None:
+                out.release()
+
+    print(f"Pipeline timings for {os.path.basename(video_path)} (every {step} frame(s), inference size {size or (width, height)}): {pipeline.summary()}")
+    if output_path is not None:
+        print(f"Processed video saved to: {output_path}")
+    return landmarks_per_frame.finish()
+
+# Extractions run here rather than on the job pool so a comparison job can wait on both
+# of its videos without starving other jobs. MediaPipe and OpenCV release the GIL while
+# decoding and inferring, so threads with one pooled Pose graph each run on separate cores.
+extraction_executor = ThreadPoolExecutor(max_workers=pose_pool.size, thread_name_prefix="extract")
+
+# One lock per cache key / output file so concurrent requests for the same video do the work once
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+def _key_lock(key) -> threading.Lock:
+    with _key_locks_guard:
+        return _key_locks.setdefault(key, threading.Lock())
+
+def _cache_key(video_path: str, analysis_fps: float, max_side: int):
+    return (upload_hash(video_path), pose_pool.model_complexity, PIPELINE_VERSION, sampling_tag(analysis_fps, max_side))
+
+def extract_landmarks(video_path: str, progress: Optional[ProgressCallback] = None,
+                      analysis_fps: Optional[float] = None, max_side: Optional[int] = None) -> LandmarkSequence:
+    """
+    Landmarks for an uploaded video, served from the content-addressed cache when possible.
+    Extraction is analysis-only; annotated videos are rendered on demand by ensure_annotated_video.
+    analysis_fps and max_side default to the server settings (see process_video).
+    """
+    analysis_fps, max_side = resolve_sampling(analysis_fps, max_side)
+    key = _cache_key(video_path, analysis_fps, max_side)
+    with _key_lock(key):
+        landmarks = landmark_cache.get(key)
+        if landmarks is not None:
+            print(f"Landmark cache hit for {os.path.basename(video_path)} ({key[0][:12]}{key[3]})")
+            if progress is not None:
+                progress(len(landmarks), len(landmarks))
+            return landmarks
+
+        if should_chunk(video_path):
+            # Long video: infer frame ranges on all cores
+            landmarks = extract_chunked(video_path, pose_pool.model_complexity, progress=progress,
+                                        analysis_fps=analysis_fps, max_side=max_side)
         else:
-            landmarks_per_frame.append([])
-
-        out.write(frame)
-
-    cap.release()
-    out.release()
-    print(f"Processed video saved to: {output_path}")
-    return landmarks_per_frame
+            landmarks = process_video(video_path, progress=progress, analysis_fps=analysis_fps, max_side=max_side)
+        landmark_cache.put(key, landmarks)
+        return landmarks
+
+ANNOTATED_DIR = os.path.join("uploads", "annotated")
+# Annotated URLs are keyed by upload, not by pipeline version, so clients revalidate them hourly
+ANNOTATED_CACHE_CONTROL = "public, max-age=3600"
+
+def annotated_video_url(video_path: str, analysis_fps: Optional[float] = None, max_side: Optional[int] = None) -> str:
+    """URL of the pose-annotated version of an upload; it is rendered on first request"""
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    params = {"analysis_fps": analysis_fps, "max_side": max_side}
+    query = "&".join(f"{name}={value:g}" for name, value in params.items() if value is not None)
+    return f"{SERVER_URL}/uploads/annotated/{stem}.mp4" + (f"?{query}" if query else "")
+
+def annotated_video_path(video_path: str, analysis_fps: Optional[float] = None, max_side: Optional[int] = None) -> str:
+    """Content-addressed path the annotated video for an upload is (or will be) rendered to"""
+    analysis_fps, max_side = resolve_sampling(analysis_fps, max_side)
+    digest, model_complexity, pipeline_version, sampling = _cache_key(video_path, analysis_fps, max_side)
+    return os.path.join(ANNOTATED_DIR, f"{digest}_m{model_complexity}_v{pipeline_version}{sampling}.mp4")
+
+def ensure_annotated_video(video_path: str, analysis_fps: Optional[float] = None, max_side: Optional[int] = None,
+                           progress: Optional[ProgressCallback] = None) -> str:
+    """
+    Path of the pose-annotated video for an upload, drawing it from cached landmarks
+    the first time it is asked for. Rendered files are content-addressed and kept on disk.
+    Runs on a job worker thread (see submit_annotation), never on a request.
+    """
+    output_path = annotated_video_path(video_path, analysis_fps, max_side)
+    if os.path.exists(output_path):
+        return output_path
+
+    with _key_lock(output_path):
+        if not os.path.exists(output_path):
+            os.makedirs(ANNOTATED_DIR, exist_ok=True)
+            landmarks = extract_landmarks(video_path, progress=progress, analysis_fps=analysis_fps, max_side=max_side)
+            tmp_path = f"{output_path[:-4]}.{threading.get_ident()}.tmp.mp4"
+            render_annotated_video(video_path, landmarks, tmp_path)
+            os.replace(tmp_path, output_path)
+    return output_path
+
+def submit_annotation(video_path: str, output_path: str, analysis_fps: Optional[float] = None,
+                      max_side: Optional[int] = None) -> str:
+    """
+    Job id rendering output_path on the job pool; repeated requests while it renders share
+    the queued or running job. May raise JobQueueFull.
+    """
+    return job_manager.submit_once("annotate", output_path, ensure_annotated_video, video_path, analysis_fps, max_side)
 
-def compute_similarity(landmarks1: List[List[dict]], landmarks2: List[List[dict]]) -> float:
+def compute_similarity(landmarks1: LandmarkSequence, landmarks2: LandmarkSequence) -> float:
     """
     Compute similarity as 1 minus normalized Euclidean distance between landmark positions.
     Ensures low similarity (close to 0) for dissimilar poses.
     """
-    if not landmarks1 or not landmarks2:
-        return 0.0
-
-    distances = []
-    min_frames = min(len(landmarks1), len(landmarks2))
-    key_joints = [0, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
-
-    for i in range(min_frames):
-        if landmarks1[i] and landmarks2[i]:
-            frame_dist = 0.0
-            count = 0
-            for idx in key_joints:
-                if idx < len(landmarks1[i]) and idx < len(landmarks2[i]):
-                    lm1 = landmarks1[i][idx]
-                    lm2 = landmarks2[i][idx]
-                    if lm1['visibility'] > 0.5 and lm2['visibility'] > 0.5:
-                        dist = np.sqrt(
-                            (lm1['x'] - lm2['x'])**2 +
-                            (lm1['y'] - lm2['y'])**2 +
-                            (lm1['z'] - lm2['z'])**2
-                        )
-                        frame_dist += dist
-                        count += 1
-            if count > 0:
-                # Calculate body size for normalization
-                if (landmarks1[i] and len(landmarks1[i]) > 23 and 
-                    landmarks1[i][11]['visibility'] > 0.5 and landmarks1[i][23]['visibility'] > 0.5):
-                    body_size = max(
-                        np.sqrt(
-                            (landmarks1[i][11]['x'] - landmarks1[i][23]['x'])**2 +
-                            (landmarks1[i][11]['y'] - landmarks1[i][23]['y'])**2
-                        ),
-                        1.0
-                    )
-                else:
-                    body_size = 1.0
-                
-                normalized_dist = (frame_dist / count) / body_size
-                distances.append(1.0 - min(normalized_dist, 1.0))
-    
-    return np.mean(distances) * 100 if distances else 0.0
+    first = MotionFeatures(landmarks1)
+    return PairFeatures(first, MotionFeatures(landmarks2)).score(normalize_by=first)
 
-def compute_smoothness(landmarks_per_frame: List[List[dict]]) -> float:
+def compute_smoothness(landmarks_per_frame: LandmarkSequence) -> float:
     """
     Compute smoothness as the inverse of velocity variance for key joints.
     """
-    if len(landmarks_per_frame) < 2:
-        return 0.0
-    velocities = []
-    key_joints = [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
-    for i in range(1, len(landmarks_per_frame)):
-        if landmarks_per_frame[i] and landmarks_per_frame[i-1]:
-            frame_vel = 0.0
-            count = 0
-            for idx in key_joints:
-                if (idx < len(landmarks_per_frame[i]) and idx < len(landmarks_per_frame[i-1])):
-                    lm1 = landmarks_per_frame[i][idx]
-                    lm2 = landmarks_per_frame[i-1][idx]
-                    if lm1['visibility'] > 0.5 and lm2['visibility'] > 0.5:
-                        dx = lm1['x'] - lm2['x']
-                        dy = lm1['y'] - lm2['y']
-                        dz = lm1['z'] - lm2['z']
-                        velocity = np.sqrt(dx**2 + dy**2 + dz**2)
-                        frame_vel += velocity
-                        count += 1
-            if count > 0:
-                velocities.append(frame_vel / count)
-    
-    if not velocities:
-        return 0.0
-    variance = np.var(velocities)
-    normalized_variance = min(variance / 100.0, 1.0)
-    return (1.0 - normalized_variance) * 100
+    return MotionFeatures(landmarks_per_frame).smoothness()
 
-def compute_speed(landmarks_per_frame: List[List[dict]], fps: float) -> float:
+def compute_speed(landmarks_per_frame: LandmarkSequence, fps: float) -> float:
     """
     Compute speed as average keypoint displacement per second, normalized to human movement range.
     """
-    if len(landmarks_per_frame) < 2:
-        return 0.0
-    displacements = []
-    key_joints = [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
-    for i in range(1, len(landmarks_per_frame)):
-        if landmarks_per_frame[i] and landmarks_per_frame[i-1]:
-            frame_dist = 0.0
-            count = 0
-            for idx in key_joints:
-                if (idx < len(landmarks_per_frame[i]) and idx < len(landmarks_per_frame[i-1])):
-                    lm1 = landmarks_per_frame[i][idx]
-                    lm2 = landmarks_per_frame[i-1][idx]
-                    if lm1['visibility'] > 0.5 and lm2['visibility'] > 0.5:
-                        dist = np.sqrt(
-                            (lm1['x'] - lm2['x'])**2 +
-                            (lm1['y'] - lm2['y'])**2 +
-                            (lm1['z'] - lm2['z'])**2
-                        )
-                        frame_dist += dist
-                        count += 1
-            if count > 0:
-                displacements.append((frame_dist / count) * fps)
-    
-    if not displacements:
-        return 0.0
-    avg_speed = np.mean(displacements)
-    return min(avg_speed / 10.0, 100.0)
+    return MotionFeatures(landmarks_per_frame).speed(fps)
 
-def compute_cohesion(landmarks_per_frame: List[List[dict]]) -> float:
+def compute_cohesion(landmarks_per_frame: LandmarkSequence) -> float:
     """
     Compute cohesion as the inverse of variance of keypoint distances from body center.
     """
-    if not landmarks_per_frame:
-        return 0.0
-    variances = []
-    key_joints = [11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
-    for landmarks in landmarks_per_frame:
-        if landmarks and len(landmarks) > 24:
-            valid_landmarks = [lm for idx, lm in enumerate(landmarks) if idx in [11, 12, 23, 24] and lm['visibility'] > 0.5]
-            if valid_landmarks:
-                center_x = np.mean([lm['x'] for lm in valid_landmarks])
-                center_y = np.mean([lm['y'] for lm in valid_landmarks])
-                distances = []
-                for idx in key_joints:
-                    if idx < len(landmarks):
-                        lm = landmarks[idx]
-                        if lm['visibility'] > 0.5:
-                            dist = np.sqrt((lm['x'] - center_x)**2 + (lm['y'] - center_y)**2)
-                            distances.append(dist)
-                if distances:
-                    variances.append(np.var(distances))
-    
-    if not variances:
-        return 0.0
-    avg_variance = np.mean(variances)
-    normalized_variance = min(avg_variance / 1000.0, 1.0)
-    return (1.0 - normalized_variance) * 100
+    return MotionFeatures(landmarks_per_frame).cohesion()
 
-def compute_accuracy(landmarks_per_frame: List[List[dict]], reference_landmarks: List[List[dict]]) -> float:
+def compute_accuracy(landmarks_per_frame: LandmarkSequence, reference_landmarks: LandmarkSequence) -> float:
     """
     Compute accuracy as the average similarity to the reference (past) video's poses.
     """
-    if not landmarks_per_frame or not reference_landmarks:
-        return 0.0
-    similarities = []
-    min_frames = min(len(landmarks_per_frame), len(reference_landmarks))
-    key_joints = [0, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28]
-    
-    for i in range(min_frames):
-        if landmarks_per_frame[i] and reference_landmarks[i]:
-            frame_dist = 0.0
-            count = 0
-            for idx in key_joints:
-                if (idx < len(landmarks_per_frame[i]) and idx < len(reference_landmarks[i])):
-                    lm1 = landmarks_per_frame[i][idx]
-                    lm2 = reference_landmarks[i][idx]
-                    if lm1['visibility'] > 0.5 and lm2['visibility'] > 0.5:
-                        dist = np.sqrt(
-                            (lm1['x'] - lm2['x'])**2 +
-                            (lm1['y'] - lm2['y'])**2 +
-                            (lm1['z'] - lm2['z'])**2
-                        )
-                        frame_dist += dist
-                        count += 1
-            if count > 0:
-                # Calculate body size for normalization
-                if (landmarks_per_frame[i] and len(landmarks_per_frame[i]) > 23 and 
-                    landmarks_per_frame[i][11]['visibility'] > 0.5 and landmarks_per_frame[i][23]['visibility'] > 0.5):
-                    body_size = max(
-                        np.sqrt(
-                            (landmarks_per_frame[i][11]['x'] - landmarks_per_frame[i][23]['x'])**2 +
-                            (landmarks_per_frame[i][11]['y'] - landmarks_per_frame[i][23]['y'])**2
-                        ),
-                        1.0
-                    )
-                else:
-                    body_size = 1.0
-                
-                normalized_dist = (frame_dist / count) / body_size
-                similarities.append(1.0 - min(normalized_dist, 1.0))
-    
-    return np.mean(similarities) * 100 if similarities else 0.0
+    features = MotionFeatures(landmarks_per_frame)
+    return PairFeatures(features, MotionFeatures(reference_landmarks)).score(normalize_by=features)
 
 def detect_improvements_regressions(past_metrics: dict, new_metrics: dict) -> Tuple[int, int]:
     """
@@ -274,33 +232,116 @@ def detect_improvements_regressions(past_metrics: dict, new_metrics: dict) -> Tu
             regressions += 1
     return improvements, regressions
 
+def resolve_upload_url(url: str) -> str:
+    """
+    Map a video URL served by this server back to its path under uploads/.
+    Raises an HTTPException if the URL is foreign or the file does not exist.
+    """
+    if not url.startswith(SERVER_URL):
+        raise HTTPException(status_code=400, detail=f"Invalid video URL: {url}")
+    filename = url.split("/")[-1]
+    file_path = os.path.join("uploads", filename)
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail=f"Video file not found: {filename}")
+    return file_path
+
+def check_sampling(analysis_fps: Optional[float], max_side: Optional[int]):
+    """Reject invalid per-request sampling overrides with a 400"""
+    try:
+        resolve_sampling(analysis_fps, max_side)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+ALIGNMENT_MODES = ["frame", "dtw"]
+
+def run_comparison(past_file_path: str, new_file_path: str, render_videos: bool = False,
+                   analysis_fps: Optional[float] = None, max_side: Optional[int] = None,
+                   alignment: str = "frame", progress: Optional[ProgressCallback] = None) -> dict:
+    """
+    Extract landmarks from both videos, score the new take against the past one
+    and return the /compare response payload. Runs on a job worker thread.
+    Both takes are sampled the same way so their frames stay aligned.
+    alignment="dtw" pairs frames by dynamic time warping instead of by index, so a
+    slower or late-starting take is compared movement-for-movement.
+    """
+    print(f"Processing past video: {past_file_path}")
+    print(f"Processing new video: {new_file_path}")
+
+    # Report progress over both videos as one frame range
+    frame_counts = {"past": (0, 0), "new": (0, 0)}
+
+    def video_progress(key: str) -> ProgressCallback:
+        def report(done: int, total: int):
+            frame_counts[key] = (done, total)
+            if progress is not None:
+                progress(sum(d for d, _ in frame_counts.values()), sum(t for _, t in frame_counts.values()))
+        return report
+
+    # Extract both takes in parallel, each on its own Pose graph; a previously seen take is a cache hit
+    sampling = {"analysis_fps": analysis_fps, "max_side": max_side}
+    past_future = extraction_executor.submit(extract_landmarks, past_file_path, progress=video_progress("past"), **sampling)
+    new_future = extraction_executor.submit(extract_landmarks, new_file_path, progress=video_progress("new"), **sampling)
+    past_landmarks = past_future.result()
+    new_landmarks = new_future.result()
+
+    if render_videos:
+        # Eager rendering for clients that always play the result; otherwise it happens on first view
+        for file_path in (past_file_path, new_file_path):
+            ensure_annotated_video(file_path, **sampling)
+
+    # FPS of the reference take drives speed calculations for both.
+    # This is the sampled rate, so per-frame displacements convert to per-second speed correctly.
+    fps = past_landmarks.fps or 30.0  # Default to 30 FPS if unable to get FPS
+
+    print(f"Video FPS: {fps}")
+    print(f"Past video landmarks frames: {len(past_landmarks)}")
+    print(f"New video landmarks frames: {len(new_landmarks)}")
+
+    # All metrics for both takes from one set of shared intermediates
+    past_features, new_features = MotionFeatures(past_landmarks), MotionFeatures(new_landmarks)
+    aligned = align_takes(past_features, new_features) if alignment == "dtw" else None
+    past_metrics, new_metrics = score_features(past_features, new_features, fps,
+                                               pairs=aligned.path if aligned is not None else None)
+    similarity = new_metrics['similarity']
+
+    # Detect improvements and regressions
+    improvements, regressions = detect_improvements_regressions(past_metrics, new_metrics)
+
+    print(f"Past metrics: {past_metrics}")
+    print(f"New metrics: {new_metrics}")
+    print(f"Improvements: {improvements}, Regressions: {regressions}")
+
+    # Prepare response with processed video URLs (not original ones)
+    response = {
+        "similarity": round(min(max(similarity, 0), 100), 2),
+        "smoothness": round(min(max(new_metrics['smoothness'], 0), 100), 2),
+        "speed": round(min(max(new_metrics['speed'], 0), 100), 2),
+        "cohesion": round(min(max(new_metrics['cohesion'], 0), 100), 2),
+        "accuracy": round(min(max(new_metrics['accuracy'], 0), 100), 2),
+        "angle_differences": new_metrics['angle_differences'],
+        "improvements": improvements,
+        "regressions": regressions,
+        # Return URLs to processed videos with pose estimation (rendered on first request)
+        "past_video_url": annotated_video_url(past_file_path, **sampling),
+        "new_video_url": annotated_video_url(new_file_path, **sampling)
+    }
+    if aligned is not None:
+        response["alignment"] = aligned.summary()
+    return response
+
 @video_comparison_router.post("/uploads")
 async def upload_video(file: UploadFile = File(...)):
     try:
-        # Validate file format
-        file_extension = file.filename.split(".")[-1].lower()
-        if file_extension not in ["mp4", "mov", "avi"]:
-            raise HTTPException(status_code=400, detail="Unsupported file format. Only .mp4, .mov, .avi are allowed.")
-        
-        # Create uploads directory if it doesn't exist
-        uploads_dir = "uploads"
-        if not os.path.exists(uploads_dir):
-            os.makedirs(uploads_dir)
-        
-        # Generate unique filename
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = os.path.join(uploads_dir, unique_filename)
-        
-        # Save the uploaded file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
+        stored = await store_upload(file)
+
         # Return the file URL using the configured SERVER_URL
-        file_url = f"{SERVER_URL}/uploads/{unique_filename}"
-        print(f"File uploaded: {file_url}")
+        file_url = f"{SERVER_URL}/uploads/{stored['filename']}"
+        print(f"File uploaded: {file_url} ({stored['size']} bytes, sha256 {stored['sha256'][:12]})")
         
-        return {"filename": unique_filename, "url": file_url}
+        return {**stored, "url": file_url}
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An error occurred while uploading the file: {str(e)}")
@@ -308,94 +349,84 @@ async def upload_video(file: UploadFile = File(...)):
 @video_comparison_router.post("/compare")
 async def compare_videos(
     past_video_url: str = Form(...),
-    new_video_url: str = Form(...)
+    new_video_url: str = Form(...),
+    wait: bool = Form(True),
+    render_videos: bool = Form(False),
+    analysis_fps: Optional[float] = Form(None),
+    max_side: Optional[int] = Form(None),
+    alignment: str = Form("frame")
 ):
+    """
+    Compare two uploaded takes on the job worker pool.
+    With wait=true (the default) the response is the comparison result; otherwise a job id
+    is returned immediately and the result is polled from /movement-analysis/status/{job_id}.
+    Annotated videos are only drawn when their URLs are first fetched, unless render_videos=true.
+    analysis_fps and max_side override the server's ANALYSIS_FPS / ANALYSIS_MAX_SIDE for this request.
+    alignment is "frame" (frame i against frame i) or "dtw" (tempo-independent, see temporal_alignment).
+    """
     try:
         print(f"Comparing videos: {past_video_url} vs {new_video_url}")
-        
+
         # Validate and extract filenames from URLs
-        for url in [past_video_url, new_video_url]:
-            if not url.startswith(SERVER_URL):
-                raise HTTPException(status_code=400, detail=f"Invalid video URL: {url}")
-            filename = url.split("/")[-1]
-            file_path = os.path.join("uploads", filename)
-            if not os.path.exists(file_path):
-                raise HTTPException(status_code=404, detail=f"Video file not found: {filename}")
-
-        # Extract filenames from URLs
-        past_filename = past_video_url.split("/")[-1]
-        new_filename = new_video_url.split("/")[-1]
-        past_file_path = os.path.join("uploads", past_filename)
-        new_file_path = os.path.join("uploads", new_filename)
-
-        # Generate unique filenames for processed videos
-        past_output_filename = f"processed_{uuid.uuid4()}_{past_filename}"
-        new_output_filename = f"processed_{uuid.uuid4()}_{new_filename}"
-        past_output_path = os.path.join("uploads", past_output_filename)
-        new_output_path = os.path.join("uploads", new_output_filename)
-
-        print(f"Processing past video: {past_file_path} -> {past_output_path}")
-        print(f"Processing new video: {new_file_path} -> {new_output_path}")
-
-        # Process both videos to extract landmarks and create pose-annotated videos
-        past_landmarks = process_video(past_file_path, past_output_path)
-        new_landmarks = process_video(new_file_path, new_output_path)
-
-        # Get FPS from the video for speed calculations
-        cap = cv2.VideoCapture(past_file_path)
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0  # Default to 30 FPS if unable to get FPS
-        cap.release()
-
-        print(f"Video FPS: {fps}")
-        print(f"Past video landmarks frames: {len(past_landmarks)}")
-        print(f"New video landmarks frames: {len(new_landmarks)}")
-
-        # Calculate metrics for past video (baseline)
-        past_metrics = {
-            'smoothness': compute_smoothness(past_landmarks),
-            'speed': compute_speed(past_landmarks, fps),
-            'cohesion': compute_cohesion(past_landmarks),
-            'accuracy': compute_accuracy(past_landmarks, past_landmarks)  # Self-reference for baseline
-        }
-
-        # Calculate metrics for new video
-        new_metrics = {
-            'smoothness': compute_smoothness(new_landmarks),
-            'speed': compute_speed(new_landmarks, fps),
-            'cohesion': compute_cohesion(new_landmarks),
-            'accuracy': compute_accuracy(new_landmarks, past_landmarks)  # Compare to past video
-        }
-
-        # Calculate similarity between the two videos
-        similarity = compute_similarity(past_landmarks, new_landmarks)
-        new_metrics['similarity'] = similarity
-
-        # Detect improvements and regressions
-        improvements, regressions = detect_improvements_regressions(past_metrics, new_metrics)
-
-        print(f"Past metrics: {past_metrics}")
-        print(f"New metrics: {new_metrics}")
-        print(f"Improvements: {improvements}, Regressions: {regressions}")
-
-        # Prepare response with processed video URLs (not original ones)
-        response = {
-            "similarity": round(min(max(similarity, 0), 100), 2),
-            "smoothness": round(min(max(new_metrics['smoothness'], 0), 100), 2),
-            "speed": round(min(max(new_metrics['speed'], 0), 100), 2),
-            "cohesion": round(min(max(new_metrics['cohesion'], 0), 100), 2),
-            "accuracy": round(min(max(new_metrics['accuracy'], 0), 100), 2),
-            "improvements": improvements,
-            "regressions": regressions,
-            # Return URLs to processed videos with pose estimation
-            "past_video_url": f"{SERVER_URL}/uploads/{past_output_filename}",
-            "new_video_url": f"{SERVER_URL}/uploads/{new_output_filename}"
-        }
+        past_file_path = resolve_upload_url(past_video_url)
+        new_file_path = resolve_upload_url(new_video_url)
+        check_sampling(analysis_fps, max_side)
+        if alignment not in ALIGNMENT_MODES:
+            raise HTTPException(status_code=400, detail=f"alignment must be one of {ALIGNMENT_MODES}")
+
+        job_id = job_manager.submit("compare", run_comparison, past_file_path, new_file_path, render_videos,
+                                    analysis_fps=analysis_fps, max_side=max_side, alignment=alignment)
+        if not wait:
+            return JSONResponse(status_code=202, content={
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": f"{SERVER_URL}/movement-analysis/status/{job_id}"
+            })
+
+        # Await the worker without blocking the event loop
+        response = await asyncio.wrap_future(job_manager.future(job_id))
 
         print(f"Response: {response}")
         return JSONResponse(content=response)
 
+    except HTTPException:
+        raise
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Server busy, try again later: {str(e)}")
     except Exception as e:
         print(f"Error in compare_videos: {str(e)}")
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"An error occurred during comparison: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"An error occurred during comparison: {str(e)}")
+
+@video_comparison_router.api_route("/uploads/annotated/{filename}", methods=["GET", "HEAD"])
+async def annotated_video(request: Request, filename: str, analysis_fps: Optional[float] = None,
+                          max_side: Optional[int] = None):
+    """
+    Serve the pose-annotated version of an upload. The first request for a video that is not
+    rendered yet queues a render job and gets 202 with the job id; retry once the job completes.
+    """
+    check_sampling(analysis_fps, max_side)
+    stem, extension = os.path.splitext(filename)
+    if extension != ".mp4" or os.path.basename(stem) != stem:
+        raise HTTPException(status_code=404, detail=f"Video file not found: {filename}")
+
+    sources = [os.path.join("uploads", f"{stem}.{ext}") for ext in ["mp4", "mov", "avi"]]
+    source = next((path for path in sources if os.path.exists(path)), None)
+    if source is None:
+        raise HTTPException(status_code=404, detail=f"Video file not found: {filename}")
+
+    # Hashing an upload without a hash sidecar reads the whole file, so keep it off the event loop
+    output_path = await asyncio.to_thread(annotated_video_path, source, analysis_fps, max_side)
+    if os.path.exists(output_path):
+        return MediaFileResponse(output_path, request, cache_control=ANNOTATED_CACHE_CONTROL)
+
+    try:
+        job_id = submit_annotation(source, output_path, analysis_fps, max_side)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Server busy, try again later: {str(e)}")
+    return JSONResponse(status_code=202, headers={"retry-after": "2"}, content={
+        "job_id": job_id,
+        "status": "rendering",
+        "status_url": f"{SERVER_URL}/movement-analysis/status/{job_id}"
+    })
@@ -0,0 +1,258 @@
+import os
+import queue
+import threading
+import time
+from typing import Callable, Optional, Tuple
+import cv2
+
+# Frames buffered between pipeline stages. A full queue blocks the upstream stage
+# (backpressure), so memory stays bounded at roughly 2 * PIPELINE_QUEUE_SIZE frames.
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "8"))
+
+# Server-level sampling defaults; requests may override them. 0 disables either knob:
+# ANALYSIS_FPS=0 infers every decoded frame, ANALYSIS_MAX_SIDE=0 infers at full resolution.
+ANALYSIS_FPS = float(os.getenv("ANALYSIS_FPS", "0"))
+ANALYSIS_MAX_SIDE = int(os.getenv("ANALYSIS_MAX_SIDE", "0"))
+
+_END = object()
+
+
+def resolve_sampling(analysis_fps: Optional[float] = None, max_side: Optional[int] = None) -> Tuple[float, int]:
+    """Request overrides, falling back to the server defaults"""
+    analysis_fps = ANALYSIS_FPS if analysis_fps is None else analysis_fps
+    max_side = ANALYSIS_MAX_SIDE if max_side is None else max_side
+    if analysis_fps < 0 or max_side < 0:
+        raise ValueError("analysis_fps and max_side must be >= 0")
+    return float(analysis_fps), int(max_side)
+
+
+def sampling_tag(analysis_fps: float, max_side: int) -> str:
+    """Suffix that keeps results extracted at different sampling settings apart; empty for full quality"""
+    tag = ""
+    if analysis_fps:
+        tag += f"_f{analysis_fps:g}"
+    if max_side:
+        tag += f"_s{max_side}"
+    return tag
+
+
+def frame_step(source_fps: float, analysis_fps: float) -> int:
+    """Infer every Nth frame, with N chosen so the sampled rate is as close to analysis_fps as possible"""
+    if not analysis_fps or not source_fps or analysis_fps >= source_fps:
+        return 1
+    return max(1, round(source_fps / analysis_fps))
+
+
+def inference_size(width: int, height: int, max_side: int) -> Optional[Tuple[int, int]]:
+    """(width, height) to downscale frames to before inference, or None to keep them as decoded"""
+    longest = max(width, height)
+    if not max_side or longest <= max_side:
+        return None
+    scale = max_side / longest
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def prepare_for_inference(frame, size: Optional[Tuple[int, int]]):
+    """BGR frame -> RGB frame at inference size. Landmarks come back normalized, so no rescaling is needed."""
+    if size is not None:
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+
+def grabbed_frame_index(cap: cv2.VideoCapture, fps: float) -> int:
+    """Index of the frame last grabbed, from its decoded timestamp"""
+    if fps <= 0:
+        # No frame rate to convert timestamps with: trust the backend's frame counter
+        return int(cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+    return round(cap.get(cv2.CAP_PROP_POS_MSEC) * fps / 1000.0)
+
+
+def seek_frame(cap: cv2.VideoCapture, target: int, fps: float) -> bool:
+    """
+    Position cap so the next grab()/read() returns frame target. Setting CAP_PROP_POS_FRAMES
+    is not frame-accurate on every backend (long-GOP mp4 can land on the keyframe before the
+    target while still reporting the requested position), so where the seek actually landed
+    is read from the decoded timestamp and the stream is grabbed forward from there.
+    Returns False if the video ends before target.
+    """
+    if target <= 0:
+        return True
+    cap.set(cv2.CAP_PROP_POS_FRAMES, target - 1)
+    if not cap.grab():
+        return False
+    index = grabbed_frame_index(cap, fps)
+    if index >= target:
+        # Landed past the target: decode forward from the start instead
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        if not cap.grab():
+            return False
+        index = 0
+    while index < target - 1:
+        if not cap.grab():
+            return False
+        index += 1
+    return True
+
+
+class StageTimings:
+    """Busy and blocked seconds per pipeline stage, to show which stage bounds throughput"""
+    def __init__(self):
+        self.busy = {}
+        self.blocked = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, busy: float = 0.0, blocked: float = 0.0):
+        with self._lock:
+            self.busy[stage] = self.busy.get(stage, 0.0) + busy
+            self.blocked[stage] = self.blocked.get(stage, 0.0) + blocked
+
+    def summary(self, frames: int, elapsed: float) -> dict:
+        with self._lock:
+            return {
+                "frames": frames,
+                "elapsed": round(elapsed, 3),
+                "fps": round(frames / elapsed, 1) if elapsed > 0 else 0.0,
+                "busy": {stage: round(seconds, 3) for stage, seconds in self.busy.items()},
+                "blocked": {stage: round(seconds, 3) for stage, seconds in self.blocked.items()},
+            }
+
+
+class _Stage(threading.Thread):
+    """Worker thread that records the first exception so the pipeline can re-raise it"""
+    def __init__(self, name: str, stop: threading.Event, timings: StageTimings):
+        super().__init__(name=name, daemon=True)
+        self.stop = stop
+        self.timings = timings
+        self.error: Optional[BaseException] = None
+
+    def run(self):
+        try:
+            self.work()
+        except BaseException as e:
+            self.error = e
+            self.stop.set()
+
+    def put(self, q: queue.Queue, item) -> bool:
+        """Blocking put that gives up once the pipeline is stopping"""
+        started = time.perf_counter()
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                self.timings.add(self.name, blocked=time.perf_counter() - started)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, q: queue.Queue):
+        started = time.perf_counter()
+        while not self.stop.is_set():
+            try:
+                item = q.get(timeout=0.1)
+                self.timings.add(self.name, blocked=time.perf_counter() - started)
+                return item
+            except queue.Empty:
+                continue
+        return _END
+
+
+class FrameDecoder(_Stage):
+    """
+    Reads every step-th BGR frame from a capture into a bounded queue, then the end marker.
+    Skipped frames are only grabbed, which advances the stream without converting the image.
+    """
+    def __init__(self, cap: cv2.VideoCapture, frames: queue.Queue, stop: threading.Event, timings: StageTimings,
+                 step: int = 1):
+        super().__init__("decode", stop, timings)
+        self.cap = cap
+        self.frames = frames
+        self.step = step
+
+    def work(self):
+        while not self.stop.is_set():
+            started = time.perf_counter()
+            ret, frame = self.cap.read()
+            for _ in range(self.step - 1):
+                if not self.cap.grab():
+                    break
+            self.timings.add("decode", busy=time.perf_counter() - started)
+            if not ret or not self.put(self.frames, frame):
+                break
+        self.put(self.frames, _END)
+
+
+class FrameWriter(_Stage):
+    """Takes (frame, payload) items, renders each with render(frame, payload) and encodes it"""
+    def __init__(self, out: cv2.VideoWriter, items: queue.Queue, render: Callable, stop: threading.Event, timings: StageTimings):
+        super().__init__("encode", stop, timings)
+        self.out = out
+        self.items = items
+        self.render = render
+
+    def work(self):
+        while True:
+            item = self.get(self.items)
+            if item is _END:
+                break
+            frame, payload = item
+            started = time.perf_counter()
+            self.render(frame, payload)
+            rendered = time.perf_counter()
+            self.out.write(frame)
+            self.timings.add("render", busy=rendered - started)
+            self.timings.add("encode", busy=time.perf_counter() - rendered)
+
+
+class FramePipeline:
+    """
+    decode thread -> bounded queue -> caller's inference loop -> bounded queue -> render/encode thread.
+    Iterate over the pipeline to get decoded frames, and emit() each frame with its inference result.
+    With out=None there is no render/encode stage and emit() is a no-op.
+    With step > 1 only every step-th frame is decoded and yielded.
+    """
+    def __init__(self, cap: cv2.VideoCapture, out: Optional[cv2.VideoWriter], render: Callable,
+                 queue_size: int = PIPELINE_QUEUE_SIZE, step: int = 1):
+        self.timings = StageTimings()
+        self.stop = threading.Event()
+        self._decoded = queue.Queue(maxsize=queue_size)
+        self._inferred = queue.Queue(maxsize=queue_size)
+        self._decoder = FrameDecoder(cap, self._decoded, self.stop, self.timings, step=step)
+        self._writer = FrameWriter(out, self._inferred, render, self.stop, self.timings) if out is not None else None
+        self._inference = _Stage("infer", self.stop, self.timings)
+        self.frames = 0
+        self._started = 0.0
+
+    def __enter__(self) -> "FramePipeline":
+        self._started = time.perf_counter()
+        self._decoder.start()
+        if self._writer is not None:
+            self._writer.start()
+        return self
+
+    def __iter__(self):
+        while True:
+            frame = self._inference.get(self._decoded)
+            if frame is _END:
+                return
+            self.frames += 1
+            yield frame
+
+    def emit(self, frame, payload):
+        if self._writer is not None:
+            self._inference.put(self._inferred, (frame, payload))
+
+    def __exit__(self, exc_type, exc, tb):
+        stages = [stage for stage in (self._decoder, self._writer) if stage is not None]
+        if exc_type is None and self._writer is not None:
+            self._inference.put(self._inferred, _END)
+        elif exc_type is not None:
+            self.stop.set()
+        for stage in stages:
+            stage.join()
+        for stage in stages:
+            if stage.error is not None and exc_type is None:
+                raise stage.error
+        return False
+
+    def summary(self) -> dict:
+        return self.timings.summary(self.frames, time.perf_counter() - self._started)
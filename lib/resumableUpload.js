@@ -0,0 +1,132 @@
+// lib/resumableUpload.js - Resumable video uploads (/uploads/sessions)
+import * as FileSystem from 'expo-file-system';
+import AsyncStorage from '@react-native-async-storage/async-storage';
+import { API_CONFIG } from '../screens/config';
+
+const SESSIONS_URL = `${API_CONFIG.BASE_URL}/uploads/sessions`;
+const SESSION_KEY_PREFIX = 'resumableUpload:';
+const MAX_RETRIES = 8;
+const HEADERS = { 'ngrok-skip-browser-warning': 'true', 'Accept': 'application/json' };
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+const parseJson = (text) => {
+  try {
+    return JSON.parse(text);
+  } catch {
+    return {};
+  }
+};
+
+// One session per picked file, so an app restart resumes instead of starting over
+const sessionKey = (uri, size) => `${SESSION_KEY_PREFIX}${uri}:${size}`;
+
+const createSession = async (name, size) => {
+  const formData = new FormData();
+  formData.append('filename', name);
+  formData.append('size', String(size));
+
+  const response = await fetch(SESSIONS_URL, { method: 'POST', body: formData, headers: HEADERS });
+  const result = await response.json();
+  if (!response.ok) {
+    throw new Error(result.detail || `Could not start upload: HTTP ${response.status}`);
+  }
+  return result;
+};
+
+// Offset the server has for a session, or null if the session is gone
+const fetchSession = async (uploadUrl) => {
+  const response = await fetch(uploadUrl, { headers: HEADERS });
+  if (response.status === 404) {
+    return null;
+  }
+  const result = await response.json();
+  if (!response.ok) {
+    throw new Error(result.detail || `Could not read upload state: HTTP ${response.status}`);
+  }
+  return result;
+};
+
+// PATCH one slice of the file; the slice goes through a cache file so it is sent as raw bytes
+const sendChunk = async (uploadUrl, uri, offset, length) => {
+  const chunk = await FileSystem.readAsStringAsync(uri, {
+    encoding: FileSystem.EncodingType.Base64,
+    position: offset,
+    length,
+  });
+  const chunkUri = `${FileSystem.cacheDirectory}upload-chunk-${Date.now()}.bin`;
+  await FileSystem.writeAsStringAsync(chunkUri, chunk, { encoding: FileSystem.EncodingType.Base64 });
+
+  try {
+    const response = await FileSystem.uploadAsync(uploadUrl, chunkUri, {
+      httpMethod: 'PATCH',
+      uploadType: FileSystem.FileSystemUploadType.BINARY_CONTENT,
+      headers: { ...HEADERS, 'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': String(offset) },
+    });
+    const result = parseJson(response.body);
+    if (response.status === 200 || response.status === 409) {
+      // 409: the server is at a different offset (e.g. an earlier attempt got through); continue from there
+      return result.offset;
+    }
+    throw new Error(result.detail || `Chunk upload failed: HTTP ${response.status}`);
+  } finally {
+    await FileSystem.deleteAsync(chunkUri, { idempotent: true });
+  }
+};
+
+/**
+ * Upload a local video in chunks that survive dropped connections.
+ * Resolves with the same payload as POST /uploads: { filename, url, sha256, size }.
+ * onProgress(fraction) is called after every chunk.
+ */
+export async function uploadVideoResumable(video, onProgress = () => {}) {
+  const info = await FileSystem.getInfoAsync(video.uri, { size: true });
+  if (!info.exists) {
+    throw new Error('Video file not found on device');
+  }
+  const size = info.size;
+  const key = sessionKey(video.uri, size);
+
+  // Resume a session from an earlier attempt if the server still has it
+  let session = null;
+  const storedUrl = await AsyncStorage.getItem(key);
+  if (storedUrl) {
+    session = await fetchSession(storedUrl).catch(() => null);
+  }
+  if (!session) {
+    session = await createSession(video.name || 'video.mp4', size);
+    await AsyncStorage.setItem(key, session.upload_url);
+  }
+
+  const { upload_url: uploadUrl, chunk_size: chunkSize } = session;
+  let offset = session.offset;
+  let retries = 0;
+  onProgress(offset / size);
+
+  while (offset < size) {
+    try {
+      offset = await sendChunk(uploadUrl, video.uri, offset, Math.min(chunkSize, size - offset));
+      retries = 0;
+      onProgress(offset / size);
+    } catch (error) {
+      if (++retries > MAX_RETRIES) {
+        throw error;
+      }
+      console.log(`Upload chunk failed (${error.message}), retry ${retries}/${MAX_RETRIES}`);
+      await sleep(Math.min(1000 * 2 ** retries, 30000));
+      // Only the chunk in flight is lost: ask the server how far it got
+      const state = await fetchSession(uploadUrl).catch(() => null);
+      if (state) {
+        offset = state.offset;
+      }
+    }
+  }
+
+  const response = await fetch(`${uploadUrl}/finalize`, { method: 'POST', headers: HEADERS });
+  const result = await response.json();
+  await AsyncStorage.removeItem(key);
+  if (!response.ok) {
+    throw new Error(result.detail || `Upload failed: HTTP ${response.status}`);
+  }
+  return result;
+}
@@ -353,6 +353,10 @@ export default function DemoSessionScreen() {
           setCurrentStep('Stand Naturally');
           break;
 
+        case 'startup':
+          console.log(`Pose startup (${data.cache}): first pose after ${data.time_to_first_pose_ms} ms`);
+          break;
+
         // Handle audio/visual feedback messages from WebView
         case 'pose_detected':
           console.log('Pose detected - playing start sound');
@@ -210,6 +210,32 @@ export default function MovementAnalysisScreen() {
     }
   };
 
+  // Poll a queued analysis job until it completes or fails
+  const pollAnalysisStatus = async (analysisId) => {
+    const { POLLING_INTERVAL, MAX_POLLING_ATTEMPTS } = API_CONFIG.MOVEMENT_ANALYSIS;
+
+    for (let attempt = 0; attempt < MAX_POLLING_ATTEMPTS; attempt++) {
+      const statusResponse = await fetch(`${API_CONFIG.BASE_URL}/movement-analysis/status/${analysisId}`);
+      const status = await statusResponse.json();
+
+      if (!statusResponse.ok) {
+        throw new Error(status.detail || 'Status check failed');
+      }
+      if (status.status === 'completed') {
+        return status.results;
+      }
+      if (status.status === 'failed') {
+        throw new Error(status.error || 'Analysis failed');
+      }
+
+      await new Promise(resolve => setTimeout(resolve, POLLING_INTERVAL));
+    }
+
+    throw new Error(
+      `Analysis timed out after ${Math.round(MAX_POLLING_ATTEMPTS * POLLING_INTERVAL / 1000)} seconds. Please try again later.`
+    );
+  };
+
   // Analyze uploaded video
   const analyzeVideo = async (videoUrl) => {
     setIsAnalyzing(true);
@@ -229,12 +255,15 @@ export default function MovementAnalysisScreen() {
         },
       });
 
-      const analysisData = await analysisResponse.json();
+      const queuedData = await analysisResponse.json();
       
       if (!analysisResponse.ok) {
-        throw new Error(analysisData.detail || 'Analysis failed');
+        throw new Error(queuedData.detail || 'Analysis failed');
       }
 
+      // Analysis runs as a background job on the server; poll until it finishes
+      const analysisData = await pollAnalysisStatus(queuedData.analysis_id);
+
       console.log('Analysis successful:', analysisData);
       
       setAnalysisResults(analysisData);
@@ -246,7 +275,7 @@ export default function MovementAnalysisScreen() {
       // Show success message
       Alert.alert(
         'Analysis Complete! 🎉', 
-        `Overall Score: ${(analysisData.overall_score * 100).toFixed(1)}%\nProcessed ${analysisData.frames_processed} frames\n\nView detailed results with pose landmarks!`,
+        `Overall Score: ${analysisData.overall_score.toFixed(1)}%\nProcessed ${analysisData.frames_processed} frames\n\nView detailed results with pose landmarks!`,
         [{ text: 'View Results', onPress: () => setShowResultsModal(true) }]
       );
 
@@ -717,7 +746,7 @@ export default function MovementAnalysisScreen() {
                   <View style={styles.quickResultItem}>
                     <Text style={styles.quickResultLabel}>Overall Score</Text>
                     <Text style={styles.quickResultValue}>
-                      {(analysisResults.overall_score * 100).toFixed(1)}%
+                      {analysisResults.overall_score.toFixed(1)}%
                     </Text>
                   </View>
                   <View style={styles.quickResultItem}>
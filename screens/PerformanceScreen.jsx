@@ -213,6 +213,8 @@ export default function PerformanceScreen() {
       const formDataCompare = new FormData();
       formDataCompare.append("past_video_url", pastUrl);
       formDataCompare.append("new_video_url", newUrl);
+      // The result screen plays the annotated videos right away, so have them rendered with the comparison
+      formDataCompare.append("render_videos", "true");
 
       const compareResponse = await fetch(compareUrl, {
         method: 'POST',
@@ -16,6 +16,7 @@ import * as DocumentPicker from 'expo-document-picker';
 import * as FileSystem from 'expo-file-system';
 import Colors from '../constants/Colors';
 import { API_CONFIG } from './config';
+import { uploadVideoResumable } from '../lib/resumableUpload';
 
 const backgroundImage = require('../assets/sfgsdh.png');
 
@@ -92,33 +93,20 @@ export default function VideoUploadScreen({ navigation, route }) {
     setUploadProgress(0);
 
     try {
-      // Create form data
-      const formData = new FormData();
-      formData.append('file', {
-        uri: selectedVideo.uri,
-        type: selectedVideo.mimeType || 'video/mp4',
-        name: selectedVideo.name || 'video.mp4',
-      });
-      formData.append('movement', movement);
+      // Use config to get the analysis URL (same pattern as your other screens)
+      const analyzeUrl = `${API_CONFIG.BASE_URL}/movement-analysis/analyze`;
 
-      // Simulate upload progress
-      const progressInterval = setInterval(() => {
-        setUploadProgress(prev => {
-          const newProgress = prev + 10;
-          if (newProgress >= 90) {
-            clearInterval(progressInterval);
-            return 90;
-          }
-          return newProgress;
+      try {
+        // Chunked upload that resumes from the last acknowledged byte after a dropped connection
+        const upload = await uploadVideoResumable(selectedVideo, (fraction) => {
+          setUploadProgress(Math.round(fraction * 90));
         });
-      }, 200);
+        console.log('Upload successful:', upload);
 
-      // Use config to get upload URL (same pattern as your other screens)
-      const uploadUrl = `${API_CONFIG.BASE_URL}/movement-analysis/upload`;
-      console.log('Uploading to:', uploadUrl);
-
-      try {
-        const response = await fetch(uploadUrl, {
+        const formData = new FormData();
+        formData.append('video_url', upload.url);
+        formData.append('movement', movement);
+        const response = await fetch(analyzeUrl, {
           method: 'POST',
           body: formData,
           headers: {
@@ -126,12 +114,11 @@ export default function VideoUploadScreen({ navigation, route }) {
           },
         });
 
-        clearInterval(progressInterval);
         setUploadProgress(100);
 
         if (response.ok) {
           const result = await response.json();
-          console.log('Upload successful:', result);
+          console.log('Analysis queued:', result);
           
           navigation.navigate('AnalysisLoadingScreen', {
             analysisId: result.analysis_id || 'mock_' + Date.now(),
@@ -140,14 +127,13 @@ export default function VideoUploadScreen({ navigation, route }) {
             videoInfo: selectedVideo
           });
         } else {
-          console.log('Upload failed with status:', response.status);
+          console.log('Analysis request failed with status:', response.status);
           throw new Error(`Upload failed: HTTP ${response.status}`);
         }
       } catch (networkError) {
         console.log('Network error, using mock flow:', networkError.message);
         
         // Fall back to mock for demo
-        clearInterval(progressInterval);
         setUploadProgress(100);
         
         navigation.navigate('AnalysisLoadingScreen', {
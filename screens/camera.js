@@ -147,6 +147,9 @@ export default function OptimizedCameraApp() {
           case 'pose_data':
             setConnectionStatus('active');
             break;
+          case 'startup':
+            console.log(`Pose startup (${parsed.cache}): first pose after ${parsed.time_to_first_pose_ms} ms`);
+            break;
           case 'error':
             console.error('WebView error:', parsed.message);
             setConnectionStatus('error');
@@ -5,8 +5,7 @@ import { LinearGradient } from 'expo-linear-gradient';
 import { Ionicons } from '@expo/vector-icons';
 import { API_CONFIG } from './config'; // Import centralized config
 import Colors from '../constants/Colors';
-
-const SERVER_URL = `${API_CONFIG.BASE_URL}/uploads`; // Use config for base URL
+import { uploadVideoResumable } from '../lib/resumableUpload';
 
 export default function VideoUploadScreen({ navigation }) {
   const [pastVideo, setPastVideo] = useState(null);
@@ -34,47 +33,15 @@ export default function VideoUploadScreen({ navigation }) {
     }
   };
 
-  const uploadVideo = async (video) => {
+  const uploadVideo = async (video, label) => {
     console.log('Starting upload for video:', video.name);
 
     try {
-      const formData = new FormData();
-      formData.append('file', {
-        uri: video.uri,
-        name: video.name || 'video.mp4',
-        type: 'video/mp4',
-      });
-
-      console.log('Sending upload request to:', SERVER_URL);
-
-      const response = await fetch(SERVER_URL, {
-        method: 'POST',
-        body: formData,
-        headers: {
-          'Content-Type': 'multipart/form-data',
-          'Accept': 'application/json'
-        },
+      // Chunked upload that resumes from the last acknowledged byte after a dropped connection
+      const result = await uploadVideoResumable(video, (fraction) => {
+        setCurrentStep(`Uploading ${label} video... ${Math.round(fraction * 100)}%`);
       });
-
-      console.log('Upload response status:', response.status);
-
-      // Get response as text first for debugging
-      const responseText = await response.text();
-      console.log('Upload response text:', responseText);
-
-      // Try to parse the JSON
-      let result;
-      try {
-        result = JSON.parse(responseText);
-        console.log('Parsed upload result:', result);
-      } catch (parseError) {
-        console.error('Failed to parse upload response as JSON:', parseError);
-        throw new Error(`Server returned invalid JSON: ${responseText.substring(0, 100)}...`);
-      }
-
-      if (!response.ok) {
-        throw new Error(result.detail || `Upload failed with status ${response.status}`);
-      }
+      console.log('Upload result:', result);
 
       if (!result.url) {
         throw new Error('Upload succeeded but no URL was returned');
@@ -98,13 +65,13 @@ export default function VideoUploadScreen({ navigation }) {
       // Upload past video
       setCurrentStep('Uploading past video...');
       console.log('Uploading past video...');
-      const pastUpload = await uploadVideo(pastVideo);
+      const pastUpload = await uploadVideo(pastVideo, 'past');
       console.log('Past video uploaded successfully:', pastUpload.url);
 
       // Upload new video
       setCurrentStep('Uploading new video...');
       console.log('Uploading new video...');
-      const newUpload = await uploadVideo(newVideo);
+      const newUpload = await uploadVideo(newVideo, 'new');
       console.log('New video uploaded successfully:', newUpload.url);
 
       // Call compare endpoint
@@ -113,7 +80,7 @@ export default function VideoUploadScreen({ navigation }) {
 
       // Use URL-encoded format for the comparison request
       const compareUrl = `${API_CONFIG.BASE_URL}/compare`;
-      const compareBody = `past_video_url=${encodeURIComponent(pastUpload.url)}&new_video_url=${encodeURIComponent(newUpload.url)}`;
+      const compareBody = `past_video_url=${encodeURIComponent(pastUpload.url)}&new_video_url=${encodeURIComponent(newUpload.url)}&render_videos=true`;
 
       console.log('Compare request URL:', compareUrl);
       console.log('Compare request body:', compareBody);